@@ -0,0 +1,337 @@
+# myreport/common/image_processing.py
+
+from __future__ import annotations
+
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connections
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+ORIENTATION_TAG = 0x0112
+# orientações EXIF que trocam largura e altura
+AXIS_SWAPPING_ORIENTATIONS = {5, 6, 7, 8}
+
+# Orçamentos (sobrescrevíveis em settings)
+DEFAULT_MAX_PIXELS = 150_000_000
+DEFAULT_DECODE_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Cópias simultâneas do bitmap no pipeline (decodificado, girado, reduzido/RGB)
+PIPELINE_COPIES = 3
+
+
+# =========================
+# Orçamentos de pixels e memória
+# =========================
+class ImageTooLarge(ValueError):
+    """Imagem acima do orçamento de pixels/memória (ex.: decompression bomb)."""
+
+
+def check_pixel_budget(width: int, height: int) -> None:
+    """Recusa imagens acima de IMAGE_MAX_PIXELS (verificado no cabeçalho, antes de decodificar)."""
+    limit = int(getattr(settings, "IMAGE_MAX_PIXELS", DEFAULT_MAX_PIXELS))
+    if width * height > limit:
+        raise ImageTooLarge(
+            f"Imagem muito grande ({width}x{height} px; limite de {limit // 1_000_000} megapixels)."
+        )
+
+
+class MemoryBudget:
+    """
+    Orçamento de memória de decodificação compartilhado pelas threads do
+    processo: cada decodificação reserva a estimativa do bitmap e aguarda
+    enquanto o total reservado estourar o limite.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._used = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int):
+        if nbytes > self.limit:
+            raise ImageTooLarge(
+                f"Imagem exige ~{nbytes // (1024 * 1024)} MiB para decodificar "
+                f"(limite de {self.limit // (1024 * 1024)} MiB)."
+            )
+        with self._cond:
+            while self._used + nbytes > self.limit:
+                self._cond.wait()
+            self._used += nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._used -= nbytes
+                self._cond.notify_all()
+
+
+_budgets: dict[int, MemoryBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def decode_budget() -> MemoryBudget:
+    limit = int(getattr(settings, "IMAGE_DECODE_MEMORY_BUDGET", DEFAULT_DECODE_MEMORY_BUDGET))
+    with _budgets_lock:
+        budget = _budgets.get(limit)
+        if budget is None:
+            budget = _budgets[limit] = MemoryBudget(limit)
+        return budget
+
+
+def estimated_decode_bytes(img: Image.Image) -> int:
+    """Memória estimada para decodificar e processar img (no tamanho atual, após draft)."""
+    return img.width * img.height * max(len(img.getbands()), 3) * PIPELINE_COPIES
+
+
+# =========================
+# Abertura com redução na decodificação
+# =========================
+def exif_orientation(img: Image.Image) -> int:
+    try:
+        return int(img.getexif().get(ORIENTATION_TAG, 1) or 1)
+    except Exception:
+        return 1
+
+
+def fit_within(
+    width: int,
+    height: int,
+    *,
+    max_width: Optional[int] = None,
+    max_side: Optional[int] = None,
+) -> tuple[int, int]:
+    """Tamanho final (sem ampliar) respeitando max_width e/ou max_side, mantendo a proporção."""
+    scale = 1.0
+    if max_width:
+        scale = min(scale, max_width / width)
+    if max_side:
+        scale = min(scale, max_side / max(width, height))
+    if scale >= 1.0:
+        return width, height
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def open_image(fh) -> Image.Image:
+    """
+    Abre a imagem lendo apenas o cabeçalho e aplica o orçamento de pixels.
+    Decompression bombs são recusadas antes de qualquer decodificação.
+    """
+    try:
+        img = Image.open(fh)
+    except Image.DecompressionBombError as exc:
+        raise ImageTooLarge(str(exc)) from exc
+    check_pixel_budget(*img.size)
+    return img
+
+
+def draft_for(img: Image.Image, target: tuple[int, int], orientation: int = 1) -> None:
+    """
+    JPEG: decodifica direto numa escala reduzida (1/2, 1/4, 1/8) ainda maior
+    ou igual ao tamanho final, em vez de decodificar a resolução cheia.
+    `target` está na orientação final (após EXIF).
+    """
+    if img.format != "JPEG":
+        return
+    width, height = target
+    if orientation in AXIS_SWAPPING_ORIENTATIONS:
+        width, height = height, width
+    img.draft(img.mode, (width, height))
+
+
+# =========================
+# Normalização da imagem
+# =========================
+@dataclass(frozen=True, slots=True)
+class NormalizedImage:
+    """JPEG resultante da normalização e as dimensões (antes/depois)."""
+
+    data: bytes
+    width: int
+    height: int
+    source_width: int
+    source_height: int
+
+
+def normalize_image(
+    fh,
+    *,
+    max_width: Optional[int] = None,
+    max_side: Optional[int] = None,
+    quality: int = 85,
+    always: bool = False,
+    draft: bool = True,
+) -> Optional[NormalizedImage]:
+    """
+    Normaliza uma imagem enviada pelo usuário:
+    - corrige orientação EXIF;
+    - converte para RGB (transparência sobre fundo branco);
+    - reduz (sem ampliar) para max_width e/ou max_side;
+    - regrava como JPEG.
+
+    JPEGs grandes são decodificados já reduzidos (draft) e toda decodificação
+    respeita os orçamentos de pixels e de memória (ImageTooLarge).
+
+    Retorna None quando não há o que fazer (JPEG já no tamanho e sem rotação
+    EXIF) e always=False, ou quando o arquivo não é imagem legível.
+    """
+    try:
+        img = open_image(fh)
+    except ImageTooLarge:
+        raise
+    except Exception:
+        return None
+
+    source_size = img.size
+    source_format = img.format
+    orientation = exif_orientation(img)
+    rotated = orientation not in (0, 1)
+
+    width, height = source_size
+    if orientation in AXIS_SWAPPING_ORIENTATIONS:
+        width, height = height, width
+    target = fit_within(width, height, max_width=max_width, max_side=max_side)
+    needs_resize = target != (width, height)
+
+    if not (always or rotated or needs_resize or source_format != "JPEG"):
+        return None
+
+    if needs_resize and draft:
+        draft_for(img, target, orientation)
+
+    with decode_budget().reserve(estimated_decode_bytes(img)):
+        try:
+            img.load()
+        except Exception:
+            return None
+
+        if rotated:
+            img = ImageOps.exif_transpose(img)
+        if img.size != target:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+
+        if img.mode in ("RGBA", "LA", "P"):
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel("A"))
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=quality, optimize=True)
+
+    return NormalizedImage(
+        data=out.getvalue(),
+        width=img.width,
+        height=img.height,
+        source_width=source_size[0],
+        source_height=source_size[1],
+    )
+
+
+def swap_file_field(model, pk, field_name: str, old_name: str, data: bytes, **updates) -> Optional[str]:
+    """
+    Grava `data` como <pasta do original>/<nome>.jpg e troca o arquivo do
+    registro com UPDATE condicional (o campo ainda aponta para old_name).
+
+    - sucesso: remove o arquivo antigo e devolve o novo nome;
+    - o registro mudou no intervalo (nova troca/exclusão): descarta o novo
+      arquivo e devolve None.
+
+    `updates` são gravados no mesmo UPDATE (ex.: dimensões).
+    """
+    storage = model._meta.get_field(field_name).storage
+    base, _ext = os.path.splitext(old_name)
+    new_name = storage.save(f"{base}.jpg", ContentFile(data))
+
+    swapped = model._default_manager.filter(pk=pk, **{field_name: old_name}).update(
+        **{field_name: new_name}, **updates
+    )
+    stale = old_name if swapped else new_name
+    try:
+        storage.delete(stale)
+    except Exception:
+        logger.warning("Falha ao remover o arquivo %s.", stale, exc_info=True)
+
+    return new_name if swapped else None
+
+
+# =========================
+# Pool local de workers
+# =========================
+def run_worker_pool(
+    claim_next: Callable[[], object],
+    process: Callable[[object], None],
+    *,
+    workers: int = 2,
+    once: bool = False,
+    poll_interval: float = 2.0,
+    on_done: Optional[Callable[[object, float], None]] = None,
+) -> None:
+    """
+    Executa `workers` threads que reivindicam (claim_next) e processam
+    (process) itens de uma fila em banco até ela esvaziar (once=True) ou
+    indefinidamente. Com workers=0 o laço roda na thread atual.
+
+    claim_next deve ser atômico (UPDATE condicional) e devolver None quando
+    não houver itens; cada thread usa a própria conexão com o banco.
+    """
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while not stop.is_set():
+            close_old_connections()
+            item = claim_next()
+            if item is None:
+                if once:
+                    return
+                stop.wait(poll_interval)
+                continue
+
+            started = time.monotonic()
+            try:
+                process(item)
+            except Exception:
+                logger.exception("Falha ao processar %r.", item)
+            if on_done:
+                on_done(item, time.monotonic() - started)
+
+    def _thread_loop() -> None:
+        try:
+            _loop()
+        finally:
+            # conexões são por thread: fecha as desta thread ao encerrar
+            connections.close_all()
+
+    if workers <= 0:
+        try:
+            _loop()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    threads = [
+        threading.Thread(target=_thread_loop, name=f"image-worker-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        for t in threads:
+            t.join()
@@ -0,0 +1,134 @@
+# myreport/common/media_serving.py
+
+from __future__ import annotations
+
+import mimetypes
+import posixpath
+import re
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+# Cache do navegador para mídia autenticada (nunca em caches compartilhados)
+DEFAULT_MEDIA_MAX_AGE = 3600
+DEFAULT_ACCEL_PREFIX = "/protected-media/"
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def clean_media_name(name: str) -> Optional[str]:
+    """Nome relativo normalizado, ou None se tentar sair de MEDIA_ROOT."""
+    name = (name or "").replace("\\", "/")
+    normalized = posixpath.normpath(name).lstrip("/")
+    if not normalized or normalized in (".", "..") or normalized.startswith("../") or normalized != name.lstrip("/"):
+        return None
+    return normalized
+
+
+def _etag(size: int, modified) -> str:
+    return f'"{int(modified.timestamp() * 1_000_000):x}-{size:x}"'
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Um único intervalo "bytes=início-fim" (inclusive). None: servir o
+    arquivo inteiro; (-1, -1): intervalo impossível (416).
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # sufixo: os últimos N bytes
+        length = int(last)
+        if length == 0:
+            return (-1, -1)
+        return (max(0, size - length), size - 1)
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return (-1, -1)
+    return (start, end)
+
+
+def _read_range(fh, start: int, length: int):
+    try:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def serve_media(request, storage, name: str, *, max_age: Optional[int] = None) -> HttpResponse:
+    """
+    Entrega um arquivo do storage já autorizado pela view.
+
+    Conforme MEDIA_ACCEL:
+    - "nginx": X-Accel-Redirect para MEDIA_ACCEL_PREFIX (location `internal`
+      do nginx apontando para MEDIA_ROOT); o nginx transfere os bytes;
+    - "sendfile": X-Sendfile com o caminho absoluto (Apache/lighttpd);
+    - "" (padrão): resposta do próprio Django, com ETag, Last-Modified,
+      304 e Range/206.
+    """
+    if max_age is None:
+        max_age = int(getattr(settings, "MEDIA_MAX_AGE", DEFAULT_MEDIA_MAX_AGE))
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    accel = (getattr(settings, "MEDIA_ACCEL", "") or "").strip().lower()
+
+    if accel == "nginx":
+        prefix = getattr(settings, "MEDIA_ACCEL_PREFIX", DEFAULT_ACCEL_PREFIX).rstrip("/")
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = f"{prefix}/{quote(name)}"
+        response["Cache-Control"] = f"private, max-age={max_age}"
+        return response
+
+    size = storage.size(name)
+    modified = storage.get_modified_time(name)
+    etag = _etag(size, modified)
+    last_modified = http_date(modified.timestamp())
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=modified.timestamp())
+    if conditional is not None:
+        response = conditional
+    elif accel == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = storage.path(name)
+    else:
+        byte_range = None
+        if_range = request.headers.get("If-Range")
+        if request.method == "GET" and (not if_range or if_range in (etag, last_modified)):
+            byte_range = _parse_range(request.headers.get("Range", ""), size)
+
+        if byte_range == (-1, -1):
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(storage.open(name, "rb"), start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+        else:
+            response = FileResponse(storage.open(name, "rb"), content_type=content_type)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = f"private, max-age={max_age}"
+    return response
@@ -10,4 +10,5 @@ urlpatterns = [
     path("403/", views.error_403, name="error_403"),
     path("404/", views.error_404, name="error_404"),
     path("500/", views.error_500, name="error_500"),
+    path("render-cache/", views.render_cache_stats, name="render_cache_stats"),
 ]
@@ -1,8 +1,11 @@
 # devtools/views.py
 from django.core.exceptions import PermissionDenied
-from django.http import Http404, HttpResponseServerError
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponseServerError, JsonResponse
 from django.shortcuts import render
 
+from report_maker.utils.render_cache import get_render_cache
+
 
 def devtool(request):
     return render(request, "devtools/devtool.html")
@@ -29,4 +32,17 @@ def error_500(request):
     """
     return HttpResponseServerError(
         render(request, "500.html").content
-    )
\ No newline at end of file
+    )
+
+
+@staff_member_required
+def render_cache_stats(request):
+    """
+    Contadores do cache de renderização deste processo (acertos memória/banco,
+    erros, gravações, remoções). `?reset=1` zera os contadores.
+    """
+    cache = get_render_cache()
+    stats = cache.stats()
+    if request.GET.get("reset") == "1":
+        cache.reset_stats()
+    return JsonResponse(stats)
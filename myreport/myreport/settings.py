@@ -11,7 +11,71 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # ---------------------------------------------------------------------
 # Para exibir equações matemáticas no pdf
 # ---------------------------------------------------------------------
-KATEX_CLI_BIN = str(BASE_DIR / "node_modules" / ".bin" / "katex.cmd")
+# Executável do Node.js usado pelo processo KaTeX persistente
+# (report_maker/utils/katex_daemon.js, que carrega node_modules/katex).
+KATEX_NODE_BIN = os.environ.get("KATEX_NODE_BIN", "node")
+
+# Cache de renderização (markdown sanitizado + equações), endereçado por conteúdo.
+# Camada em memória (LRU por processo) + tabela RenderCacheEntry limitada em bytes.
+RENDER_CACHE_MEMORY_ENTRIES = 2048
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Contadores de acerto/erro registrados no log (INFO) a cada N s por processo
+RENDER_CACHE_STATS_LOG_SECONDS = 300
+
+# ---------------------------------------------------------------------
+# Geração de PDF em segundo plano (fila ReportRenderJob)
+# ---------------------------------------------------------------------
+# base_url usada pelo worker (fora de request). Mídia e estáticos são
+# resolvidos localmente pelo url_fetcher; o host aqui só precisa ser válido.
+REPORT_PDF_BASE_URL = os.environ.get("REPORT_PDF_BASE_URL", "http://localhost/")
+
+# Figuras do PDF: derivado JPEG na largura impressa (width_cm_dot) nesta
+# resolução, no lugar do upload original.
+REPORT_PDF_IMAGE_DPI = int(os.environ.get("REPORT_PDF_IMAGE_DPI", "200"))
+REPORT_PDF_IMAGE_QUALITY = 85
+
+# Renderização isolada (report_maker/utils/pdf_pool.py): pool de processos
+# WeasyPrint pré-aquecidos, fora do processo web/worker. 0 = renderiza no
+# próprio processo (desenvolvimento/testes).
+REPORT_PDF_POOL_SIZE = int(os.environ.get("REPORT_PDF_POOL_SIZE", "0"))
+REPORT_PDF_TIMEOUT_SECONDS = int(os.environ.get("REPORT_PDF_TIMEOUT_SECONDS", "300"))
+# Limite do espaço de endereçamento (RLIMIT_AS) de cada renderer
+REPORT_PDF_MEMORY_LIMIT_MB = int(os.environ.get("REPORT_PDF_MEMORY_LIMIT_MB", "3072"))
+# Reciclagem do renderer: após N laudos ou acima de M MB de RSS
+REPORT_PDF_WORKER_MAX_JOBS = 20
+REPORT_PDF_WORKER_MAX_RSS_MB = 1024
+# Estáticos e emblemas do PDF mantidos em memória por processo (bytes)
+REPORT_PDF_ASSET_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# Single-flight: PDF concluído da mesma versão do laudo é reaproveitado por N s
+REPORT_PDF_REUSE_SECONDS = 600
+# Jobs finalizados (e os PDFs gerados) são removidos pelo worker após N horas
+REPORT_PDF_JOB_RETENTION_HOURS = int(os.environ.get("REPORT_PDF_JOB_RETENTION_HOURS", "24"))
+# Heartbeat do worker durante a renderização; sem sinal, o job volta à fila
+# (render_report_pdfs --stale-after) até N tentativas, depois FAILED
+REPORT_PDF_JOB_HEARTBEAT_SECONDS = 15
+REPORT_PDF_JOB_MAX_ATTEMPTS = 3
+
+# ---------------------------------------------------------------------
+# Processamento de imagens enviadas (fora do request)
+# ---------------------------------------------------------------------
+# Uploads são gravados como enviados; orientação EXIF, redimensionamento e
+# versões de tela ficam com os workers `process_object_images` e
+# `process_social_images` (pool local de threads).
+REPORT_IMAGE_MAX_WIDTH = 1600
+REPORT_IMAGE_QUALITY = 85
+REPORT_IMAGE_WORKERS = int(os.environ.get("REPORT_IMAGE_WORKERS", "2"))
+
+# Orçamentos de decodificação por processo worker. JPEGs grandes são
+# decodificados já reduzidos (draft); imagens acima de IMAGE_MAX_PIXELS são
+# recusadas no upload (cabeçalho) e decodificações simultâneas aguardam
+# enquanto a memória estimada passar de IMAGE_DECODE_MEMORY_BUDGET (bytes).
+IMAGE_MAX_PIXELS = int(os.environ.get("IMAGE_MAX_PIXELS", "150000000"))
+IMAGE_DECODE_MEMORY_BUDGET = int(os.environ.get("IMAGE_DECODE_MEMORY_BUDGET", str(512 * 1024 * 1024)))
+
+# Upload em lote (várias fotos do mesmo objeto num único POST)
+REPORT_IMAGE_BULK_MAX_FILES = 300
+REPORT_IMAGE_BULK_WORKERS = 8
+DATA_UPLOAD_MAX_NUMBER_FILES = REPORT_IMAGE_BULK_MAX_FILES
 
 # ---------------------------------------------------------------------
 # Integrações externas / Serviços de terceiros
@@ -157,6 +221,17 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Mídia protegida (report_maker.views.media): a autorização fica no Django
+# e a transferência, com o servidor web:
+#   "nginx"    -> X-Accel-Redirect para MEDIA_ACCEL_PREFIX (location internal
+#                 com alias para MEDIA_ROOT)
+#   "sendfile" -> X-Sendfile com o caminho absoluto (Apache/lighttpd)
+#   ""         -> o próprio Django entrega (ETag, 304 e Range)
+MEDIA_ACCEL = os.environ.get("MEDIA_ACCEL", "")
+MEDIA_ACCEL_PREFIX = os.environ.get("MEDIA_ACCEL_PREFIX", "/protected-media/")
+# Cache do navegador (privado) para a mídia autenticada, em segundos
+MEDIA_MAX_AGE = int(os.environ.get("MEDIA_MAX_AGE", "3600"))
+
 # ---------------------------------------------------------------------
 # Default PK
 # ---------------------------------------------------------------------
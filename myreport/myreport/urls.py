@@ -5,13 +5,18 @@ URLConf do projeto.
 
 Define o roteamento principal da aplicação, delegando os caminhos aos apps
 responsáveis e mantendo rotas condicionais de desenvolvimento quando habilitadas.
+
+A mídia (MEDIA_URL) passa sempre pela view protegida: em produção o nginx
+só a entrega via X-Accel-Redirect (location `internal`), depois da
+autorização no Django.
 """
 
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from report_maker.views.media import protected_media
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("report_maker/", include("report_maker.urls", namespace="report_maker")),
@@ -19,11 +24,11 @@ urlpatterns = [
     path("grupos/", include("groups.urls", namespace="groups")),
     path("rede/", include("social_net.urls")),
     path("accounts/", include("accounts.urls")),
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:name>", protected_media, name="protected_media"),
     path("", include("home.urls", namespace="home")),
 ]
 
 if getattr(settings, "ENABLE_DEVTOOLS", False):
     urlpatterns += [
         path("__dev__/", include("devtools.urls", namespace="devtools")),
-    ]
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 # report_maker/admin.py
 from django.contrib import admin
 
-from .models import ReportCase
+from .models import ReportCase, ReportRenderJob
 
 
 @admin.register(ReportCase)
@@ -60,6 +60,9 @@ class ReportCaseAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
         "concluded_at",
+        "final_pdf",
+        "final_pdf_sha256",
+        "final_pdf_rendered_at",
         "organization_frozen_at",
         "institution_display",
         "nucleus_display",
@@ -130,6 +133,9 @@ class ReportCaseAdmin(admin.ModelAdmin):
                     "sketch_by",
                     "conclusion",
                     "concluded_at",
+                    "final_pdf",
+                    "final_pdf_sha256",
+                    "final_pdf_rendered_at",
                 )
             },
         ),
@@ -169,3 +175,29 @@ class ReportCaseAdmin(admin.ModelAdmin):
             )
 
         return tuple(ro)
+
+
+@admin.register(ReportRenderJob)
+class ReportRenderJobAdmin(admin.ModelAdmin):
+    """
+    Fila de PDFs (somente leitura): acompanhamento de jobs e diagnóstico de falhas.
+    """
+
+    list_display = ("id", "report_case", "requested_by", "status", "worker", "created_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("report_case__report_number", "requested_by__username")
+    ordering = ("-created_at",)
+    readonly_fields = (
+        "report_case",
+        "requested_by",
+        "status",
+        "output",
+        "error",
+        "worker",
+        "created_at",
+        "started_at",
+        "finished_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
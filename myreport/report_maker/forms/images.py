@@ -1,7 +1,9 @@
 # path: myreport/report_maker/forms/object_image.py
 
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from common.image_processing import ImageTooLarge, check_pixel_budget
 from common.mixins import BaseModelForm
 from report_maker.models import ObjectImage
 
@@ -17,3 +19,14 @@ class ObjectImageForm(BaseModelForm):
     class Meta:
         model = ObjectImage
         fields = ["image", "caption"]
+
+    def clean_image(self):
+        image = self.cleaned_data.get("image")
+        # o ImageField já validou o arquivo; aqui só o orçamento de pixels
+        # (a decodificação acontece depois, no worker)
+        if isinstance(image, UploadedFile) and getattr(image, "image", None) is not None:
+            try:
+                check_pixel_budget(*image.image.size)
+            except ImageTooLarge as exc:
+                raise forms.ValidationError(str(exc))
+        return image
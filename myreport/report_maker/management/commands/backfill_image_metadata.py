@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from report_maker.models import ObjectImage
+from report_maker.utils.image_metadata import FIELDS, extract_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        "Lê os metadados EXIF (captura, GPS, orientação, câmera) das imagens de objetos "
+        "ainda não indexadas, em lotes, abrindo apenas o cabeçalho de cada arquivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Registros por lote (padrão: 200).")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Lê novamente mesmo para imagens já indexadas.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+
+        qs = ObjectImage.objects.only("id", "image")
+        if not options["force"]:
+            qs = qs.filter(metadata_extracted=False)
+
+        indexed = with_exif = missing = 0
+        last_pk = None
+        while True:
+            page = qs.order_by("pk")
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            done = []
+            for img in batch:
+                try:
+                    with img.image.open("rb") as fh:
+                        metadata = extract_metadata(fh)
+                except (OSError, ValueError):
+                    missing += 1
+                    continue
+
+                metadata.apply_to(img)
+                done.append(img)
+                if metadata.captured_at or metadata.gps_latitude is not None or metadata.camera_model:
+                    with_exif += 1
+
+            if done:
+                ObjectImage.objects.bulk_update(done, FIELDS)
+                indexed += len(done)
+
+        self.stdout.write(
+            f"ObjectImage: {indexed} indexada(s) ({with_exif} com EXIF), {missing} arquivo(s) ausente(s)."
+        )
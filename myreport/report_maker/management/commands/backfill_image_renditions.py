@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from report_maker.models import ObjectImage
+from report_maker.utils.image_derivatives import ensure_web_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as versões de tela (WebP + JPEG, tamanhos small/medium) das imagens "
+        "de objetos que ainda não as possuem, em lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Registros por lote (padrão: 100).")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Gera novamente mesmo para imagens que já possuem versões de tela.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        force = options["force"]
+
+        qs = ObjectImage.objects.only("id", "image", "renditions")
+        if not force:
+            qs = qs.filter(renditions=[])
+
+        generated = failed = 0
+        last_pk = None
+        while True:
+            page = qs.order_by("pk")
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for img in batch:
+                if ensure_web_renditions(img, force=True):
+                    generated += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(f"ObjectImage: {generated} processada(s), {failed} com falha.")
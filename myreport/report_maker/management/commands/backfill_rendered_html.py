@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+
+from report_maker.models import ExamObject, ReportTextBlock
+from report_maker.models.exam_base import downcast_exam_objects
+from report_maker.utils.rendered_html import refresh_rendered_html
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche/atualiza o HTML pré-renderizado (render-on-write) de ReportTextBlock "
+        "e objetos de exame existentes, em lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Registros por lote (padrão: 200).")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Renderiza novamente mesmo quando o hash da fonte não mudou.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        force = options["force"]
+
+        updated = self._backfill_text_blocks(batch_size, force)
+        self.stdout.write(f"ReportTextBlock: {updated} atualizado(s).")
+
+        updated = self._backfill_exam_objects(batch_size, force)
+        self.stdout.write(f"Objetos de exame: {updated} atualizado(s).")
+
+    def _iter_batches(self, qs, batch_size):
+        """Paginação por pk (estável e sem OFFSET)."""
+        last_pk = None
+        while True:
+            page = qs.order_by("pk")
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            batch = list(page[:batch_size])
+            if not batch:
+                return
+            last_pk = batch[-1].pk
+            yield batch
+
+    def _backfill_text_blocks(self, batch_size, force) -> int:
+        total = 0
+        qs = ReportTextBlock.objects.only("id", "body", "rendered_html", "rendered_source_hash")
+        for batch in self._iter_batches(qs, batch_size):
+            changed = []
+            for tb in batch:
+                if force:
+                    tb.rendered_source_hash = ""
+                if refresh_rendered_html(tb, tb.get_rendered_sources()):
+                    changed.append(tb)
+            ReportTextBlock.objects.bulk_update(changed, ["rendered_html", "rendered_source_hash"])
+            total += len(changed)
+        return total
+
+    def _backfill_exam_objects(self, batch_size, force) -> int:
+        total = 0
+        for batch in self._iter_batches(ExamObject.objects.all(), batch_size):
+            changed = []
+            # uma consulta por classe concreta do lote (evita N consultas no .concrete)
+            for obj in downcast_exam_objects(batch):
+                if obj._meta.model is ExamObject:
+                    continue
+                if force:
+                    obj.rendered_source_hash = ""
+                if refresh_rendered_html(obj, obj.get_rendered_sources()):
+                    changed.append(obj)
+
+            # campos vivem na tabela base (ExamObject)
+            rows = [
+                ExamObject(pk=o.pk, rendered_html=o.rendered_html, rendered_source_hash=o.rendered_source_hash)
+                for o in changed
+            ]
+            ExamObject.objects.bulk_update(rows, ["rendered_html", "rendered_source_hash"])
+            total += len(changed)
+        return total
@@ -0,0 +1,98 @@
+import io
+import multiprocessing
+import resource
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from common.image_processing import normalize_image
+
+# proporção típica de câmera (4:3)
+ASPECT = (4, 3)
+
+
+def _synthetic_jpeg(megapixels: float) -> bytes:
+    """JPEG sintético com gradientes (compressão próxima de uma foto real, sem ser uniforme)."""
+    unit = (megapixels * 1_000_000 / (ASPECT[0] * ASPECT[1])) ** 0.5
+    size = (round(unit * ASPECT[0]), round(unit * ASPECT[1]))
+
+    bands = [
+        Image.linear_gradient("L").resize(size),
+        Image.radial_gradient("L").resize(size),
+        Image.linear_gradient("L").rotate(90).resize(size),
+    ]
+    buf = io.BytesIO()
+    Image.merge("RGB", bands).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _measure(conn, data: bytes, max_width: int, draft: bool) -> None:
+    # processo filho: o pico de RSS (ru_maxrss, KiB no Linux) é só desta execução
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    result = normalize_image(io.BytesIO(data), max_width=max_width, always=True, draft=draft)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send((elapsed, max(0, peak - baseline), result.width if result else None))
+    conn.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo de decodificação e o pico de memória (RSS) da normalização de "
+        "imagens por tamanho de entrada, com e sem decodificação reduzida (draft JPEG)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--megapixels",
+            type=float,
+            nargs="+",
+            default=[12, 24, 48],
+            help="Tamanhos de entrada em megapixels (padrão: 12 24 48).",
+        )
+        parser.add_argument(
+            "--max-width",
+            type=int,
+            default=getattr(settings, "REPORT_IMAGE_MAX_WIDTH", 1600),
+            help="Largura final (padrão: REPORT_IMAGE_MAX_WIDTH).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Execuções por combinação; é reportada a mediana do tempo e o maior pico (padrão: 3).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ctx = multiprocessing.get_context("fork")
+        except ValueError:
+            raise CommandError("O benchmark exige multiprocessing com 'fork' (Linux/macOS).")
+
+        repeat = max(1, options["repeat"])
+        max_width = options["max_width"]
+
+        self.stdout.write(f"{'MP':>6} {'modo':>8} {'tempo (s)':>10} {'pico RSS (MiB)':>15} {'largura':>8}")
+        for megapixels in options["megapixels"]:
+            data = _synthetic_jpeg(megapixels)
+
+            for draft in (False, True):
+                times, peaks, width = [], [], None
+                for _ in range(repeat):
+                    parent, child = ctx.Pipe(duplex=False)
+                    proc = ctx.Process(target=_measure, args=(child, data, max_width, draft))
+                    proc.start()
+                    child.close()
+                    elapsed, peak_kib, width = parent.recv()
+                    proc.join()
+                    times.append(elapsed)
+                    peaks.append(peak_kib)
+
+                times.sort()
+                self.stdout.write(
+                    f"{megapixels:>6g} {'draft' if draft else 'cheio':>8} "
+                    f"{times[len(times) // 2]:>10.3f} {max(peaks) / 1024:>15.1f} {width or '-':>8}"
+                )
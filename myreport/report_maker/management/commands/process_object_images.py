@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.image_processing import run_worker_pool
+from report_maker.models import ObjectImage
+from report_maker.utils.image_ingest import process_object_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker das imagens enviadas (ObjectImage PENDING): normaliza o arquivo e gera "
+        "as versões de tela, com um pool local de threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa as imagens pendentes e encerra (útil para cron).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "REPORT_IMAGE_WORKERS", 2),
+            help="Threads de processamento (0 = na thread do comando; padrão: REPORT_IMAGE_WORKERS).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Segundos de espera quando a fila está vazia (padrão: 2).",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=300,
+            help="Segundos após os quais uma imagem em processamento é considerada abandonada (padrão: 300).",
+        )
+
+    def handle(self, *args, **options):
+        requeued = ObjectImage.requeue_stale(older_than=timedelta(seconds=max(1, options["stale_after"])))
+        if requeued:
+            self.stdout.write(f"{requeued} imagem(ns) abandonada(s) devolvida(s) à fila.")
+
+        self.stdout.write(f"Worker de imagens iniciado ({options['workers']} thread(s)).")
+
+        def _report(img, elapsed):
+            self.stdout.write(f"{img.pk} {img.processing_status} ({elapsed:.1f}s)")
+
+        run_worker_pool(
+            ObjectImage.claim_next_pending,
+            process_object_image,
+            workers=max(0, options["workers"]),
+            once=options["once"],
+            poll_interval=max(0.1, options["poll_interval"]),
+            on_done=_report,
+        )
+
+        self.stdout.write("Worker de imagens encerrado.")
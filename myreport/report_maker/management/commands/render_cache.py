@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from report_maker.models import RenderCacheEntry
+from report_maker.utils.render_cache import get_render_cache
+
+
+class Command(BaseCommand):
+    help = "Estatísticas e manutenção do cache de renderização (markdown/equações)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--evict", action="store_true", help="Aplica o limite de tamanho agora.")
+        parser.add_argument("--clear", action="store_true", help="Remove todas as entradas persistidas.")
+
+    def handle(self, *args, **options):
+        cache = get_render_cache()
+
+        if options["clear"]:
+            removed = RenderCacheEntry.objects.all().delete()[0]
+            self.stdout.write(f"{removed} entrada(s) removida(s).")
+        elif options["evict"]:
+            removed = cache.evict()
+            self.stdout.write(f"{removed} entrada(s) removida(s) pelo limite de tamanho.")
+
+        rows = (
+            RenderCacheEntry.objects.values("kind")
+            .annotate(entries=Count("key"), bytes=Sum("size"))
+            .order_by("kind")
+        )
+
+        total = 0
+        for row in rows:
+            total += row["bytes"] or 0
+            self.stdout.write(f"{row['kind']:<12} {row['entries']:>8} entradas {row['bytes'] or 0:>12} bytes")
+
+        self.stdout.write(f"{'total':<12} {'':>8}          {total:>12} bytes (limite {cache.max_bytes})")
+        self.stdout.write(
+            "Contadores de acerto/erro são por processo: cada processo do servidor os registra no log "
+            "(report_maker.utils.render_cache, a cada RENDER_CACHE_STATS_LOG_SECONDS)."
+        )
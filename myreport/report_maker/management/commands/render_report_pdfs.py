@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from report_maker.models import ReportRenderJob
+from report_maker.utils.pdf_pool import get_pdf_pool
+from report_maker.utils.pdf_render_queue import run_render_job
+
+
+# Intervalo entre limpezas de jobs antigos feitas pelo próprio laço do worker
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = "Worker da fila de PDFs de laudo (ReportRenderJob). Processa jobs pendentes em loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa os jobs pendentes e encerra (útil para cron).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Segundos de espera quando a fila está vazia (padrão: 2).",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=120,
+            help=(
+                "Segundos sem heartbeat após os quais um job RUNNING é considerado abandonado e volta "
+                "à fila (padrão: 120; o worker renova o heartbeat a cada REPORT_PDF_JOB_HEARTBEAT_SECONDS)."
+            ),
+        )
+        parser.add_argument(
+            "--retention-hours",
+            type=float,
+            default=None,
+            help="Horas que jobs finalizados e seus PDFs são mantidos (padrão: REPORT_PDF_JOB_RETENTION_HOURS).",
+        )
+        parser.add_argument(
+            "--purge",
+            action="store_true",
+            help="Apenas remove jobs finalizados além da retenção e encerra.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Jobs simultâneos (padrão: REPORT_PDF_POOL_SIZE, mínimo 1). Cada job ocupa um renderer do pool.",
+        )
+
+    def handle(self, *args, **options):
+        once = options["once"]
+        poll_interval = max(0.1, options["poll_interval"])
+        stale_after = timedelta(seconds=max(1, options["stale_after"]))
+        concurrency = options["concurrency"] or int(getattr(settings, "REPORT_PDF_POOL_SIZE", 0) or 0)
+        concurrency = max(1, concurrency)
+        worker = ReportRenderJob.worker_label()
+
+        retention_hours = options["retention_hours"]
+        if retention_hours is None:
+            retention_hours = float(getattr(settings, "REPORT_PDF_JOB_RETENTION_HOURS", 24))
+        self._retention = timedelta(hours=max(0.0, retention_hours))
+        self._purge_lock = threading.Lock()
+        self._next_purge = 0.0
+
+        if options["purge"]:
+            self._purge()
+            return
+
+        # renderers do pool (REPORT_PDF_POOL_SIZE > 0) iniciados e aquecidos antes do primeiro job
+        get_pdf_pool()
+        self.stdout.write(f"Worker de PDF iniciado ({worker}, {concurrency} simultâneo(s)).")
+
+        self._stop = threading.Event()
+        try:
+            if concurrency == 1:
+                self._work(worker, once=once, poll_interval=poll_interval, stale_after=stale_after)
+            else:
+                with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="render-pdf") as executor:
+                    futures = [
+                        executor.submit(
+                            self._work, worker, once=once, poll_interval=poll_interval, stale_after=stale_after
+                        )
+                        for _ in range(concurrency)
+                    ]
+                    try:
+                        for future in futures:
+                            future.result()
+                    except KeyboardInterrupt:
+                        self._stop.set()
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write("Worker de PDF encerrado.")
+
+    def _purge(self) -> None:
+        removed = ReportRenderJob.purge_finished(older_than=self._retention)
+        if removed:
+            self.stdout.write(f"{removed} job(s) finalizado(s) removido(s) (retenção {self._retention}).")
+
+    def _maybe_purge(self) -> None:
+        """Limpeza periódica: uma linha de execução por vez, a cada PURGE_INTERVAL_SECONDS."""
+        if time.monotonic() < self._next_purge or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                self._purge()
+        finally:
+            self._purge_lock.release()
+
+    def _work(self, worker: str, *, once: bool, poll_interval: float, stale_after: timedelta) -> None:
+        """Laço de uma linha de execução: reivindica e processa jobs até a fila esvaziar (--once) ou o stop."""
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                self._maybe_purge()
+
+                requeued = ReportRenderJob.requeue_stale(older_than=stale_after)
+                if requeued:
+                    self.stdout.write(f"{requeued} job(s) abandonado(s) devolvido(s) à fila.")
+
+                job = ReportRenderJob.claim_next(worker=worker)
+                if job is None:
+                    if once:
+                        break
+                    self._stop.wait(poll_interval)
+                    continue
+
+                started = time.monotonic()
+                run_render_job(job)
+                elapsed = time.monotonic() - started
+
+                self.stdout.write(f"{job.pk} {job.status} ({elapsed:.1f}s)")
+        finally:
+            close_old_connections()
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:19
+
+import django.db.models.deletion
+import report_maker.models.render_job
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0038_reportcase_director_name_snapshot_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='reportcase',
+            options={'ordering': ['is_locked', '-updated_at'], 'verbose_name': 'Laudo', 'verbose_name_plural': 'Laudos'},
+        ),
+        migrations.CreateModel(
+            name='ReportRenderJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('QUEUED', 'Na fila'), ('RUNNING', 'Em processamento'), ('DONE', 'Concluído'), ('FAILED', 'Falhou')], db_index=True, default='QUEUED', max_length=20, verbose_name='Status')),
+                ('output', models.FileField(blank=True, max_length=500, upload_to=report_maker.models.render_job.render_job_upload_path, verbose_name='PDF gerado')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('worker', models.CharField(blank=True, max_length=120, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')),
+                ('report_case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_jobs', to='report_maker.reportcase', verbose_name='Laudo')),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_render_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Renderização de PDF',
+                'verbose_name_plural': 'Renderizações de PDF',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='report_make_status_d1db91_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:22
+
+import report_maker.models.report_case
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0039_reportrenderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportcase',
+            name='final_pdf',
+            field=models.FileField(blank=True, max_length=500, upload_to=report_maker.models.report_case.report_pdf_upload_path, verbose_name='PDF final'),
+        ),
+        migrations.AddField(
+            model_name='reportcase',
+            name='final_pdf_rendered_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='PDF final gerado em'),
+        ),
+        migrations.AddField(
+            model_name='reportcase',
+            name='final_pdf_sha256',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='SHA-256 do PDF final'),
+        ),
+    ]
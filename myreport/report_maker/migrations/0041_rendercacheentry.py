@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0040_reportcase_final_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Chave (SHA-256)')),
+                ('kind', models.CharField(db_index=True, max_length=20, verbose_name='Tipo')),
+                ('value', models.TextField(verbose_name='HTML renderizado')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('last_used_at', models.DateTimeField(db_index=True, verbose_name='Último uso')),
+            ],
+            options={
+                'verbose_name': 'Cache de renderização',
+                'verbose_name_plural': 'Cache de renderização',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0041_rendercacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examobject',
+            name='rendered_html',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='HTML renderizado'),
+        ),
+        migrations.AddField(
+            model_name='examobject',
+            name='rendered_source_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Hash das fontes renderizadas'),
+        ),
+        migrations.AddField(
+            model_name='reporttextblock',
+            name='rendered_html',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='HTML renderizado'),
+        ),
+        migrations.AddField(
+            model_name='reporttextblock',
+            name='rendered_source_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Hash da fonte renderizada'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:49
+
+from django.db import migrations, models
+
+
+CONCRETE_MODELS = (
+    "PublicRoadExamObject",
+    "VehicleInspectionExamObject",
+    "GenericExamObject",
+    "GenericLocationExamObject",
+    "CadaverExamObject",
+)
+
+
+def fill_concrete_model(apps, schema_editor):
+    ExamObject = apps.get_model("report_maker", "ExamObject")
+    for name in CONCRETE_MODELS:
+        model = apps.get_model("report_maker", name)
+        ExamObject.objects.filter(
+            pk__in=model.objects.values("pk"),
+        ).update(concrete_model=model._meta.model_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0042_rendered_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examobject',
+            name='concrete_model',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Classe concreta'),
+        ),
+        migrations.RunPython(fill_concrete_model, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0043_examobject_concrete_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genericlocationexamobject',
+            name='geo_parsed',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Localização interpretada'),
+        ),
+        migrations.AddField(
+            model_name='publicroadexamobject',
+            name='geo_parsed',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Localização interpretada'),
+        ),
+    ]
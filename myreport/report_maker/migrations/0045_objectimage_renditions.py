@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0044_geo_parsed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objectimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Versões de tela'),
+        ),
+    ]
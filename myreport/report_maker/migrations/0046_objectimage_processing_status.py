@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0045_objectimage_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objectimage',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Processamento iniciado em'),
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Aguardando processamento'), ('PROCESSING', 'Em processamento'), ('READY', 'Pronta'), ('FAILED', 'Falhou')], db_index=True, default='READY', editable=False, max_length=20, verbose_name='Processamento'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0046_objectimage_processing_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('file', models.FileField(max_length=500, upload_to='', verbose_name='Arquivo')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Referências')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Arquivo de imagem',
+                'verbose_name_plural': 'Arquivos de imagem',
+            },
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='blob',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='images', to='report_maker.imageblob', verbose_name='Arquivo compartilhado'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0047_image_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, verbose_name='Escopo')),
+                ('parent_id', models.UUIDField(verbose_name='Pai')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Último valor')),
+            ],
+            options={
+                'verbose_name': 'Contador de posições',
+                'verbose_name_plural': 'Contadores de posições',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'parent_id'), name='uq_sequence_counter_scope_parent')],
+            },
+        ),
+    ]
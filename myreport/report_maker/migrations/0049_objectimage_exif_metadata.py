@@ -0,0 +1,53 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('report_maker', '0048_sequence_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objectimage',
+            name='camera_make',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Fabricante da câmera'),
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='camera_model',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='Modelo da câmera'),
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='captured_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Capturada em'),
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='exif_orientation',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, verbose_name='Orientação EXIF'),
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='gps_latitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitude (GPS)'),
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='gps_longitude',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitude (GPS)'),
+        ),
+        migrations.AddField(
+            model_name='objectimage',
+            name='metadata_extracted',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='Metadados lidos'),
+        ),
+        migrations.AddIndex(
+            model_name='objectimage',
+            index=models.Index(fields=['gps_latitude', 'gps_longitude'], name='report_make_gps_lat_da64ac_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0049_objectimage_exif_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportrenderjob',
+            name='content_version',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Versão do conteúdo'),
+        ),
+        migrations.AddField(
+            model_name='reportrenderjob',
+            name='superseded_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='report_maker.reportrenderjob', verbose_name='Substituído por'),
+        ),
+        migrations.AlterField(
+            model_name='reportrenderjob',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Na fila'), ('RUNNING', 'Em processamento'), ('DONE', 'Concluído'), ('FAILED', 'Falhou'), ('SUPERSEDED', 'Substituído')], db_index=True, default='QUEUED', max_length=20, verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='reportrenderjob',
+            index=models.Index(fields=['report_case', 'content_version'], name='report_make_report__20744b_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0050_reportrenderjob_single_flight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportrenderjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas'),
+        ),
+        migrations.AddField(
+            model_name='reportrenderjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último sinal do worker'),
+        ),
+    ]
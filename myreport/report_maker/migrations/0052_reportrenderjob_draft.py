@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report_maker', '0051_reportrenderjob_attempts_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportrenderjob',
+            name='draft',
+            field=models.BooleanField(default=False, verbose_name='Rascunho'),
+        ),
+    ]
@@ -4,8 +4,11 @@ from .report_case import ReportCase
 from .exam_base import ExamObject, ExamObjectGroup
 from .generic_object import GenericExamObject
 from .exam_public_road import PublicRoadExamObject
-from .images import ObjectImage
+from .images import ImageBlob, ObjectImage
 from .report_text_block import ReportTextBlock
 from .exam_vehicle_inspection import VehicleInspectionExamObject
 from .exam_generic_location import GenericLocationExamObject
 from .exam_cadaver import CadaverExamObject
+from .render_job import ReportRenderJob
+from .render_cache import RenderCacheEntry
+from .sequence import SequenceCounter
@@ -3,15 +3,21 @@
 from __future__ import annotations
 
 import uuid
-from typing import TypedDict, Literal, ClassVar
+from collections import defaultdict
+from typing import Iterable, TypedDict, Literal, ClassVar
 
 from django.contrib.contenttypes.fields import GenericRelation
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.db.models import Max
 from django.urls import reverse
 from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
 
+from report_maker.utils.rendered_html import refresh_rendered_html
+
+from .sequence import SequenceCounter
+
 
 class ExamObjectGroup(models.TextChoices):
     LOCATIONS = "LOCATIONS", _("Locais")
@@ -46,6 +52,47 @@ class RenderBlock(TypedDict, total=False):
     fmt: Literal["text", "md"]
 
 
+def downcast_exam_objects(objects: Iterable["ExamObject"]) -> list["ExamObject"]:
+    """
+    Converte uma lista de ExamObject nas instâncias concretas, preservando a ordem.
+
+    Uma consulta por classe concreta presente (via concrete_model). A filha
+    também fica em cache na instância base: base.concrete não consulta de novo.
+    """
+    base_objects = list(objects)
+
+    ids_by_rel: dict[str, list] = defaultdict(list)
+    for obj in base_objects:
+        rel = obj.concrete_model
+        if obj._meta.model is not ExamObject or rel not in ExamObject.CONCRETE_RELATIONS:
+            continue
+        if ExamObject._meta.get_field(rel).is_cached(obj):
+            continue
+        ids_by_rel[rel].append(obj.pk)
+
+    concrete_by_pk = {}
+    for rel, ids in ids_by_rel.items():
+        model = ExamObject._meta.get_field(rel).related_model
+        for concrete in model._base_manager.filter(pk__in=ids):
+            concrete_by_pk[concrete.pk] = concrete
+
+    result = []
+    for obj in base_objects:
+        concrete = concrete_by_pk.get(obj.pk)
+        if concrete is None:
+            result.append(obj.concrete)  # já concreta, em cache ou registro antigo
+            continue
+        ExamObject._meta.get_field(obj.concrete_model).set_cached_value(obj, concrete)
+        result.append(concrete)
+    return result
+
+
+class ExamObjectQuerySet(models.QuerySet):
+    def downcast(self) -> list["ExamObject"]:
+        """Instâncias concretas, na ordem do queryset (uma consulta por classe)."""
+        return downcast_exam_objects(self)
+
+
 class ExamObject(models.Model):
     """
     Base comum para todos os objetos examinados em um laudo.
@@ -58,6 +105,19 @@ class ExamObject(models.Model):
 
     GROUP_KEY: ClassVar[str | None] = ExamObjectGroup.OTHER  # sobrescreva nos filhos (pode ser None)
 
+    # Relações reversas (one-to-one) para as classes concretas; o nome de cada
+    # relação é o model_name da filha (valor gravado em concrete_model).
+    CONCRETE_RELATIONS: ClassVar[tuple[str, ...]] = (
+        "publicroadexamobject",
+        "vehicleinspectionexamobject",
+        "genericexamobject",
+        "genericlocationexamobject",
+        "cadaverexamobject",
+        # "novos_elementos",  # incluir quando criar novos models.
+    )
+
+    objects = ExamObjectQuerySet.as_manager()
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     report_case = models.ForeignKey(
@@ -75,6 +135,16 @@ class ExamObject(models.Model):
         help_text="Ordem de exibição do objeto dentro do laudo.",
     )
 
+    # model_name da classe concreta, gravado no save() da filha: o downcast
+    # sabe qual tabela consultar sem sondar todas as relações.
+    concrete_model = models.CharField(
+        "Classe concreta",
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+    )
+
     group_key = models.CharField(
         "Grupo",
         max_length=24,
@@ -99,6 +169,13 @@ class ExamObject(models.Model):
         help_text="Descrição geral e identificadora do objeto examinado.",
     )
 
+    # Render-on-write: HTML dos campos de texto declarados em get_render_blocks,
+    # por trecho ({sha256(trecho): html}) + hash das fontes
+    rendered_html = models.JSONField("HTML renderizado", default=dict, blank=True, editable=False)
+    rendered_source_hash = models.CharField(
+        "Hash das fontes renderizadas", max_length=64, blank=True, default="", editable=False
+    )
+
     images = GenericRelation(
         "report_maker.ObjectImage",
         related_query_name="exam_object",
@@ -189,16 +266,60 @@ class ExamObject(models.Model):
         self.group_key = group_key or None
 
         if self.order is None:
-            last = (
-                ExamObject.objects
-                .filter(report_case=self.report_case)
-                .aggregate(last_order=Max("order"))
-                .get("last_order")
+            report_case_id = self.report_case_id
+            self.order = SequenceCounter.allocate(
+                SequenceCounter.EXAM_OBJECT_ORDER,
+                report_case_id,
+                seed=lambda: (
+                    ExamObject.objects.filter(report_case_id=report_case_id)
+                    .aggregate(last_order=Max("order"))
+                    .get("last_order")
+                ),
             )
-            self.order = (last or 0) + 1
+
+        # Instância base (sem campos da classe concreta) não atualiza o HTML:
+        # apagaria os trechos das seções declaradas pela filha.
+        if self._meta.model is not ExamObject:
+            if self.concrete_model != self._meta.model_name:
+                self.concrete_model = self._meta.model_name
+                update_fields = kwargs.get("update_fields")
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "concrete_model"}
+
+            if refresh_rendered_html(self, self.get_rendered_sources()):
+                update_fields = kwargs.get("update_fields")
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "rendered_html", "rendered_source_hash"}
 
         super().save(*args, **kwargs)
 
+    def get_rendered_sources(self) -> list[tuple[str, str]]:
+        """
+        Textos (e formato) das seções declaradas em get_render_blocks que os
+        templates convertem de Markdown: section_field e render_section.
+        """
+        sources: list[tuple[str, str]] = []
+        for b in self.get_render_blocks():
+            if not isinstance(b, dict):
+                continue
+
+            kind = (b.get("kind") or "").strip()
+            fmt = (b.get("fmt") or "text").strip()
+            if fmt == "kv":
+                continue
+
+            text = ""
+            if kind == "section_field":
+                text = getattr(self, b.get("field", ""), "") or ""
+            elif kind == "render_section":
+                getter = getattr(self, "get_section_value", None)
+                if callable(getter):
+                    text = getter(b.get("key")) or ""
+
+            if isinstance(text, str) and text.strip():
+                sources.append((text, fmt))
+        return sources
+
     # ─────────────────────────────────────
     # Renderização (estrutura relativa)
     # ─────────────────────────────────────
@@ -246,15 +367,21 @@ class ExamObject(models.Model):
         """
         Retorna a instância concreta (filha) quando existir.
         Útil para preview/templates (downcast manual).
+
+        Para listas, prefira ExamObject.objects...downcast() (uma consulta
+        por classe concreta, em vez de uma por objeto).
         """
-        for rel in (
-            "publicroadexamobject",
-            "vehicleinspectionexamobject",
-            "genericexamobject",
-            "genericlocationexamobject",
-            "cadaverexamobject",
-            # "novos_elementos",  # incluir quando criar novos models.
-        ):
+        if self._meta.model is not ExamObject:
+            return self
+
+        if self.concrete_model in self.CONCRETE_RELATIONS:
+            try:
+                return getattr(self, self.concrete_model)
+            except ObjectDoesNotExist:
+                return self
+
+        # Registros antigos, sem concrete_model
+        for rel in self.CONCRETE_RELATIONS:
             if hasattr(self, rel):
                 return getattr(self, rel)
         return self
@@ -294,7 +421,7 @@ class ExamObject(models.Model):
 
     @property
     def concrete_model_name(self) -> str:
-        return self.concrete._meta.model_name
+        return self.concrete_model or self.concrete._meta.model_name
 
     def __str__(self) -> str:
         return self.title or f"Objeto ({self.pk})"
@@ -4,14 +4,12 @@ from __future__ import annotations
 
 from django.db import models
 
-from report_maker.utils import GoogleMapsLocationMixin
-
 from .exam_base import ExamObject, ExamObjectGroup, RenderBlock
-from .mixins import HasObservedElementsMixin, HasServiceContextMixin
+from .mixins import HasGeoLocationMixin, HasObservedElementsMixin, HasServiceContextMixin
 
 
 class PublicRoadExamObject(
-    GoogleMapsLocationMixin,
+    HasGeoLocationMixin,
     HasServiceContextMixin,
     HasObservedElementsMixin,
     ExamObject,
@@ -33,14 +31,6 @@ class PublicRoadExamObject(
     edit_url_name = "report_maker:public_road_object_update"
     delete_url_name = "report_maker:public_road_object_delete"
 
-    geo_location = models.CharField(
-        "Localização geográfica (Google Maps)",
-        max_length=255,
-        blank=True,
-        null=True,
-        help_text="Cole coordenadas, link do Maps, plus code ou endereço (uma linha).",
-    )
-
     weather_conditions = models.TextField("Condições climáticas", blank=True)
     road_conditions = models.TextField("Condições da via", blank=True)
     traffic_signage = models.TextField("Sinalização viária", blank=True)
@@ -98,44 +88,6 @@ class PublicRoadExamObject(
             },
         ]
 
-    @property
-    def geo_data(self) -> dict | None:
-        """
-        Normaliza e interpreta `geo_location`, quando informado.
-
-        Retorna um dicionário com dados derivados, conforme `GoogleMapsLocationMixin`, incluindo:
-        - maps_url
-        - lat / lng (quando extraíveis)
-        - raw_query
-        - qrcode_png (bytes PNG)
-
-        Retorna `None` quando `geo_location` estiver vazio ou não puder ser interpretado.
-        """
-        value = (self.geo_location or "").strip()
-        if not value:
-            return None
-
-        try:
-            return self.parse_location_line(value)
-        except Exception:
-            return None
-
-    @property
-    def geo_maps_url(self) -> str | None:
-        """
-        Retorna a URL do Google Maps derivada de `geo_location`, quando disponível.
-        """
-        data = self.geo_data
-        return data.get("maps_url") if data else None
-
-    @property
-    def geo_qrcode_png(self) -> bytes | None:
-        """
-        Retorna o QR Code (PNG em bytes) derivado de `geo_location`, quando disponível.
-        """
-        data = self.geo_data
-        return data.get("qrcode_png") if data else None
-
     def __str__(self) -> str:
         """
         Representação textual do objeto para uso administrativo e depuração.
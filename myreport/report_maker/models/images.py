@@ -1,15 +1,22 @@
 # report_maker/models/object_image.py
 
+from __future__ import annotations
+
 import os
 import uuid
+from datetime import timedelta
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, models, transaction
 from django.db.models import Max
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import get_valid_filename
 
+from .sequence import SequenceCounter
+
 
 def object_image_upload_path(instance: "ObjectImage", filename: str) -> str:
     """
@@ -33,12 +40,42 @@ def object_image_upload_path(instance: "ObjectImage", filename: str) -> str:
     )
 
 
+class ImageBlob(models.Model):
+    """
+    Arquivo de imagem endereçado pelo conteúdo (SHA-256).
+
+    A mesma foto anexada a vários objetos (ou reenviada em laudos
+    complementares) é gravada uma única vez; cada ObjectImage aponta para o
+    blob e ref_count conta essas referências. O arquivo é removido quando a
+    última referência sai (ver utils.image_blobs).
+    """
+
+    sha256 = models.CharField("SHA-256", max_length=64, primary_key=True)
+    file = models.FileField("Arquivo", max_length=500)
+    size = models.PositiveBigIntegerField("Tamanho (bytes)", default=0)
+    ref_count = models.PositiveIntegerField("Referências", default=0)
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Arquivo de imagem"
+        verbose_name_plural = "Arquivos de imagem"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} ref.)"
+
+
 class ObjectImage(models.Model):
     """
     Imagem associada a um objeto (via GenericForeignKey),
     com posição documental definida por índice (Figura 1..N) por objeto.
     """
 
+    class ProcessingStatus(models.TextChoices):
+        PENDING = "PENDING", "Aguardando processamento"
+        PROCESSING = "PROCESSING", "Em processamento"
+        READY = "READY", "Pronta"
+        FAILED = "FAILED", "Falhou"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     content_type = models.ForeignKey(
@@ -55,6 +92,18 @@ class ObjectImage(models.Model):
         max_length=500,
     )
 
+    # Conteúdo compartilhado (deduplicação): image aponta para blob.file.
+    # Nulo nas imagens gravadas antes da deduplicação (arquivo próprio).
+    blob = models.ForeignKey(
+        ImageBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="images",
+        verbose_name="Arquivo compartilhado",
+    )
+
     caption = models.CharField("Legenda", max_length=240, blank=True)
 
     # Índice (Figura 1..N) por objeto.
@@ -71,6 +120,31 @@ class ObjectImage(models.Model):
         help_text="Altura da imagem original em pixels.",
     )
 
+    # Metadados EXIF do arquivo enviado, lidos uma única vez na entrada
+    # (utils.image_metadata): a normalização regrava o arquivo sem EXIF.
+    captured_at = models.DateTimeField("Capturada em", null=True, blank=True, db_index=True, editable=False)
+    gps_latitude = models.FloatField("Latitude (GPS)", null=True, blank=True, editable=False)
+    gps_longitude = models.FloatField("Longitude (GPS)", null=True, blank=True, editable=False)
+    exif_orientation = models.PositiveSmallIntegerField("Orientação EXIF", default=1, editable=False)
+    camera_make = models.CharField("Fabricante da câmera", max_length=64, blank=True, default="", editable=False)
+    camera_model = models.CharField("Modelo da câmera", max_length=64, blank=True, default="", editable=False)
+    metadata_extracted = models.BooleanField("Metadados lidos", default=False, db_index=True, editable=False)
+
+    # versões de tela (WebP + JPEG) geradas no processamento; ver utils.image_derivatives
+    renditions = models.JSONField("Versões de tela", default=list, blank=True, editable=False)
+
+    # Processamento fora do request (normalização + versões de tela), feito
+    # pelo worker `process_object_images`. A própria tabela é a fila.
+    processing_status = models.CharField(
+        "Processamento",
+        max_length=20,
+        choices=ProcessingStatus.choices,
+        default=ProcessingStatus.READY,
+        db_index=True,
+        editable=False,
+    )
+    processing_started_at = models.DateTimeField("Processamento iniciado em", null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
 
     class Meta:
@@ -85,6 +159,7 @@ class ObjectImage(models.Model):
         ]
         indexes = [
             models.Index(fields=["content_type", "object_id"]),
+            models.Index(fields=["gps_latitude", "gps_longitude"]),
         ]
 
     def clean(self):
@@ -92,16 +167,26 @@ class ObjectImage(models.Model):
         if self.index is not None and self.index <= 0:
             raise ValidationError({"index": "O índice deve ser um inteiro positivo (>= 1)."})
 
-    def _calc_next_index(self) -> int:
-        last_index = (
-            self.__class__.objects.filter(
-                content_type=self.content_type,
-                object_id=self.object_id,
-            )
-            .aggregate(max_index=Max("index"))
-            .get("max_index")
+    @classmethod
+    def max_index_for(cls, object_id) -> int | None:
+        """Maior índice em uso no objeto (seed do SequenceCounter)."""
+        return cls.objects.filter(object_id=object_id).aggregate(max_index=Max("index")).get("max_index")
+
+    @classmethod
+    def allocate_indexes(cls, object_id, count: int = 1) -> int:
+        """Reserva `count` índices consecutivos no objeto e devolve o primeiro."""
+        return SequenceCounter.allocate(
+            SequenceCounter.OBJECT_IMAGE_INDEX,
+            object_id,
+            count=count,
+            seed=lambda: cls.max_index_for(object_id),
+        )
+
+    @classmethod
+    def resync_indexes(cls, object_id) -> None:
+        SequenceCounter.resync(
+            SequenceCounter.OBJECT_IMAGE_INDEX, object_id, seed=lambda: cls.max_index_for(object_id)
         )
-        return (last_index or 0) + 1
     
 
     @property
@@ -114,31 +199,87 @@ class ObjectImage(models.Model):
         return "14.00"
         
 
+    @property
+    def is_processing(self) -> bool:
+        return self.processing_status in (self.ProcessingStatus.PENDING, self.ProcessingStatus.PROCESSING)
+
+    @classmethod
+    def claim_next_pending(cls) -> "ObjectImage | None":
+        """
+        Reivindica a imagem pendente mais antiga (PENDING -> PROCESSING) com
+        UPDATE condicional: dois workers nunca processam a mesma imagem.
+        """
+        candidates = (
+            cls.objects.filter(processing_status=cls.ProcessingStatus.PENDING)
+            .order_by("created_at")
+            .values_list("pk", flat=True)[:10]
+        )
+        for pk in list(candidates):
+            claimed = cls.objects.filter(pk=pk, processing_status=cls.ProcessingStatus.PENDING).update(
+                processing_status=cls.ProcessingStatus.PROCESSING,
+                processing_started_at=timezone.now(),
+            )
+            if claimed:
+                return cls.objects.get(pk=pk)
+        return None
+
+    @classmethod
+    def requeue_stale(cls, *, older_than: timedelta) -> int:
+        """Devolve à fila imagens PROCESSING abandonadas (worker encerrado no meio)."""
+        limit = timezone.now() - older_than
+        return cls.objects.filter(
+            processing_status=cls.ProcessingStatus.PROCESSING,
+            processing_started_at__lt=limit,
+        ).update(processing_status=cls.ProcessingStatus.PENDING, processing_started_at=None)
+
+    @cached_property
+    def responsive(self) -> dict | None:
+        """
+        Dados para <picture> nos templates: srcset WebP e JPEG, src de fallback
+        (menor versão) e width/height explícitos. None sem versões de tela
+        (o template usa o original).
+        """
+        if not self.renditions:
+            return None
+
+        storage = self.image.storage
+
+        def srcset(key: str) -> str:
+            return ", ".join(f"{storage.url(r[key])} {r['width']}w" for r in self.renditions)
+
+        smallest = self.renditions[0]
+        return {
+            "webp_srcset": srcset("webp"),
+            "jpeg_srcset": srcset("jpeg"),
+            "src": storage.url(smallest["jpeg"]),
+            "width": smallest["width"],
+            "height": smallest["height"],
+        }
+
     def save(self, *args, **kwargs):
         """
         Auto-index:
           - apenas na criação (self._state.adding)
           - apenas quando index não for informado
-        Proteção simples contra corrida:
-          - tenta salvar
-          - se colidir UniqueConstraint, recalcula e tenta de novo (poucas tentativas)
+          - distribuído pelo contador do objeto (SequenceCounter)
+        Índice gravado por fora do contador (colisão no UniqueConstraint):
+          - avança o contador até o maior índice existente e tenta uma vez mais
         """
         # valida coerência básica
         if self.object_id and not isinstance(self.object_id, uuid.UUID):
             raise ValueError("object_id deve ser UUID.")
 
         if self._state.adding and not self.index:
-            # poucas tentativas resolvem a maior parte dos casos concorrentes
-            for _ in range(3):
-                self.index = self._calc_next_index()
+            for attempt in range(2):
+                self.index = self.allocate_indexes(self.object_id)
                 try:
                     with transaction.atomic():
                         return super().save(*args, **kwargs)
                 except IntegrityError:
-                    # provável colisão de índice; tenta recalcular
                     self.index = None
-            # se ainda colidir, propaga para o caller tratar
-            raise
+                    if attempt:
+                        raise
+                    self.resync_indexes(self.object_id)
 
         return super().save(*args, **kwargs)
 
@@ -1,8 +1,16 @@
 # report_maker/models/mixins.py
 
 from __future__ import annotations
+
+import logging
+
 from django.db import models
 
+from report_maker.utils import GoogleMapsLocationMixin
+from report_maker.utils.qrcodes import ensure_qrcode, make_qrcode_png, qrcode_url
+
+logger = logging.getLogger(__name__)
+
 
 class HasMethodologyMixin(models.Model):
     """
@@ -72,4 +80,93 @@ class HasObservedElementsMixin(models.Model):
     )
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+class HasGeoLocationMixin(GoogleMapsLocationMixin, models.Model):
+    """
+    Adiciona a localização geográfica (Google Maps) ao objeto de exame.
+
+    A interpretação da linha informada (maps_url, lat/lng) e o QR Code são
+    calculados na gravação e guardados em `geo_parsed`; o QR Code fica no
+    repositório compartilhado qrcodes/ (ver report_maker.utils.qrcodes) e é
+    referenciado por URL nos templates.
+    """
+    geo_location = models.CharField(
+        "Localização geográfica (Google Maps)",
+        max_length=255,
+        blank=True,
+        null=True,
+        help_text="Cole coordenadas, link do Maps, plus code ou endereço (uma linha).",
+    )
+
+    # {"source", "maps_url", "lat", "lng", "raw_query", "qrcode"}; vazio = sem localização
+    geo_parsed = models.JSONField("Localização interpretada", default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _parse_geo_location(self, value: str) -> dict:
+        try:
+            data = self.parse_location_line(value)
+        except Exception:
+            # não explode template/admin se usuário colar algo ruim
+            return {}
+
+        maps_url = data.get("maps_url")
+        qrcode = None
+        if maps_url:
+            try:
+                qrcode = ensure_qrcode(maps_url)
+            except Exception:
+                logger.warning("Falha ao gravar o QR Code de localização.", exc_info=True)
+
+        return {"source": value, **data, "qrcode": qrcode}
+
+    def save(self, *args, **kwargs):
+        value = (self.geo_location or "").strip()
+        current = self.geo_parsed or {}
+
+        if current.get("source", "") != value:
+            self.geo_parsed = self._parse_geo_location(value) if value else {}
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "geo_parsed"}
+
+        super().save(*args, **kwargs)
+
+    @property
+    def geo_data(self) -> dict | None:
+        """
+        Retorna dict com:
+          - maps_url
+          - lat/lng (quando extraível)
+          - raw_query
+          - qrcode (nome do PNG no storage)
+        ou None se não informado / inválido.
+
+        Usa o resultado gravado em `geo_parsed`; interpreta na hora apenas
+        registros ainda não regravados.
+        """
+        value = (self.geo_location or "").strip()
+        if not value:
+            return None
+
+        data = self.geo_parsed or {}
+        if data.get("source") != value:
+            data = self._parse_geo_location(value)
+        return data if data.get("maps_url") else None
+
+    @property
+    def geo_maps_url(self) -> str | None:
+        d = self.geo_data
+        return d.get("maps_url") if d else None
+
+    @property
+    def geo_qrcode_url(self) -> str | None:
+        d = self.geo_data
+        return qrcode_url(d["maps_url"]) if d else None
+
+    @property
+    def geo_qrcode_png(self) -> bytes | None:
+        d = self.geo_data
+        return make_qrcode_png(d["maps_url"]) if d else None
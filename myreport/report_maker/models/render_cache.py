@@ -0,0 +1,30 @@
+# report_maker/models/render_cache.py
+
+from django.db import models
+
+
+class RenderCacheEntry(models.Model):
+    """
+    Camada persistente do cache de renderização (markdown sanitizado, equações KaTeX).
+
+    A chave é o SHA-256 de (tipo + versão da configuração + texto de entrada):
+    conteúdo idêntico em laudos diferentes reaproveita o mesmo HTML, e uma
+    mudança de configuração do renderizador invalida tudo naturalmente.
+
+    Acesso exclusivo via report_maker.utils.render_cache.
+    """
+
+    key = models.CharField("Chave (SHA-256)", max_length=64, primary_key=True)
+    kind = models.CharField("Tipo", max_length=20, db_index=True)
+    value = models.TextField("HTML renderizado")
+    size = models.PositiveIntegerField("Tamanho (bytes)", default=0)
+
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    last_used_at = models.DateTimeField("Último uso", db_index=True)
+
+    class Meta:
+        verbose_name = "Cache de renderização"
+        verbose_name_plural = "Cache de renderização"
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.key[:12]}"
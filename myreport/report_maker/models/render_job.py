@@ -0,0 +1,285 @@
+# report_maker/models/render_job.py
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+
+from report_maker.utils.storage_cleanup import delete_storage_prefix
+
+from .report_case import ReportCase
+
+logger = logging.getLogger(__name__)
+
+
+def render_job_prefix(report_case_id, job_id) -> str:
+    """Pasta dos arquivos de um job: reports/<report_case_id>/renders/<job_id>"""
+    return f"reports/{report_case_id}/renders/{job_id}"
+
+
+def render_job_upload_path(instance: "ReportRenderJob", filename: str) -> str:
+    """
+    Caminho do PDF produzido por um job:
+      reports/<report_case_id>/renders/<job_id>/<filename>
+    """
+    return f"{render_job_prefix(instance.report_case_id, instance.id)}/{filename}"
+
+
+class ReportRenderJob(models.Model):
+    """
+    Pedido de renderização do PDF de um laudo, processado fora do ciclo
+    request/response por um worker local (management command
+    `render_report_pdfs`).
+
+    A própria tabela é a fila: não há broker externo. O worker reivindica
+    jobs QUEUED com um UPDATE condicional (status=QUEUED -> RUNNING), o que
+    garante que dois workers nunca processem o mesmo job. Enquanto processa,
+    o worker renova heartbeat_at; sem sinal, o job volta à fila, até
+    REPORT_PDF_JOB_MAX_ATTEMPTS reivindicações (depois, FAILED).
+
+    Single-flight: cada job registra a versão do conteúdo do laudo
+    (content_version). Pedidos da mesma versão compartilham o job; uma
+    versão nova substitui os pendentes do mesmo modo (SUPERSEDED,
+    superseded_by): o renderer confere o status entre as diagramações e
+    abandona o trabalho obsoleto. Rascunho (draft) e PDF final são versões
+    distintas.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Na fila"
+        RUNNING = "RUNNING", "Em processamento"
+        DONE = "DONE", "Concluído"
+        FAILED = "FAILED", "Falhou"
+        SUPERSEDED = "SUPERSEDED", "Substituído"
+
+    FINISHED_STATUSES = {Status.DONE, Status.FAILED, Status.SUPERSEDED}
+    PENDING_STATUSES = {Status.QUEUED, Status.RUNNING}
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    report_case = models.ForeignKey(
+        ReportCase,
+        on_delete=models.CASCADE,
+        related_name="render_jobs",
+        verbose_name="Laudo",
+    )
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="report_render_jobs",
+        verbose_name="Solicitado por",
+    )
+
+    status = models.CharField(
+        "Status",
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        db_index=True,
+    )
+
+    output = models.FileField(
+        "PDF gerado",
+        upload_to=render_job_upload_path,
+        max_length=500,
+        blank=True,
+    )
+
+    error = models.TextField("Erro", blank=True)
+
+    # versão do conteúdo renderizado (utils.pdf_render_queue.report_content_version)
+    content_version = models.CharField("Versão do conteúdo", max_length=64, blank=True, default="")
+    draft = models.BooleanField("Rascunho", default=False)
+
+    superseded_by = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Substituído por",
+    )
+
+    worker = models.CharField("Worker", max_length=120, blank=True)
+    attempts = models.PositiveSmallIntegerField("Tentativas", default=0)
+    heartbeat_at = models.DateTimeField("Último sinal do worker", null=True, blank=True)
+
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    started_at = models.DateTimeField("Iniciado em", null=True, blank=True)
+    finished_at = models.DateTimeField("Finalizado em", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Renderização de PDF"
+        verbose_name_plural = "Renderizações de PDF"
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["report_case", "content_version"]),
+        ]
+
+    # ---------------------------------------------------------------------
+    # Estado
+    # ---------------------------------------------------------------------
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
+
+    # ---------------------------------------------------------------------
+    # Fila
+    # ---------------------------------------------------------------------
+    @staticmethod
+    def worker_label() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def claim_next(cls, *, worker: str = "") -> "ReportRenderJob | None":
+        """
+        Reivindica o job mais antigo da fila.
+
+        O UPDATE condicional funciona como trava otimista em qualquer banco:
+        se outro worker levou o job antes, o update afeta 0 linhas e o
+        próximo candidato é tentado.
+        """
+        worker = worker or cls.worker_label()
+        candidates = (
+            cls.objects.filter(status=cls.Status.QUEUED)
+            .order_by("created_at")
+            .values_list("pk", flat=True)[:10]
+        )
+
+        for pk in list(candidates):
+            job = cls.claim(pk, worker=worker)
+            if job is not None:
+                return job
+
+        return None
+
+    @classmethod
+    def claim(cls, pk, *, worker: str = "") -> "ReportRenderJob | None":
+        """Reivindica um job específico (QUEUED -> RUNNING); None se outro o levou antes."""
+        now = timezone.now()
+        claimed = cls.objects.filter(pk=pk, status=cls.Status.QUEUED).update(
+            status=cls.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            worker=(worker or cls.worker_label())[:120],
+            attempts=F("attempts") + 1,
+        )
+        if not claimed:
+            return None
+        return cls.objects.select_related("report_case", "requested_by").get(pk=pk)
+
+    @classmethod
+    def beat(cls, pk) -> bool:
+        """Renova o heartbeat do job; False se ele já não está RUNNING (ex.: substituído)."""
+        return bool(cls.objects.filter(pk=pk, status=cls.Status.RUNNING).update(heartbeat_at=timezone.now()))
+
+    @classmethod
+    def requeue_stale(cls, *, older_than: timedelta, max_attempts: int | None = None) -> int:
+        """
+        Devolve à fila jobs RUNNING abandonados: sem heartbeat há mais de
+        `older_than` (worker encerrado, processo morto pelo OOM killer...).
+        Jobs que já esgotaram `max_attempts` reivindicações viram FAILED em
+        vez de voltar à fila indefinidamente.
+        """
+        if max_attempts is None:
+            max_attempts = int(getattr(settings, "REPORT_PDF_JOB_MAX_ATTEMPTS", 3))
+
+        limit = timezone.now() - older_than
+        stale = cls.objects.filter(status=cls.Status.RUNNING).filter(
+            Q(heartbeat_at__lt=limit) | Q(heartbeat_at__isnull=True, started_at__lt=limit)
+        )
+
+        failed = stale.filter(attempts__gte=max_attempts).update(
+            status=cls.Status.FAILED,
+            error=f"Worker interrompido em {max_attempts} tentativa(s); job abandonado.",
+            finished_at=timezone.now(),
+        )
+        if failed:
+            logger.warning("%s job(s) de PDF marcado(s) como FAILED após %s tentativa(s).", failed, max_attempts)
+
+        return stale.update(
+            status=cls.Status.QUEUED,
+            started_at=None,
+            heartbeat_at=None,
+            worker="",
+        )
+
+    @classmethod
+    def purge_finished(cls, *, older_than: timedelta, batch_size: int = 500) -> int:
+        """
+        Remove jobs finalizados (DONE/FAILED/SUPERSEDED) há mais de
+        `older_than` e a pasta dos PDFs que eles geraram. O PDF final de
+        laudo concluído, apenas referenciado pelo job, não é tocado.
+        """
+        limit = timezone.now() - older_than
+        storage = cls._meta.get_field("output").storage
+        removed = 0
+
+        while True:
+            batch = list(
+                cls.objects.filter(status__in=cls.FINISHED_STATUSES, finished_at__lt=limit)
+                .order_by("finished_at")
+                .values_list("pk", "report_case_id")[:batch_size]
+            )
+            if not batch:
+                return removed
+
+            # linhas primeiro: nenhum job fica apontando para arquivo apagado
+            cls.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+            for pk, report_case_id in batch:
+                delete_storage_prefix(storage, render_job_prefix(report_case_id, pk))
+            removed += len(batch)
+
+    def _finish(self, **fields) -> bool:
+        """
+        Conclui o job se ele ainda estiver RUNNING (UPDATE condicional): um
+        job substituído por uma versão mais nova não é sobrescrito.
+        """
+        fields["finished_at"] = timezone.now()
+        finished = type(self).objects.filter(pk=self.pk, status=self.Status.RUNNING).update(**fields)
+        if finished:
+            for name, value in fields.items():
+                setattr(self, name, value)
+        else:
+            self.refresh_from_db(fields=["status", "output", "error", "finished_at", "superseded_by"])
+        return bool(finished)
+
+    def mark_done(self, pdf_bytes: bytes, filename: str) -> bool:
+        storage = self.output.storage
+        name = storage.save(render_job_upload_path(self, filename), ContentFile(pdf_bytes))
+        if self._finish(output=name, status=self.Status.DONE, error=""):
+            return True
+        # substituído durante a renderização: o arquivo não é de ninguém
+        storage.delete(name)
+        return False
+
+    def mark_done_from_storage(self, name: str) -> bool:
+        """
+        Conclui o job apontando para um arquivo já existente no storage
+        (ex.: PDF final do laudo concluído), sem duplicá-lo.
+        """
+        return self._finish(output=name, status=self.Status.DONE, error="")
+
+    def mark_failed(self, error: str) -> bool:
+        return self._finish(status=self.Status.FAILED, error=(error or "")[:4000])
+
+    def resolve(self) -> "ReportRenderJob":
+        """Job que responde por este: segue a cadeia de substituições até o mais recente."""
+        job = self
+        while job.status == self.Status.SUPERSEDED and job.superseded_by_id:
+            job = type(self).objects.select_related("report_case").get(pk=job.superseded_by_id)
+        return job
+
+    def __str__(self) -> str:
+        return f"PDF {self.report_case_id} ({self.get_status_display()})"
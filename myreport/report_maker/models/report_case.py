@@ -1,4 +1,5 @@
 # report_maker/models/report_case.py
+import hashlib
 import os
 import uuid
 
@@ -14,8 +15,8 @@ from institutions.models import Institution, Nucleus, Team
 
 def report_pdf_upload_path(instance, filename: str) -> str:
     """
-    Mantida por compatibilidade com migrações antigas.
-    NÃO é mais usada no modelo atual (pdf_file foi removido).
+    Caminho do PDF final (imutável) do laudo concluído.
+    Também referenciada por migrações antigas (pdf_file).
     """
     return f"reports/{instance.id}/final/{filename}"
 
@@ -234,6 +235,16 @@ class ReportCase(models.Model):
 
     concluded_at = models.DateTimeField("Concluído em", null=True, blank=True)
 
+    # PDF final (artefato imutável do laudo concluído; renderizado uma única vez)
+    final_pdf = models.FileField(
+        "PDF final",
+        upload_to=report_pdf_upload_path,
+        max_length=500,
+        blank=True,
+    )
+    final_pdf_sha256 = models.CharField("SHA-256 do PDF final", max_length=64, blank=True, default="")
+    final_pdf_rendered_at = models.DateTimeField("PDF final gerado em", null=True, blank=True)
+
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
 
@@ -711,6 +722,48 @@ class ReportCase(models.Model):
         """
         return self.status == self.Status.OPEN and not self.is_locked
 
+    # ---------------------------------------------------------------------
+    # PDF final (imutável)
+    # ---------------------------------------------------------------------
+    @property
+    def has_final_pdf(self) -> bool:
+        return bool(self.final_pdf and self.final_pdf_sha256)
+
+    def store_final_pdf(self, pdf_bytes: bytes, filename: str) -> bool:
+        """
+        Persiste o PDF final do laudo concluído em reports/<id>/final/.
+
+        - Só se aplica a laudo bloqueado (conteúdo não muda mais).
+        - Grava uma única vez: o UPDATE condicional (final_pdf vazio) garante que,
+          se duas renderizações terminarem juntas, apenas a primeira prevalece.
+        - Não passa por save(): o laudo concluído é imutável e o artefato é
+          derivado do conteúdo já validado.
+
+        Retorna True se este PDF foi o persistido.
+        """
+        if self.can_edit:
+            raise ValidationError("O PDF final só pode ser gravado após a conclusão do laudo.")
+
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        storage = self._meta.get_field("final_pdf").storage
+        name = storage.save(report_pdf_upload_path(self, filename), ContentFile(pdf_bytes))
+        rendered_at = timezone.now()
+
+        stored = (
+            type(self).objects.filter(pk=self.pk, final_pdf="")
+            .update(final_pdf=name, final_pdf_sha256=digest, final_pdf_rendered_at=rendered_at)
+        )
+
+        if not stored:
+            storage.delete(name)
+            self.refresh_from_db(fields=["final_pdf", "final_pdf_sha256", "final_pdf_rendered_at"])
+            return False
+
+        self.final_pdf.name = name
+        self.final_pdf_sha256 = digest
+        self.final_pdf_rendered_at = rendered_at
+        return True
+
     # ---------------------------------------------------------------------
     # Save hook
     # ---------------------------------------------------------------------
@@ -879,8 +932,7 @@ class ReportCase(models.Model):
 
         # 3. Technical Objects (Polymorphism)
         objects_data = []
-        for base_obj in self.exam_objects.all():
-            obj = base_obj.concrete
+        for obj in self.exam_objects.downcast():
             obj_info = [f"OBJECT: {obj.title}"]
             
             # Fields from get_render_blocks
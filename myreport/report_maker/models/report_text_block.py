@@ -8,6 +8,8 @@ from django.db import models
 from django.db.models import Max, Q
 
 from .report_case import ReportCase
+from .sequence import SequenceCounter
+from report_maker.utils.rendered_html import refresh_rendered_html
 
 
 class ReportTextBlock(models.Model):
@@ -94,6 +96,12 @@ class ReportTextBlock(models.Model):
 
     body = models.TextField("Texto")
 
+    # Render-on-write: HTML do body por trecho ({sha256(trecho): html}) + hash da fonte
+    rendered_html = models.JSONField("HTML renderizado", default=dict, blank=True, editable=False)
+    rendered_source_hash = models.CharField(
+        "Hash da fonte renderizada", max_length=64, blank=True, default="", editable=False
+    )
+
     position = models.PositiveIntegerField(
         "Posição no laudo",
         default=0,
@@ -157,9 +165,13 @@ class ReportTextBlock(models.Model):
             self.get_placement_display().upper(),
         )
 
+    def get_rendered_sources(self) -> list[tuple[str, str]]:
+        return [(self.body, "md")]
+
     def save(self, *args, **kwargs):
         """
-        Normaliza o group_key e define automaticamente a posição do bloco no laudo.
+        Normaliza o group_key, define automaticamente a posição do bloco no laudo
+        e atualiza o HTML pré-renderizado quando o texto muda.
         """
         if self.placement == self.Placement.OBJECT_GROUP_INTRO:
             self.group_key = (self.group_key or "").strip()
@@ -172,12 +184,21 @@ class ReportTextBlock(models.Model):
             self.group_key = self.GLOBAL_GROUP_KEY
 
         if not self.position:
-            last_pos = (
-                self.__class__.objects.filter(report_case=self.report_case)
-                .aggregate(max_pos=Max("position"))
-                .get("max_pos")
+            report_case_id = self.report_case_id
+            self.position = SequenceCounter.allocate(
+                SequenceCounter.TEXT_BLOCK_POSITION,
+                report_case_id,
+                seed=lambda: (
+                    self.__class__.objects.filter(report_case_id=report_case_id)
+                    .aggregate(max_pos=Max("position"))
+                    .get("max_pos")
+                ),
             )
-            self.position = (last_pos or 0) + 1
+
+        if refresh_rendered_html(self, self.get_rendered_sources()):
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "rendered_html", "rendered_source_hash"}
 
         super().save(*args, **kwargs)
 
@@ -0,0 +1,88 @@
+# report_maker/models/sequence.py
+
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+class SequenceCounter(models.Model):
+    """
+    Contador por pai (laudo ou objeto) que distribui posições sequenciais:
+    índice das figuras de um objeto, ordem dos objetos e posição dos textos
+    de um laudo.
+
+    Cada alocação é um UPDATE no contador (que trava a linha até o fim da
+    transação) seguido da leitura do valor, para uma ou várias posições de
+    uma vez; substitui o MAX() + retentativa a cada inserção.
+
+    O contador nasce na primeira alocação a partir do maior valor existente
+    (seed), o que dispensa migração de dados.
+    """
+
+    # escopos (modelo.campo)
+    OBJECT_IMAGE_INDEX = "objectimage.index"
+    EXAM_OBJECT_ORDER = "examobject.order"
+    TEXT_BLOCK_POSITION = "reporttextblock.position"
+
+    scope = models.CharField("Escopo", max_length=64)
+    parent_id = models.UUIDField("Pai")
+    last_value = models.PositiveIntegerField("Último valor", default=0)
+
+    class Meta:
+        verbose_name = "Contador de posições"
+        verbose_name_plural = "Contadores de posições"
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "parent_id"], name="uq_sequence_counter_scope_parent"),
+        ]
+
+    @classmethod
+    def allocate(
+        cls,
+        scope: str,
+        parent_id,
+        *,
+        seed: Callable[[], Optional[int]],
+        count: int = 1,
+    ) -> int:
+        """
+        Reserva `count` posições consecutivas e devolve a primeira.
+
+        seed: maior valor já usado pelo pai (consultado só na criação do contador).
+        """
+        counter = cls.objects.filter(scope=scope, parent_id=parent_id)
+        with transaction.atomic():
+            if not counter.update(last_value=F("last_value") + count):
+                cls.objects.bulk_create(
+                    [cls(scope=scope, parent_id=parent_id, last_value=seed() or 0)],
+                    ignore_conflicts=True,
+                )
+                counter.update(last_value=F("last_value") + count)
+            last = counter.values_list("last_value", flat=True).get()
+        return last - count + 1
+
+    @classmethod
+    def resync(cls, scope: str, parent_id, *, seed: Callable[[], Optional[int]]) -> None:
+        """Avança o contador até o maior valor existente (posição gravada por fora do contador)."""
+        cls.objects.filter(scope=scope, parent_id=parent_id).update(
+            last_value=Greatest(F("last_value"), seed() or 0)
+        )
+
+    @classmethod
+    def release(cls, scope: str, parent_id, value: Optional[int]) -> None:
+        """Devolve a posição se ela for a última distribuída (exclusão do último item)."""
+        if value:
+            cls.objects.filter(scope=scope, parent_id=parent_id, last_value=value).update(
+                last_value=F("last_value") - 1
+            )
+
+    @classmethod
+    def discard(cls, parent_id) -> None:
+        """Remove os contadores de um pai excluído."""
+        cls.objects.filter(parent_id=parent_id).delete()
+
+    def __str__(self):
+        return f"{self.scope} {self.parent_id}: {self.last_value}"
@@ -7,7 +7,7 @@ from django.db import transaction
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
-from report_maker.models import ExamObject
+from report_maker.models import ExamObject, SequenceCounter
 from report_maker.utils.storage_cleanup import delete_storage_prefix
 
 
@@ -45,3 +45,6 @@ def delete_examobject_folder(sender, instance, **kwargs) -> None:
         delete_storage_prefix(default_storage, prefix)
 
     transaction.on_commit(_delete)
+
+    # contador dos índices das figuras do objeto
+    SequenceCounter.discard(instance.pk)
@@ -3,10 +3,17 @@
 from __future__ import annotations
 
 from django.db import transaction
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, pre_save
 from django.dispatch import receiver
 
-from report_maker.models import ObjectImage
+from report_maker.models import ObjectImage, SequenceCounter
+from report_maker.utils.image_blobs import StoredBlob, acquire_blobs, release_blob
+from report_maker.utils.image_derivatives import (
+    derivatives_prefix,
+    print_prefix,
+    rendition_names,
+)
+from report_maker.utils.storage_cleanup import delete_storage_prefix
 
 
 @receiver(post_delete, sender=ObjectImage)
@@ -24,6 +31,9 @@ def delete_objectimage_file(sender, instance: ObjectImage, **kwargs) -> None:
     - Admin
     - Shell
     - Cascata (on_delete=CASCADE)
+
+    Arquivos compartilhados (blob) só perdem uma referência; o arquivo sai
+    com a última (utils.image_blobs.release_blob).
     """
     file_field = getattr(instance, "image", None)
     name = getattr(file_field, "name", "") or ""
@@ -31,12 +41,105 @@ def delete_objectimage_file(sender, instance: ObjectImage, **kwargs) -> None:
         return
 
     storage = file_field.storage
+    blob_id = instance.blob_id
+    # calculado agora: o pk da instância é zerado ao fim do delete()
+    derivatives = derivatives_prefix(instance)
 
     def _delete() -> None:
-        try:
-            if storage.exists(name):
-                storage.delete(name)
-        except Exception:
-            pass
+        if blob_id:
+            release_blob(blob_id)
+        else:
+            try:
+                if storage.exists(name):
+                    storage.delete(name)
+            except Exception:
+                pass
+        delete_storage_prefix(storage, derivatives)
 
     transaction.on_commit(_delete)
+
+
+@receiver(pre_save, sender=ObjectImage)
+def invalidate_objectimage_derivatives(sender, instance: ObjectImage, **kwargs) -> None:
+    """
+    Upload ou troca do arquivo: a imagem entra na fila de processamento
+    (PENDING), tratada fora do request pelo worker `process_object_images`.
+
+    Também descarta derivados desatualizados:
+    - troca do arquivo: versões de tela e derivados de impressão;
+    - mudança de original_width (largura impressa): derivados de impressão.
+
+    Os derivados de impressão são recriados sob demanda na geração do PDF.
+
+    Referências a arquivos compartilhados (blob) acompanham o save: o novo
+    blob ganha uma referência na mesma transação e o anterior é liberado
+    após o commit.
+    """
+    if kwargs.get("raw"):
+        return
+
+    if instance._state.adding:
+        instance.processing_status = ObjectImage.ProcessingStatus.PENDING
+        if instance.blob_id:
+            _acquire(instance)
+        return
+
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {"image", "blob", "original_width"} & set(update_fields):
+        return
+
+    previous = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("image", "original_width", "renditions", "blob_id")
+        .first()
+    )
+    if previous is None:
+        return
+
+    previous_name, previous_width, previous_renditions, previous_blob_id = previous
+    image_changed = previous_name != instance.image.name
+    if image_changed and instance.blob_id == previous_blob_id:
+        # arquivo trocado sem passar pelo armazenamento de blobs (arquivo próprio)
+        instance.blob = None
+    if instance.blob_id != previous_blob_id:
+        if instance.blob_id:
+            _acquire(instance)
+        if previous_blob_id:
+            transaction.on_commit(lambda: release_blob(previous_blob_id))
+
+    if not image_changed and previous_width == instance.original_width:
+        return
+
+    storage = instance.image.storage
+    # a pasta segue o arquivo anterior (o novo upload ainda não tem nome final)
+    stale_prefix = print_prefix(instance, previous_name)
+    stale_files = rendition_names(previous_renditions) if image_changed else []
+    if image_changed:
+        instance.renditions = []
+        instance.processing_status = ObjectImage.ProcessingStatus.PENDING
+
+    def _invalidate() -> None:
+        delete_storage_prefix(storage, stale_prefix)
+        for name in stale_files:
+            try:
+                storage.delete(name)
+            except Exception:
+                pass
+
+    transaction.on_commit(_invalidate)
+
+
+@receiver(post_delete, sender=ObjectImage)
+def release_objectimage_index(sender, instance: ObjectImage, **kwargs) -> None:
+    """
+    Excluída a última figura do objeto, o índice volta ao contador (a
+    próxima imagem reaproveita o número).
+    """
+    SequenceCounter.release(SequenceCounter.OBJECT_IMAGE_INDEX, instance.object_id, instance.index)
+
+
+def _acquire(instance: ObjectImage) -> None:
+    stored = getattr(instance, "_stored_blob", None)
+    if stored is None or stored.sha256 != instance.blob_id:
+        stored = StoredBlob(sha256=instance.blob_id, name=instance.image.name, size=0)
+    acquire_blobs([stored])
@@ -7,7 +7,7 @@ from django.db import transaction
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
-from report_maker.models import ReportCase
+from report_maker.models import ReportCase, SequenceCounter
 from report_maker.utils.storage_cleanup import delete_storage_prefix
 
 
@@ -32,3 +32,6 @@ def delete_reportcase_folder(sender, instance: ReportCase, **kwargs) -> None:
         delete_storage_prefix(default_storage, prefix)
 
     transaction.on_commit(_delete)
+
+    # contadores de ordem dos objetos e posição dos textos
+    SequenceCounter.discard(instance.pk)
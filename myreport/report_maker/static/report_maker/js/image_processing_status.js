@@ -0,0 +1,47 @@
+(function () {
+  // Imagens recém-enviadas são processadas fora do request (worker
+  // process_object_images). Cada card pendente consulta o status até a
+  // imagem ficar pronta e então troca a miniatura.
+
+  const POLL_INTERVAL_MS = 2000
+  const MAX_ATTEMPTS = 150
+
+  async function pollCard(card) {
+    const statusUrl = card.dataset.imageStatusUrl
+    const indicator = card.querySelector('.js-image-processing')
+
+    for (let attempt = 0; attempt < MAX_ATTEMPTS; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+
+      let data
+      try {
+        const resp = await fetch(statusUrl, { credentials: 'same-origin' })
+        if (!resp.ok) return
+        data = await resp.json()
+      } catch (err) {
+        console.error('[image-status]', err)
+        return
+      }
+
+      if (data.is_processing) continue
+
+      const img = card.querySelector('img')
+      if (img) img.src = data.thumb_url || data.url
+
+      if (indicator) {
+        if (data.status === 'FAILED') {
+          indicator.classList.add('text-danger')
+          indicator.textContent = 'Falha no processamento (exibindo o original).'
+        } else {
+          indicator.remove()
+        }
+      }
+      delete card.dataset.imageStatusUrl
+      return
+    }
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-image-status-url]').forEach(pollCard)
+  })
+})()
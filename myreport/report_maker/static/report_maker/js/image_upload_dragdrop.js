@@ -85,9 +85,15 @@
         const total = imageFiles.length;
 
         try {
-            for (let i = 0; i < total; i++) {
-                updateZoneUI(zone, `A processar ${i + 1}/${total}...`);
-                await uploadImage(imageFiles[i], zone);
+            if (zone.dataset.bulkUrl) {
+                // Lote: um único POST com todos os arquivos
+                updateZoneUI(zone, `A enviar ${total} imagem(ns)...`);
+                await uploadImages(imageFiles, zone);
+            } else {
+                for (let i = 0; i < total; i++) {
+                    updateZoneUI(zone, `A processar ${i + 1}/${total}...`);
+                    await uploadImage(imageFiles[i], zone);
+                }
             }
             window.location.reload();
         } catch (error) {
@@ -109,6 +115,25 @@
         `;
     }
 
+    async function uploadImages(files, zone) {
+        const formData = new FormData();
+        files.forEach((file) => formData.append("files", file));
+
+        const response = await fetch(zone.dataset.bulkUrl, {
+            method: "POST",
+            headers: { "X-CSRFToken": getCsrfToken() },
+            body: formData,
+        });
+
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok) {
+            throw new Error(data.error || `Erro ${response.status}: Verifique se o laudo está aberto para edição.`);
+        }
+        if (data.errors && data.errors.length) {
+            alert("Arquivos recusados:\n" + data.errors.map((e) => `${e.name}: ${e.error}`).join("\n"));
+        }
+    }
+
     async function uploadImage(file, zone) {
         const formData = new FormData();
         formData.append("file", file);
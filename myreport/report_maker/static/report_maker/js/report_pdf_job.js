@@ -0,0 +1,97 @@
+;(function () {
+  // Geração do PDF em segundo plano: enfileira o job, consulta o status
+  // com backoff e abre o PDF quando pronto. Sem JS, o link leva à página
+  // de acompanhamento da rota do PDF (href original).
+
+  function getCsrfToken() {
+    const input = document.querySelector('input[name="csrfmiddlewaretoken"]')
+    if (input && input.value) return input.value
+
+    const value = `; ${document.cookie}`
+    const parts = value.split(`; csrftoken=`)
+    if (parts.length === 2) return parts.pop().split(';').shift()
+
+    return null
+  }
+
+  // Intervalo entre consultas: começa curto e cresce até o teto
+  const POLL_INITIAL_MS = 500
+  const POLL_MAX_MS = 5000
+  const POLL_FACTOR = 1.5
+  // Prazo total da espera (sem worker ativo o job não sai da fila): depois
+  // dele o botão volta e o usuário pode tentar de novo
+  const POLL_DEADLINE_MS = 3 * 60 * 1000
+
+  function sleep(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms))
+  }
+
+  async function waitForJob(statusUrl) {
+    // O servidor responde na hora; o status_url pode mudar quando o job é
+    // substituído por uma versão mais nova do laudo. Esgotado o prazo,
+    // devolve status TIMEOUT.
+    const deadline = Date.now() + POLL_DEADLINE_MS
+    let delay = POLL_INITIAL_MS
+    while (Date.now() + delay < deadline) {
+      await sleep(delay)
+      delay = Math.min(delay * POLL_FACTOR, POLL_MAX_MS)
+
+      const resp = await fetch(statusUrl, { credentials: 'same-origin' })
+      if (!resp.ok) throw new Error(`status HTTP ${resp.status}`)
+
+      const data = await resp.json()
+      if (data.status === 'DONE' || data.status === 'FAILED') return data
+      if (data.status_url) statusUrl = data.status_url
+    }
+    return { status: 'TIMEOUT' }
+  }
+
+  function initPdfJobButton(btn) {
+    const submitUrl = btn.dataset.jobUrl
+    if (!submitUrl) return
+
+    const originalLabel = btn.textContent
+
+    btn.addEventListener('click', async function (ev) {
+      ev.preventDefault()
+      if (btn.classList.contains('disabled')) return
+
+      btn.classList.add('disabled')
+      btn.textContent = 'Gerando…'
+
+      try {
+        const resp = await fetch(submitUrl, {
+          method: 'POST',
+          credentials: 'same-origin',
+          headers: { 'X-CSRFToken': getCsrfToken() || '' },
+        })
+        if (resp.status !== 202) throw new Error(`submit HTTP ${resp.status}`)
+
+        const job = await resp.json()
+        const done = await waitForJob(job.status_url)
+
+        if (done.status === 'TIMEOUT') {
+          alert('O PDF ainda não ficou pronto. Tente novamente em instantes.')
+          return
+        }
+        if (done.status !== 'DONE' || !done.download_url) {
+          alert('Não foi possível gerar o PDF do laudo.')
+          return
+        }
+
+        window.location.href = done.download_url
+      } catch (err) {
+        console.error('[report-pdf-job]', err)
+        // fallback: página de acompanhamento da rota do PDF
+        window.location.href = btn.href
+      } finally {
+        btn.classList.remove('disabled')
+        btn.textContent = originalLabel
+      }
+    })
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-job-url]').forEach(initPdfJobButton)
+  })
+})()
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import hashlib
 import html
+import json
 import re
-import subprocess
 import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
 
 import bleach
 import markdown as md
@@ -14,6 +18,9 @@ from django import template
 from django.conf import settings
 from django.utils.safestring import mark_safe
 
+from report_maker.utils.katex_worker import render_katex_many
+from report_maker.utils.render_cache import get_render_cache, make_key
+
 
 register = template.Library()
 
@@ -134,30 +141,105 @@ _INLINE_MATH_RE = re.compile(
 )
 
 
-def _render_katex_inline(tex: str) -> str:
+_MARKDOWN_EXTENSIONS = ["fenced_code", "sane_lists", "nl2br"]
+
+
+def _katex_version() -> str:
+    try:
+        package = Path(settings.BASE_DIR) / "node_modules" / "katex" / "package.json"
+        return json.loads(package.read_text(encoding="utf-8")).get("version", "")
+    except Exception:
+        return ""
+
+
+# Versão da configuração do renderizador: compõe a chave do cache, de modo que
+# qualquer mudança em tags/atributos/extensões/KaTeX invalida o HTML armazenado.
+RENDER_CONFIG_VERSION = hashlib.sha256(
+    repr(
+        (
+            "render_markdown:1",
+            _MARKDOWN_EXTENSIONS,
+            _ALLOWED_TAGS,
+            sorted(_ALLOWED_ATTRS.items()),
+            _ALLOWED_CSS_PROPERTIES,
+            _ALLOWED_PROTOCOLS,
+            _katex_version(),
+        )
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+
+# Estado da renderização em curso (markdown_render_status); None fora dela
+_render_status: ContextVar[dict | None] = ContextVar("markdown_render_status", default=None)
+
+
+@contextmanager
+def markdown_render_status():
     """
-    Renderiza expressão TeX inline utilizando a CLI do KaTeX.
+    Acompanha as renderizações de Markdown/TeX feitas dentro do bloco
+    (ex.: render_to_string de um template com |render_markdown):
+    status["complete"] fica False se alguma equação falhou, e o HTML que
+    a contém não deve ser cacheado.
     """
+    status = {"complete": True}
+    token = _render_status.set(status)
     try:
-        result = subprocess.run(
-            [str(settings.KATEX_CLI_BIN), "--no-throw-on-error"],
-            input=tex,
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding="utf-8",
-        )
-        return result.stdout.strip()
-    except Exception:
-        return f'<span class="math-error">{html.escape(tex)}</span>'
+        yield status
+    finally:
+        _render_status.reset(token)
 
 
-@register.filter
-def render_markdown(value: str) -> str:
-    text = (value or "").strip()
-    if not text:
-        return ""
+def _math_error(tex: str) -> str:
+    return f'<span class="math-error">{html.escape(tex)}</span>'
+
+
+def _render_math(items: list[str]) -> list[str | None]:
+    """
+    Renderiza expressões TeX inline, consultando antes o cache por equação
+    (a mesma expressão se repete entre laudos). As que faltam vão num único
+    lote ao processo KaTeX persistente. None indica falha (não é cacheada).
+    """
+    cache = get_render_cache()
+    keys = [make_key("math", RENDER_CONFIG_VERSION, tex) for tex in items]
+    found = cache.get_many("math", keys)
+
+    pending = list(dict.fromkeys(tex for tex, key in zip(items, keys) if key not in found))
+    if pending:
+        rendered = dict(zip(pending, render_katex_many(pending)))
+        fresh = {
+            make_key("math", RENDER_CONFIG_VERSION, tex): out for tex, out in rendered.items() if out
+        }
+        cache.set_many("math", fresh)
+        found.update(fresh)
+
+    results = [found.get(key) for key in keys]
+    status = _render_status.get()
+    if status is not None and not all(results):
+        status["complete"] = False
+    return results
+
 
+def _render_katex_many(items: list[str]) -> list[str]:
+    """
+    Renderiza um lote de expressões TeX inline. Itens que falham viram `math-error`.
+    """
+    return [out if out else _math_error(tex) for tex, out in zip(items, _render_math(items))]
+
+
+def _render_katex_inline(tex: str) -> str:
+    """
+    Renderiza expressão TeX inline utilizando o KaTeX.
+    """
+    return _render_katex_many([tex])[0]
+
+
+def _render_markdown_uncached(text: str) -> tuple[str, bool]:
+    """
+    Pipeline completo: máscara TeX -> Markdown -> Bleach -> KaTeX.
+
+    Retorna (html, completo); `completo` é False se alguma equação falhou,
+    caso em que o resultado não deve ser cacheado.
+    """
     math_map: dict[str, str] = {}
 
     # 1. Mascarar o conteúdo TeX para que o Markdown não o corrompa
@@ -172,7 +254,7 @@ def render_markdown(value: str) -> str:
     # 2. Converter Markdown para HTML
     html_out = md.markdown(
         text_masked,
-        extensions=["fenced_code", "sane_lists", "nl2br"],
+        extensions=_MARKDOWN_EXTENSIONS,
         output_format="html5",
     )
 
@@ -187,10 +269,50 @@ def render_markdown(value: str) -> str:
         strip=True,
     )
 
-    # 4. Agora sim, renderizar o KaTeX e substituir os placeholders
-    # Como o KaTeX CLI gera um HTML complexo e confiável, inserimos após a limpeza
-    for placeholder, tex_content in math_map.items():
-        rendered_math = _render_katex_inline(tex_content)
-        clean = clean.replace(placeholder, rendered_math)
+    # 4. Agora sim, renderizar o KaTeX (todas as equações num único lote) e
+    # substituir os placeholders. Como o KaTeX gera um HTML complexo e
+    # confiável, inserimos após a limpeza
+    complete = True
+    if math_map:
+        placeholders = list(math_map)
+        tex_items = [math_map[ph] for ph in placeholders]
+        for placeholder, tex, rendered_math in zip(placeholders, tex_items, _render_math(tex_items)):
+            if not rendered_math:
+                complete = False
+                rendered_math = _math_error(tex)
+            clean = clean.replace(placeholder, rendered_math)
+
+    return clean, complete
+
 
-    return mark_safe(clean)
\ No newline at end of file
+def render_markdown_html(value: str) -> tuple[str, bool]:
+    """
+    HTML sanitizado de um texto Markdown, via cache endereçado por conteúdo
+    (texto + versão da configuração).
+
+    Retorna (html, completo); `completo` é False se alguma equação falhou.
+    """
+    text = (value or "").strip()
+    if not text:
+        return "", True
+
+    cache = get_render_cache()
+    key = make_key("markdown", RENDER_CONFIG_VERSION, text)
+
+    cached = cache.get("markdown", key)
+    if cached is not None:
+        return cached, True
+
+    clean, complete = _render_markdown_uncached(text)
+    if complete:
+        cache.set("markdown", key, clean)
+
+    return clean, complete
+
+
+@register.filter
+def render_markdown(value: str) -> str:
+    clean, _complete = render_markdown_html(value)
+    if not clean:
+        return ""
+    return mark_safe(clean)
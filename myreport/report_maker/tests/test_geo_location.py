@@ -0,0 +1,100 @@
+# report_maker/tests/test_geo_location.py
+from __future__ import annotations
+
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from institutions.models import Institution, InstitutionCity, Nucleus, Team
+from report_maker.models import ExamObject, GenericLocationExamObject, PublicRoadExamObject, ReportCase
+from report_maker.utils import qrcodes
+from report_maker.views.report_outline import build_report_outline
+
+UserModel = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="test_geo_location_")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_URL="/media/")
+class GeoLocationTests(TestCase):
+    """
+    A localização é interpretada na gravação; o QR Code é um PNG compartilhado
+    (qrcodes/<sha256>.png) referenciado por URL na outline.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        qrcodes._known.clear()
+
+        self.user = UserModel.objects.create_user(username="u1", password="pass123")
+        inst = Institution.objects.create(
+            acronym="SPTC",
+            name="Superintendência da Polícia Técnico-Científica",
+            kind=Institution.Kind.SCIENTIFIC_POLICE,
+            is_active=True,
+        )
+        city = InstitutionCity.objects.create(institution=inst, name="Campinas", state="SP")
+        nucleus = Nucleus.objects.create(institution=inst, name="Núcleo Campinas", city=city)
+        team = Team.objects.create(nucleus=nucleus, name="Equipe 01", description="")
+
+        self.report = ReportCase(
+            author=self.user,
+            report_number="123.123/2026",
+            requesting_authority="Autoridade Requisitante (teste)",
+            institution=inst,
+            nucleus=nucleus,
+            team=team,
+        )
+        self.report.save()
+
+    def test_save_stores_parse_and_shared_qrcode(self):
+        obj = GenericLocationExamObject.objects.create(report_case=self.report, geo_location="-22.9, -47.06")
+
+        self.assertEqual(obj.geo_parsed["source"], "-22.9, -47.06")
+        self.assertEqual((obj.geo_parsed["lat"], obj.geo_parsed["lng"]), (-22.9, -47.06))
+        self.assertEqual(obj.geo_parsed["qrcode"], qrcodes.qrcode_name(obj.geo_parsed["maps_url"]))
+        self.assertTrue(default_storage.exists(obj.geo_parsed["qrcode"]))
+
+        # mesmo link em outro objeto: mesmo arquivo, sem gerar PNG de novo
+        with patch.object(qrcodes, "make_qrcode_png") as make:
+            other = PublicRoadExamObject.objects.create(report_case=self.report, geo_location="-22.9,-47.06")
+        make.assert_not_called()
+        self.assertEqual(other.geo_parsed["qrcode"], obj.geo_parsed["qrcode"])
+
+    def test_unchanged_location_is_not_parsed_again(self):
+        obj = GenericLocationExamObject.objects.create(report_case=self.report, geo_location="Rua A, 100")
+
+        with patch.object(GenericLocationExamObject, "parse_location_line") as parse:
+            obj.title = "Outro título"
+            obj.save()
+            self.assertEqual(obj.geo_data["raw_query"], "Rua A, 100")
+        parse.assert_not_called()
+
+        obj.geo_location = ""
+        obj.save(update_fields=["geo_location"])
+        obj.refresh_from_db()
+        self.assertEqual(obj.geo_parsed, {})
+        self.assertIsNone(obj.geo_data)
+
+    def test_outline_references_qrcode_by_url(self):
+        obj = GenericLocationExamObject.objects.create(report_case=self.report, geo_location="-22.9, -47.06")
+
+        with patch.object(qrcodes, "make_qrcode_png") as make:
+            outline, _next = build_report_outline(
+                report=self.report,
+                exam_objects_qs=ExamObject.objects.filter(report_case=self.report),
+                text_blocks_qs=[],
+            )
+        make.assert_not_called()
+
+        geo = next(s for g in outline for o in g.objects for s in o.sections if s.kind == "geo_location")
+        self.assertEqual(geo.maps_url, obj.geo_parsed["maps_url"])
+        self.assertEqual(geo.qr_url, f"/media/{obj.geo_parsed['qrcode']}")
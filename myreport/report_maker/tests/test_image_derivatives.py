@@ -0,0 +1,199 @@
+# report_maker/tests/test_image_derivatives.py
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from report_maker.models import ObjectImage
+from report_maker.tests.test_storage_cleanup import make_location_object, make_reportcase, make_user
+from report_maker.utils import image_derivatives
+from report_maker.views.report_pdf_generator import make_draft_url_fetcher, make_print_url_fetcher
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+class _ObjectImageStorageTestCase(TransactionTestCase):
+    """
+    Base com MEDIA_ROOT temporário e um objeto de exame.
+
+    TransactionTestCase: a limpeza do storage roda em transaction.on_commit.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self._tmpdir = tempfile.mkdtemp(prefix="myreport_media_")
+        self.addCleanup(lambda: shutil.rmtree(self._tmpdir, ignore_errors=True))
+        settings_override = override_settings(MEDIA_ROOT=self._tmpdir, MEDIA_URL="/media/", REPORT_PDF_IMAGE_DPI=200)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        report = make_reportcase(author=make_user(i=1), i=1)
+        self.obj = make_location_object(report=report, i=1)
+
+    def _process_pending(self) -> None:
+        call_command("process_object_images", "--once", "--workers", "0", stdout=io.StringIO())
+
+    def _add_image(self, *, width: int, height: int, original_width: int) -> ObjectImage:
+        img = ObjectImage.objects.create(
+            content_object=self.obj,
+            image=SimpleUploadedFile("foto.jpg", make_jpeg(width, height), content_type="image/jpeg"),
+            original_width=original_width,
+            original_height=height,
+        )
+        self._process_pending()
+        img.refresh_from_db()
+        return img
+
+
+class PrintDerivativeTests(_ObjectImageStorageTestCase):
+    """
+    Derivado de impressão: JPEG na largura impressa (width_cm_dot) e DPI
+    configurado, gerado uma vez, trocado pelo url_fetcher do PDF e descartado
+    quando a imagem muda ou é excluída.
+    """
+
+    def test_derivative_has_print_width_and_is_reused(self):
+        img = self._add_image(width=2000, height=1000, original_width=1000)
+        expected_px = image_derivatives.print_width_px(img)
+        # 1000 px de tela -> 8,75 cm -> 689 px a 200 dpi
+        self.assertEqual(expected_px, 689)
+
+        name = image_derivatives.ensure_print_derivative(img)
+        self.assertIsNotNone(name)
+        with img.image.storage.open(name, "rb") as fh, Image.open(fh) as im:
+            self.assertEqual(im.format, "JPEG")
+            self.assertEqual(im.size, (689, 344))
+
+        with patch.object(image_derivatives, "_encode_jpeg") as encode:
+            self.assertEqual(image_derivatives.ensure_print_derivative(img), name)
+        encode.assert_not_called()
+
+    def test_small_original_is_used_as_is(self):
+        img = self._add_image(width=300, height=200, original_width=1000)
+        self.assertIsNone(image_derivatives.ensure_print_derivative(img))
+
+    def test_pdf_fetcher_substitutes_derivative(self):
+        img = self._add_image(width=2000, height=1000, original_width=1000)
+        fetcher = make_print_url_fetcher([img])
+
+        result = fetcher(f"http://localhost/media/{img.image.name}")
+        try:
+            self.assertEqual(result["mime_type"], "image/jpeg")
+            with Image.open(result["file_obj"]) as im:
+                self.assertEqual(im.width, 689)
+        finally:
+            result["file_obj"].close()
+
+    def test_draft_fetcher_uses_smallest_rendition_or_placeholder(self):
+        img = self._add_image(width=2000, height=1000, original_width=1000)
+        url = f"http://localhost/media/{img.image.name}"
+
+        with patch.object(image_derivatives, "_encode_jpeg") as encode:
+            result = make_draft_url_fetcher([img])(url)
+        encode.assert_not_called()
+        try:
+            with Image.open(result["file_obj"]) as im:
+                self.assertEqual(im.width, 320)
+        finally:
+            result["file_obj"].close()
+
+        img.renditions = []
+        result = make_draft_url_fetcher([img])(url)
+        self.assertEqual(result["mime_type"], "image/svg+xml")
+
+    def test_width_change_and_delete_discard_derivatives(self):
+        img = self._add_image(width=2000, height=1000, original_width=1000)
+        first = image_derivatives.ensure_print_derivative(img)
+        folder = Path(self._tmpdir) / image_derivatives.print_prefix(img)
+        self.assertTrue(folder.exists())
+
+        img.original_width = 500
+        img.save()
+        self.assertFalse(folder.exists())
+
+        second = image_derivatives.ensure_print_derivative(img)
+        self.assertNotEqual(first, second)
+        self.assertTrue(folder.exists())
+
+        # versões de tela não dependem da largura impressa
+        for name in image_derivatives.rendition_names(img.renditions):
+            self.assertTrue(img.image.storage.exists(name))
+
+        img.delete()
+        self.assertFalse((Path(self._tmpdir) / image_derivatives.derivatives_prefix(img)).exists())
+
+
+class WebRenditionTests(_ObjectImageStorageTestCase):
+    """
+    Versões de tela (WebP + JPEG por tamanho) geradas pelo worker, expostas
+    como srcset com dimensões explícitas e regeneradas na troca do arquivo.
+    """
+
+    def test_upload_generates_renditions_without_upscaling(self):
+        img = self._add_image(width=1200, height=600, original_width=1200)
+
+        self.assertEqual(
+            [(r["size"], r["width"], r["height"]) for r in img.renditions],
+            [("small", 320, 160), ("medium", 960, 480)],
+        )
+        storage = img.image.storage
+        for r in img.renditions:
+            with storage.open(r["webp"], "rb") as fh, Image.open(fh) as im:
+                self.assertEqual((im.format, im.width), ("WEBP", r["width"]))
+            with storage.open(r["jpeg"], "rb") as fh, Image.open(fh) as im:
+                self.assertEqual((im.format, im.width), ("JPEG", r["width"]))
+
+        small = self._add_image(width=500, height=250, original_width=500)
+        self.assertEqual([r["width"] for r in small.renditions], [320, 500])
+
+    def test_responsive_exposes_srcset_and_dimensions(self):
+        img = self._add_image(width=1200, height=600, original_width=1200)
+        small, medium = img.renditions
+
+        r = ObjectImage.objects.get(pk=img.pk).responsive
+        self.assertEqual(r["src"], f"/media/{small['jpeg']}")
+        self.assertEqual((r["width"], r["height"]), (320, 160))
+        self.assertEqual(r["webp_srcset"], f"/media/{small['webp']} 320w, /media/{medium['webp']} 960w")
+        self.assertEqual(r["jpeg_srcset"], f"/media/{small['jpeg']} 320w, /media/{medium['jpeg']} 960w")
+
+    def test_replacing_file_regenerates_renditions(self):
+        img = self._add_image(width=1200, height=600, original_width=1200)
+        old_names = image_derivatives.rendition_names(img.renditions)
+
+        img.image = SimpleUploadedFile("nova.jpg", make_jpeg(800, 800), content_type="image/jpeg")
+        img.save()
+        img.refresh_from_db()
+        self.assertEqual(img.renditions, [])
+        self.assertEqual(img.processing_status, ObjectImage.ProcessingStatus.PENDING)
+
+        self._process_pending()
+        img.refresh_from_db()
+
+        self.assertEqual([r["height"] for r in img.renditions], [320, 800])
+        for name in old_names:
+            self.assertFalse(img.image.storage.exists(name))
+        for name in image_derivatives.rendition_names(img.renditions):
+            self.assertTrue(img.image.storage.exists(name))
+
+    def test_backfill_command_fills_missing_renditions(self):
+        img = self._add_image(width=1200, height=600, original_width=1200)
+        ObjectImage.objects.filter(pk=img.pk).update(renditions=[])
+
+        out = io.StringIO()
+        call_command("backfill_image_renditions", stdout=out)
+
+        img.refresh_from_db()
+        self.assertEqual(len(img.renditions), 2)
+        self.assertIn("1 processada(s)", out.getvalue())
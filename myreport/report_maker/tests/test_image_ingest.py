@@ -0,0 +1,428 @@
+# report_maker/tests/test_image_ingest.py
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from common.image_processing import ImageTooLarge, MemoryBudget, normalize_image, open_image
+from institutions.models import Institution, InstitutionCity, Nucleus, Team
+from report_maker.models import GenericLocationExamObject, ImageBlob, ObjectImage, ReportCase
+from report_maker.utils.image_ingest import attach_upload, bulk_create_object_images, process_object_image
+
+UserModel = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="test_image_ingest_")
+
+
+def make_jpeg(width: int, height: int, *, orientation: int | None = None, **tags) -> bytes:
+    buf = io.BytesIO()
+    im = Image.new("RGB", (width, height), (20, 120, 200))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    for tag, value in tags.items():
+        exif[int(tag[1:], 16)] = value
+    im.save(buf, format="JPEG", exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def make_camera_jpeg(width: int, height: int) -> bytes:
+    return make_jpeg(
+        width,
+        height,
+        orientation=6,
+        x010F="Canon",
+        x0110="EOS R6",
+        x8769={0x9003: "2025:03:04 10:20:30", 0x9011: "-03:00"},
+        x8825={1: "S", 2: (22.0, 54.0, 30.0), 3: "W", 4: (47.0, 3.0, 36.0)},
+    )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_URL="/media/", REPORT_IMAGE_MAX_WIDTH=1600)
+class ImageIngestTests(TestCase):
+    """
+    Upload gravado como enviado e respondido de imediato (PENDING); a
+    normalização e as versões de tela ficam com o worker.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(username="u1", password="pass123")
+        inst = Institution.objects.create(
+            acronym="SPTC",
+            name="Superintendência da Polícia Técnico-Científica",
+            kind=Institution.Kind.SCIENTIFIC_POLICE,
+            is_active=True,
+        )
+        city = InstitutionCity.objects.create(institution=inst, name="Campinas", state="SP")
+        nucleus = Nucleus.objects.create(institution=inst, name="Núcleo Campinas", city=city)
+        team = Team.objects.create(nucleus=nucleus, name="Equipe 01", description="")
+
+        self.report = ReportCase(
+            author=self.user,
+            report_number="123.123/2026",
+            requesting_authority="Autoridade Requisitante (teste)",
+            institution=inst,
+            nucleus=nucleus,
+            team=team,
+        )
+        self.report.save()
+        self.obj = GenericLocationExamObject.objects.create(report_case=self.report, title="Local")
+
+    def _add_image(self, data: bytes, *, width: int, height: int) -> ObjectImage:
+        return ObjectImage.objects.create(
+            content_object=self.obj,
+            image=SimpleUploadedFile("foto.jpg", data, content_type="image/jpeg"),
+            original_width=width,
+            original_height=height,
+        )
+
+    def test_upload_is_stored_as_is_and_acknowledged_pending(self):
+        self.client.login(username="u1", password="pass123")
+        data = make_jpeg(3000, 1500)
+
+        resp = self.client.post(
+            reverse("report_maker:reportcase_detail", kwargs={"pk": self.report.pk}),
+            {
+                "file": SimpleUploadedFile("foto.jpg", data, content_type="image/jpeg"),
+                "object_id": str(self.obj.pk),
+                "app_label": "report_maker",
+                "model_name": "genericlocationexamobject",
+            },
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        payload = resp.json()
+        self.assertEqual(payload["status"], "PENDING")
+
+        img = ObjectImage.objects.get(pk=payload["id"])
+        self.assertEqual((img.original_width, img.original_height), (3000, 1500))
+        with img.image.open("rb") as fh:
+            self.assertEqual(fh.read(), data)
+
+        status = self.client.get(payload["status_url"]).json()
+        self.assertTrue(status["is_processing"])
+
+    def test_worker_normalizes_orientation_and_width(self):
+        # orientação EXIF 6: a foto é exibida girada 90°
+        img = self._add_image(make_jpeg(2400, 1200, orientation=6), width=2400, height=1200)
+        self.assertEqual(img.processing_status, ObjectImage.ProcessingStatus.PENDING)
+        original_name = img.image.name
+
+        claimed = ObjectImage.claim_next_pending()
+        self.assertEqual(claimed.pk, img.pk)
+        self.assertIsNone(ObjectImage.claim_next_pending())
+
+        process_object_image(claimed)
+        img.refresh_from_db()
+
+        self.assertEqual(img.processing_status, ObjectImage.ProcessingStatus.READY)
+        self.assertEqual((img.original_width, img.original_height), (1200, 2400))
+        self.assertNotEqual(img.image.name, original_name)
+        self.assertFalse(img.image.storage.exists(original_name))
+        with img.image.open("rb") as fh, Image.open(fh) as im:
+            self.assertEqual(im.size, (1200, 2400))
+        self.assertEqual(len(img.renditions), 2)
+
+    def test_worker_resizes_and_keeps_user_width_override(self):
+        img = self._add_image(make_jpeg(3200, 1600), width=3200, height=1600)
+        ObjectImage.objects.filter(pk=img.pk).update(original_width=800)
+
+        call_command("process_object_images", "--once", "--workers", "0", stdout=io.StringIO())
+        img.refresh_from_db()
+
+        self.assertEqual(img.processing_status, ObjectImage.ProcessingStatus.READY)
+        self.assertEqual(img.original_width, 800)
+        with img.image.open("rb") as fh, Image.open(fh) as im:
+            self.assertEqual(im.size, (1600, 800))
+
+    def test_unreadable_upload_is_marked_failed(self):
+        img = self._add_image(b"not an image", width=10, height=10)
+
+        process_object_image(ObjectImage.claim_next_pending())
+        img.refresh_from_db()
+
+        self.assertEqual(img.processing_status, ObjectImage.ProcessingStatus.FAILED)
+
+    def test_stale_processing_is_requeued(self):
+        img = self._add_image(make_jpeg(100, 100), width=100, height=100)
+        ObjectImage.claim_next_pending()
+        ObjectImage.objects.filter(pk=img.pk).update(processing_started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(ObjectImage.requeue_stale(older_than=timedelta(minutes=5)), 1)
+        img.refresh_from_db()
+        self.assertEqual(img.processing_status, ObjectImage.ProcessingStatus.PENDING)
+
+    def test_bulk_upload_allocates_contiguous_indexes_in_one_insert(self):
+        self.user.can_edit_reports = True
+        self.user.can_create_reports_until = timezone.now().date() + timedelta(days=30)
+        self.user.team = self.report.team
+        self.user.save(update_fields=["can_edit_reports", "can_create_reports_until", "team"])
+        self.client.login(username="u1", password="pass123")
+
+        existing = self._add_image(make_jpeg(50, 50), width=50, height=50)
+        self.assertEqual(existing.index, 1)
+
+        files = [
+            SimpleUploadedFile(f"foto{i}.jpg", make_jpeg(40 + i, 30), content_type="image/jpeg")
+            for i in range(3)
+        ]
+        files.insert(1, SimpleUploadedFile("notas.jpg", b"texto", content_type="image/jpeg"))
+        url = reverse(
+            "report_maker:image_bulk_upload",
+            kwargs={
+                "app_label": "report_maker",
+                "model": "genericlocationexamobject",
+                "object_id": self.obj.pk,
+            },
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            images, errors = bulk_create_object_images(self.obj, files)
+        statements = [q["sql"].split()[0] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        # contador de índices (incremento + leitura), blobs (trava, novos,
+        # referências) e um único INSERT
+        self.assertEqual(statements, ["UPDATE", "SELECT", "SELECT", "INSERT", "UPDATE", "INSERT"])
+        self.assertEqual([e.name for e in errors], ["notas.jpg"])
+        self.assertEqual([img.index for img in images], [2, 3, 4])
+
+        for f in files:
+            f.seek(0)
+        resp = self.client.post(url, {"files": files})
+        self.assertEqual(resp.status_code, 201)
+        payload = resp.json()
+        self.assertEqual([i["index"] for i in payload["images"]], [5, 6, 7])
+        self.assertEqual(len(payload["errors"]), 1)
+
+        rows = list(
+            ObjectImage.objects.filter(object_id=self.obj.pk).order_by("index").values_list(
+                "index", "original_width", "processing_status"
+            )
+        )
+        self.assertEqual([r[0] for r in rows], [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual([r[1] for r in rows[1:4]], [40, 41, 42])
+        self.assertTrue(all(r[2] == "PENDING" for r in rows))
+
+    def test_upload_above_pixel_budget_is_rejected(self):
+        self.client.login(username="u1", password="pass123")
+
+        with override_settings(IMAGE_MAX_PIXELS=1_000_000):
+            resp = self.client.post(
+                reverse("report_maker:reportcase_detail", kwargs={"pk": self.report.pk}),
+                {
+                    "file": SimpleUploadedFile("foto.jpg", make_jpeg(1200, 1000), content_type="image/jpeg"),
+                    "object_id": str(self.obj.pk),
+                    "app_label": "report_maker",
+                    "model_name": "genericlocationexamobject",
+                },
+            )
+            _images, errors = bulk_create_object_images(
+                self.obj, [SimpleUploadedFile("grande.jpg", make_jpeg(1200, 1000), content_type="image/jpeg")]
+            )
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("megapixels", resp.json()["error"])
+        self.assertEqual([e.name for e in errors], ["grande.jpg"])
+        self.assertIn("megapixels", errors[0].error)
+        self.assertFalse(ObjectImage.objects.exists())
+
+    def _upload(self, obj, data: bytes) -> ObjectImage:
+        resp = self.client.post(
+            reverse("report_maker:reportcase_detail", kwargs={"pk": self.report.pk}),
+            {
+                "file": SimpleUploadedFile("foto.jpg", data, content_type="image/jpeg"),
+                "object_id": str(obj.pk),
+                "app_label": "report_maker",
+                "model_name": obj._meta.model_name,
+            },
+        )
+        self.assertEqual(resp.status_code, 200)
+        return ObjectImage.objects.get(pk=resp.json()["id"])
+
+    def test_duplicate_upload_shares_one_blob_until_last_reference(self):
+        self.client.login(username="u1", password="pass123")
+        other = GenericLocationExamObject.objects.create(report_case=self.report, title="Outro local")
+        data = make_jpeg(800, 600)
+
+        first = self._upload(self.obj, data)
+        second = self._upload(other, data)
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.blob_id, second.blob_id)
+        blob = ImageBlob.objects.get()
+        self.assertEqual((blob.ref_count, blob.size), (2, len(data)))
+        storage = first.image.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.image.name))
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(second.image.name))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_upload_rewrites_blob_deleted_after_its_existence_check(self):
+        self.client.login(username="u1", password="pass123")
+        data = make_jpeg(800, 600)
+        first = self._upload(self.obj, data)
+        storage = first.image.storage
+        other = GenericLocationExamObject.objects.create(report_case=self.report, title="Outro local")
+
+        # o upload vê o arquivo presente e não o regrava...
+        second = ObjectImage(content_object=other)
+        attach_upload(second, SimpleUploadedFile("foto.jpg", data, content_type="image/jpeg"))
+        # ...mas a última referência anterior sai antes da inserção
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertFalse(storage.exists(second.image.name))
+
+        second.save()
+
+        self.assertTrue(storage.exists(second.image.name))
+        with storage.open(second.image.name) as fh:
+            self.assertEqual(fh.read(), data)
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+
+    def test_released_blob_survives_reference_acquired_before_removal(self):
+        self.client.login(username="u1", password="pass123")
+        data = make_jpeg(800, 600)
+        first = self._upload(self.obj, data)
+        storage = first.image.storage
+        other = GenericLocationExamObject.objects.create(report_case=self.report, title="Outro local")
+
+        with self.captureOnCommitCallbacks() as deleted:
+            first.delete()
+        # release_blob roda após o commit e agenda a remoção do arquivo
+        with self.captureOnCommitCallbacks() as callbacks:
+            for callback in deleted:
+                callback()
+        self.assertEqual(ImageBlob.objects.get().ref_count, 0)
+        second = ObjectImage(content_object=other)
+        attach_upload(second, SimpleUploadedFile("foto.jpg", data, content_type="image/jpeg"))
+        second.save()
+
+        for callback in callbacks:
+            callback()
+
+        self.assertTrue(storage.exists(second.image.name))
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+
+    def test_worker_moves_duplicates_to_one_normalized_blob(self):
+        other = GenericLocationExamObject.objects.create(report_case=self.report, title="Outro local")
+        data = make_jpeg(3200, 1600)
+        images = []
+        for target in (self.obj, other):
+            img = ObjectImage(content_object=target)
+            attach_upload(img, SimpleUploadedFile("foto.jpg", data, content_type="image/jpeg"))
+            img.save()
+            images.append(img)
+        raw_name = images[0].image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_object_images", "--once", "--workers", "0", stdout=io.StringIO())
+
+        for img in images:
+            img.refresh_from_db()
+        self.assertEqual(images[0].image.name, images[1].image.name)
+        self.assertNotEqual(images[0].image.name, raw_name)
+        self.assertFalse(images[0].image.storage.exists(raw_name))
+
+        blob = ImageBlob.objects.get()
+        self.assertEqual((blob.pk, blob.ref_count), (images[0].blob_id, 2))
+        # versões de tela continuam por imagem
+        self.assertNotEqual(images[0].renditions[0]["jpeg"], images[1].renditions[0]["jpeg"])
+
+    def test_exif_metadata_is_indexed_at_ingest_and_survives_normalization(self):
+        img = ObjectImage(content_object=self.obj)
+        attach_upload(img, SimpleUploadedFile("foto.jpg", make_camera_jpeg(2400, 1200), content_type="image/jpeg"))
+        img.save()
+
+        call_command("process_object_images", "--once", "--workers", "0", stdout=io.StringIO())
+        img.refresh_from_db()
+
+        self.assertTrue(img.metadata_extracted)
+        self.assertEqual(img.captured_at, datetime(2025, 3, 4, 13, 20, 30, tzinfo=dt_timezone.utc))
+        self.assertAlmostEqual(img.gps_latitude, -22.9083333)
+        self.assertAlmostEqual(img.gps_longitude, -47.06)
+        self.assertEqual(img.exif_orientation, 6)
+        self.assertEqual((img.camera_make, img.camera_model), ("Canon", "EOS R6"))
+        # arquivo normalizado (sem EXIF), metadados preservados no registro
+        self.assertEqual((img.original_width, img.original_height), (1200, 2400))
+
+    def test_backfill_command_indexes_existing_files(self):
+        with_exif = self._add_image(make_camera_jpeg(100, 50), width=100, height=50)
+        without_exif = self._add_image(make_jpeg(100, 50), width=100, height=50)
+        self.assertFalse(with_exif.metadata_extracted)
+
+        out = io.StringIO()
+        call_command("backfill_image_metadata", stdout=out)
+
+        with_exif.refresh_from_db()
+        without_exif.refresh_from_db()
+        self.assertTrue(with_exif.metadata_extracted and without_exif.metadata_extracted)
+        self.assertEqual(with_exif.camera_model, "EOS R6")
+        self.assertIsNone(without_exif.captured_at)
+        self.assertIn("2 indexada(s) (1 com EXIF)", out.getvalue())
+
+
+class DecodeBudgetTests(TestCase):
+    """
+    Decodificação reduzida (draft JPEG) e orçamentos de pixels/memória da
+    normalização.
+    """
+
+    def test_draft_decodes_at_reduced_scale(self):
+        data = make_jpeg(4000, 3000)
+
+        with open_image(io.BytesIO(data)) as im:
+            im.draft(im.mode, (1000, 750))
+            im.load()
+            self.assertEqual(im.size, (1000, 750))
+
+        result = normalize_image(io.BytesIO(data), max_width=1600)
+        self.assertEqual((result.width, result.height), (1600, 1200))
+        self.assertEqual((result.source_width, result.source_height), (4000, 3000))
+
+    def test_draft_respects_exif_rotation(self):
+        result = normalize_image(io.BytesIO(make_jpeg(4000, 2000, orientation=6)), max_width=800)
+        self.assertEqual((result.width, result.height), (800, 1600))
+
+    def test_memory_budget_applies_to_the_decoded_size(self):
+        data = make_jpeg(3200, 1600)
+
+        # 3200x1600 cheio ~46 MB no pipeline; com draft (1600x800) ~12 MB
+        with override_settings(IMAGE_DECODE_MEMORY_BUDGET=20 * 1024 * 1024):
+            self.assertEqual(normalize_image(io.BytesIO(data), max_width=1600).width, 1600)
+            with self.assertRaises(ImageTooLarge):
+                normalize_image(io.BytesIO(data), max_width=1600, draft=False)
+
+    def test_pixel_budget_rejects_before_decoding(self):
+        with override_settings(IMAGE_MAX_PIXELS=1_000_000):
+            with self.assertRaises(ImageTooLarge):
+                normalize_image(io.BytesIO(make_jpeg(1200, 1000)), max_width=800)
+
+    def test_memory_budget_rejects_reservation_above_limit(self):
+        budget = MemoryBudget(100)
+        with budget.reserve(60):
+            pass
+        with self.assertRaises(ImageTooLarge):
+            with budget.reserve(101):
+                pass
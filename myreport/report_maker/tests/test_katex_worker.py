@@ -0,0 +1,87 @@
+# report_maker/tests/test_katex_worker.py
+from __future__ import annotations
+
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from report_maker.templatetags import markdown_extras
+from report_maker.utils import katex_worker
+from report_maker.utils.katex_worker import KatexWorker
+from report_maker.utils.render_cache import get_render_cache
+
+# Daemon falso (mesmo protocolo JSON-lines do katex_daemon.js), em Python,
+# para não depender do Node nos testes.
+_FAKE_DAEMON = textwrap.dedent(
+    """
+    import json, os, sys
+    for line in sys.stdin:
+        req = json.loads(line)
+        out = []
+        for tex in req["items"]:
+            if tex == "CRASH":
+                os._exit(3)
+            out.append(None if tex == "BAD" else f"<k pid={os.getpid()}>{tex}</k>")
+        sys.stdout.write(json.dumps({"id": req["id"], "html": out}) + "\\n")
+        sys.stdout.flush()
+    """
+)
+
+
+class KatexWorkerTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        script = Path(self._tmp.name) / "fake_daemon.py"
+        script.write_text(_FAKE_DAEMON, encoding="utf-8")
+        self.worker = KatexWorker(node_bin=sys.executable, script=script, timeout=10)
+
+    def tearDown(self):
+        self.worker.close()
+        self._tmp.cleanup()
+
+    def test_batch_is_rendered_by_one_process(self):
+        out = self.worker.render_many(["a", "BAD", "b"])
+
+        self.assertIsNone(out[1])
+        self.assertTrue(out[0].endswith(">a</k>"))
+        pid = self.worker._proc.pid
+        self.assertIn(f"pid={pid}", out[2])
+
+        again = self.worker.render_many(["c"])
+        self.assertIn(f"pid={pid}", again[0])
+
+    def test_restarts_after_crash(self):
+        self.worker.render_many(["a"])
+        first_pid = self.worker._proc.pid
+
+        with patch.object(katex_worker, "RESTART_BACKOFF_SECONDS", 0), self.assertLogs(
+            katex_worker.logger, "WARNING"
+        ):
+            self.assertEqual(self.worker.render_many(["CRASH"]), [None])
+            out = self.worker.render_many(["b"])
+
+        self.assertTrue(out[0].endswith(">b</k>"))
+        self.assertNotEqual(self.worker._proc.pid, first_pid)
+
+
+class RenderMarkdownMathTests(SimpleTestCase):
+    def setUp(self):
+        get_render_cache().clear_memory()
+
+    def test_all_equations_rendered_in_one_batch_with_fallback(self):
+        calls = []
+
+        def fake_many(items):
+            calls.append(list(items))
+            return [f"<k>{t}</k>" if t != "bad" else None for t in items]
+
+        with patch.object(markdown_extras, "render_katex_many", side_effect=fake_many):
+            out = markdown_extras.render_markdown("x {math$ a^2 $} e {math$ bad $}")
+
+        self.assertEqual(calls, [["a^2", "bad"]])
+        self.assertIn("<k>a^2</k>", out)
+        self.assertIn('<span class="math-error">bad</span>', out)
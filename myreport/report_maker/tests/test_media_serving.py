@@ -0,0 +1,123 @@
+# report_maker/tests/test_media_serving.py
+from __future__ import annotations
+
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from report_maker.models import ObjectImage
+from report_maker.tests.test_storage_cleanup import make_location_object, make_reportcase, make_user
+from report_maker.utils.image_blobs import link_blob, store_blob_data
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="test_media_serving_")
+
+PAYLOAD = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_URL="/media/", MEDIA_ACCEL="")
+class ProtectedMediaTests(TestCase):
+    """
+    Mídia servida pela view protegida: autorização pelo dono do laudo,
+    ETag/304, Range/206 e entrega pelo servidor web (X-Accel-Redirect).
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.owner = make_user(i=1)
+        self.other = make_user(i=2)
+        self.report = make_reportcase(author=self.owner, i=1)
+        self.name = default_storage.save(f"reports/{self.report.pk}/pdf/laudo.pdf", ContentFile(PAYLOAD))
+        self.url = f"/media/{self.name}"
+
+    def test_owner_gets_file_with_validators(self):
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PAYLOAD)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("private", response["Cache-Control"])
+        self.assertTrue(response["ETag"])
+        self.assertTrue(response["Last-Modified"])
+        # sessão + usuário + autorização
+        self.assertEqual(len([q for q in ctx.captured_queries if "report_maker_" in q["sql"]]), 1)
+
+    def test_other_user_and_anonymous_are_denied(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_path_traversal_is_rejected(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(f"/media/institutions/../reports/{self.report.pk}/pdf/laudo.pdf")
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_request_returns_304(self):
+        self.client.force_login(self.owner)
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_range_requests(self):
+        self.client.force_login(self.owner)
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(PAYLOAD)}")
+        self.assertEqual(b"".join(response.streaming_content), PAYLOAD[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(response.streaming_content), PAYLOAD[-4:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={len(PAYLOAD)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(PAYLOAD)}")
+
+        # If-Range desatualizado: arquivo inteiro
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"antigo"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_blob_access_follows_the_reports_using_it(self):
+        stored = store_blob_data(PAYLOAD)
+        url = f"/media/{stored.name}"
+
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        obj = make_location_object(report=self.report, i=1)
+        img = link_blob(ObjectImage(content_object=obj, original_width=1, original_height=1), stored)
+        img.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(MEDIA_ACCEL="nginx", MEDIA_ACCEL_PREFIX="/protected-media/")
+    def test_accel_redirect_hands_transfer_to_web_server(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(response.content, b"")
+
+    @override_settings(MEDIA_ACCEL="sendfile")
+    def test_sendfile_header(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Sendfile"], default_storage.path(self.name))
+        self.assertEqual(response.content, b"")
@@ -0,0 +1,87 @@
+# report_maker/tests/test_pdf_context.py
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from report_maker.utils import pdf_context
+from report_maker.utils.pdf_context import PdfRendererContext
+from report_maker.views import report_pdf_generator as gen
+
+
+class PdfRendererContextTests(SimpleTestCase):
+    """
+    Contexto de renderização por processo: estáticos e emblemas lidos uma
+    vez, revalidados pelo mtime e limitados em bytes.
+    """
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="test_pdf_context_"))
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def _write(self, rel: str, data: bytes) -> Path:
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path
+
+    def test_asset_is_read_once_and_revalidated_by_mtime(self):
+        path = self._write("emblema.png", b"v1")
+        context = PdfRendererContext()
+
+        with patch.object(Path, "read_bytes", autospec=True, side_effect=lambda p: b"v1") as read:
+            first = context.asset(path, "/static/emblema.png")
+            second = context.asset(path, "/static/emblema.png")
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual((first["string"], second["string"]), (b"v1", b"v1"))
+        self.assertEqual(first["mime_type"], "image/png")
+
+        path.write_bytes(b"v2!")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(context.asset(path, "/static/emblema.png")["string"], b"v2!")
+
+    def test_cache_is_bounded_in_bytes(self):
+        context = PdfRendererContext(max_bytes=10)
+        a = self._write("a.png", b"123456")
+        b = self._write("b.png", b"abcdef")
+
+        context.asset(a, "a")
+        context.asset(b, "b")
+        self.assertEqual(list(context._assets), [str(b)])
+
+        big = self._write("grande.png", b"x" * 11)
+        response = context.asset(big, "grande")
+        self.addCleanup(response["file_obj"].close)
+        self.assertEqual(response["file_obj"].read(), b"x" * 11)
+        self.assertNotIn(str(big), context._assets)
+
+    def test_static_lookup_is_memoized(self):
+        path = self._write("report_maker/css/report_pdf.css", b"body {}")
+        context = PdfRendererContext()
+
+        with patch.object(pdf_context.finders, "find", return_value=str(path)) as find:
+            for _ in range(3):
+                self.assertEqual(context.find_static("report_maker/css/report_pdf.css"), str(path))
+        self.assertEqual(find.call_count, 1)
+
+    def test_url_fetcher_caches_emblems_but_not_photos(self):
+        emblem = self._write("reports/abc/header/emblema.png", b"emblema")
+        self._write("reports/abc/foto.jpg", b"foto")
+        context = PdfRendererContext()
+
+        with override_settings(MEDIA_ROOT=str(self.root), MEDIA_URL="/media/"), patch.object(
+            gen, "get_pdf_context", return_value=context
+        ):
+            cached = gen.django_url_fetcher("http://localhost/media/reports/abc/header/emblema.png")
+            photo = gen.django_url_fetcher("http://localhost/media/reports/abc/foto.jpg")
+        self.addCleanup(photo["file_obj"].close)
+
+        self.assertEqual(cached["string"], b"emblema")
+        self.assertEqual(photo["file_obj"].read(), b"foto")
+        self.assertEqual(list(context._assets), [str(emblem)])
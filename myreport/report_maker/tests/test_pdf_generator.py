@@ -0,0 +1,443 @@
+# report_maker/tests/test_pdf_generator.py
+from __future__ import annotations
+
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from institutions.models import Institution, InstitutionCity, Nucleus, Team
+from report_maker.models import ReportCase, ReportRenderJob
+from report_maker.views import report_pdf_generator as gen
+from report_maker.views.report_outline import (
+    OutlineGroup,
+    OutlineObject,
+    OutlineSection,
+    build_outline_ui,
+)
+
+UserModel = get_user_model()
+
+
+class _FakePage(str):
+    """Página com rótulo e âncoras (Page.anchors)."""
+
+    def __new__(cls, label, anchors=()):
+        page = super().__new__(cls, label)
+        page.anchors = dict.fromkeys(anchors)
+        return page
+
+
+class _FakeDocument:
+    """
+    Documento mínimo com a mesma interface usada pelo gerador
+    (pages, copy, make_bookmark_tree, write_pdf).
+
+    toc_end: índice da página que recebe a âncora do fim do sumário.
+    """
+
+    def __init__(self, pages, bookmarks=None, toc_end=None):
+        self.pages = [
+            page if isinstance(page, _FakePage) else _FakePage(page, [gen.TOC_END_ANCHOR] if i == toc_end else [])
+            for i, page in enumerate(pages)
+        ]
+        self._bookmarks = bookmarks or []
+
+    def copy(self, pages="all"):
+        return _FakeDocument(self.pages if pages == "all" else pages)
+
+    def make_bookmark_tree(self):
+        return self._bookmarks
+
+    def write_pdf(self):
+        return ("|".join(self.pages)).encode("utf-8")
+
+
+class TocHelpersTests(SimpleTestCase):
+    def test_flatten_bookmarks_normalizes_labels_and_pages(self):
+        tree = [
+            ("1.  Local", (0, 0, 0), [("1.1. Descrição", (2, 0, 0), [], "open")], "open"),
+            ("2. Veículo", (4, 0, 0), [], "open"),
+        ]
+        acc: dict[str, int] = {}
+        gen._flatten_bookmarks(tree, acc)
+
+        self.assertEqual(acc, {"1. Local": 1, "1.1. Descrição": 3, "2. Veículo": 5})
+
+    def test_apply_toc_pages_without_offset_uses_body_pages(self):
+        items = [{"display_text": "1. Local"}, {"display_text": "9. Inexistente"}]
+        resolved = gen._apply_toc_pages(items, {"1. Local": 3}, offset=0)
+
+        self.assertEqual(resolved[0]["page"], 3)
+        self.assertIsNone(resolved[1]["page"])
+
+    def test_toc_page_count_reads_end_anchor(self):
+        self.assertEqual(gen._toc_page_count(_FakeDocument(["r1", "r2", "b3"], toc_end=2)), 2)
+        self.assertIsNone(gen._toc_page_count(_FakeDocument(["b1"])))
+
+    def test_assemble_with_toc_replaces_reserved_pages(self):
+        body = _FakeDocument(["r1", "r2", "b3", "b4"])
+        toc = _FakeDocument(["t1", "t2"])
+
+        final = gen._assemble_with_toc(body, toc, 2)
+
+        self.assertEqual(final.pages, ["t1", "t2", "b3", "b4"])
+
+
+class OutlineUITests(SimpleTestCase):
+    class _Obj:
+        pk = 7
+
+    class _Img:
+        pass
+
+    class _CT:
+        id = 3
+
+    def _outline(self, obj):
+        section = OutlineSection(number="1.1.", label="Descrição", text="texto", fmt="md", html="<p>texto</p>")
+        return [
+            OutlineGroup(
+                number="1.",
+                group_key="local",
+                group_label="Local",
+                intro_text="",
+                objects=[OutlineObject(number="1.", obj=obj, title="Local", sections=[section])],
+            )
+        ]
+
+    def test_references_original_objects_and_numbers_figures(self):
+        obj = self._Obj()
+        imgs = [self._Img(), self._Img()]
+        outline_ui = build_outline_ui(self._outline(obj), {self._Obj: self._CT()}, {(3, 7): imgs})
+
+        o = outline_ui[0].objects[0]
+        self.assertIs(o.obj, obj)
+        self.assertEqual(o.anchor_id, "obj-1-1")
+        self.assertEqual(o.sections[0].anchor_id, "sec-1-1-1")
+        self.assertEqual(o.sections[0].html, "<p>texto</p>")
+        self.assertEqual([it.figure_label for it in o.images], ["Figura 1", "Figura 2"])
+        self.assertIs(o.images[0].img, imgs[0])
+        self.assertFalse(hasattr(o, "__dict__"))
+
+    def test_collect_toc_items_reads_view_model(self):
+        outline_ui = build_outline_ui(self._outline(self._Obj()), {}, {})
+        items = gen._collect_toc_items(outline_ui)
+
+        self.assertEqual(
+            [(i["anchor_id"], i["display_text"]) for i in items],
+            [("obj-1-1", "1. Local"), ("sec-1-1-1", "1.1. Descrição")],
+        )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class _ReportPdfViewTestBase(TestCase):
+    """Laudo mínimo do autor logado + URL do PDF (arquivos num MEDIA_ROOT temporário)."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(username="u1", password="pass123")
+        self.user.can_edit_reports = True
+        self.user.can_create_reports = True
+        self.user.can_create_reports_until = timezone.now().date() + timedelta(days=30)
+
+        self.inst = Institution.objects.create(
+            acronym="SPTC",
+            name="Superintendência da Polícia Técnico-Científica",
+            kind=Institution.Kind.SCIENTIFIC_POLICE,
+            is_active=True,
+        )
+        self.city = InstitutionCity.objects.create(institution=self.inst, name="Campinas", state="SP")
+        self.nucleus = Nucleus.objects.create(institution=self.inst, name="Núcleo Campinas", city=self.city)
+        self.team = Team.objects.create(nucleus=self.nucleus, name="Equipe 01", description="")
+        self.user.team = self.team
+        self.user.save()
+
+        self.report = ReportCase(
+            author=self.user,
+            report_number="123.123/2026",
+            requesting_authority="Autoridade Requisitante (teste)",
+            institution=self.inst,
+            nucleus=self.nucleus,
+            team=self.team,
+        )
+        self.report.save()
+
+        self.client.login(username="u1", password="pass123")
+        self.url = reverse("report_maker:report_pdf", kwargs={"pk": self.report.pk})
+
+    def _get_pdf(self, params=None):
+        """GET do PDF: pedido enfileirado (202) -> o worker processa e a página de acompanhamento é seguida."""
+        resp = self.client.get(self.url, params or {})
+        if resp.status_code == 202:
+            call_command("render_report_pdfs", "--once", stdout=StringIO())
+            resp = self.client.get(resp.context["refresh_url"])
+        return resp
+
+
+class ReportPdfSingleLayoutTests(_ReportPdfViewTestBase):
+    """
+    O corpo do laudo deve ser diagramado UMA única vez, já com as páginas
+    do sumário reservadas após "LAUDO Nº"; só elas são diagramadas de novo
+    (toc_only=True), numeradas, e substituem as reservadas.
+    """
+
+    def _toc_items(self):
+        return [
+            {"anchor_id": f"obj-{i}", "level": 1, "number": f"{i}.", "label": "Local", "display_text": "1. Local"}
+            for i in range(11)
+        ]
+
+    def test_short_report_renders_body_once(self):
+        body = _FakeDocument(["b1", "b2"])
+
+        with patch.object(gen, "_render_document", return_value=body) as render:
+            resp = self._get_pdf()
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(resp.content, b"b1|b2")
+
+    def test_long_report_renders_toc_pages_separately(self):
+        bookmarks = [("1. Local", (4, 0, 0), [], "open")]
+        # páginas 1-2: "LAUDO Nº" + sumário sem números; corpo a partir da 3
+        body = _FakeDocument(["r1", "r2"] + [f"b{i}" for i in range(3, 26)], bookmarks=bookmarks, toc_end=2)
+        toc = _FakeDocument(["t1", "t2"])
+
+        def fake_render(**kwargs):
+            return toc if kwargs.get("toc_only") else body
+
+        with patch.object(gen, "_collect_toc_items", return_value=self._toc_items()), patch.object(
+            gen, "_render_document", side_effect=fake_render
+        ) as render:
+            resp = self._get_pdf()
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(render.call_count, 2)
+
+        body_call, toc_call = render.call_args_list
+        self.assertTrue(body_call.kwargs["include_auto_toc"])
+        self.assertFalse(body_call.kwargs.get("toc_only", False))
+        self.assertTrue(toc_call.kwargs["toc_only"])
+        self.assertEqual(toc_call.kwargs["total_pages"], 25)
+        # números do sumário: página do corpo, já contando o sumário
+        self.assertEqual([it["page"] for it in toc_call.kwargs["toc_items"]], [5] * 11)
+
+        self.assertEqual(resp.content, "|".join(["t1", "t2"] + [f"b{i}" for i in range(3, 26)]).encode())
+
+    def test_short_report_with_many_titles_drops_reserved_toc(self):
+        with_toc = _FakeDocument(["r1", "b2", "b3"], toc_end=1)
+        without_toc = _FakeDocument(["b1", "b2"])
+
+        def fake_render(**kwargs):
+            return with_toc if kwargs["include_auto_toc"] else without_toc
+
+        with patch.object(gen, "_collect_toc_items", return_value=self._toc_items()), patch.object(
+            gen, "_render_document", side_effect=fake_render
+        ) as render:
+            resp = self._get_pdf()
+
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(resp.content, b"b1|b2")
+
+
+class ReportDraftPdfTests(_ReportPdfViewTestBase):
+    """
+    ?mode=draft: uma única diagramação (sem sumário), folha do rascunho e
+    figuras de baixa resolução; o modo final não muda.
+    """
+
+    def _long_report(self):
+        bookmarks = [("1. Local", (4, 0, 0), [], "open")]
+        body = _FakeDocument([f"b{i}" for i in range(1, 26)], bookmarks=bookmarks, toc_end=1)
+        toc_items = [
+            {"anchor_id": f"obj-{i}", "level": 1, "number": f"{i}.", "label": "Local", "display_text": "1. Local"}
+            for i in range(11)
+        ]
+        return body, toc_items
+
+    def test_draft_skips_toc_and_uses_draft_assets(self):
+        body, toc_items = self._long_report()
+
+        with patch.object(gen, "_collect_toc_items", return_value=toc_items), patch.object(
+            gen, "_render_document", return_value=body
+        ) as render, patch.object(gen, "make_print_url_fetcher") as print_fetcher:
+            resp = self._get_pdf({"mode": "draft"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(render.call_count, 1)
+        self.assertTrue(render.call_args.kwargs["draft"])
+        print_fetcher.assert_not_called()
+        self.assertIn("_rascunho.pdf", resp["Content-Disposition"])
+
+    def test_final_mode_is_unchanged(self):
+        body, toc_items = self._long_report()
+
+        with patch.object(gen, "_collect_toc_items", return_value=toc_items), patch.object(
+            gen, "_render_document", side_effect=lambda **kw: _FakeDocument(["t1"]) if kw.get("toc_only") else body
+        ) as render:
+            resp = self._get_pdf()
+
+        self.assertEqual(render.call_count, 2)
+        self.assertFalse(any(call.kwargs.get("draft", False) for call in render.call_args_list))
+        self.assertNotIn("rascunho", resp["Content-Disposition"])
+
+
+class ReportPdfSingleFlightTests(_ReportPdfViewTestBase):
+    """
+    A rota direta também passa pela fila: pedidos da mesma versão (e modo)
+    compartilham uma renderização, e um job substituído para entre as
+    diagramações em vez de segurar o renderer.
+    """
+
+    def test_same_version_renders_once(self):
+        with patch.object(gen, "build_report_pdf", return_value=b"%PDF editado") as build:
+            first = self._get_pdf()
+            second = self._get_pdf()
+
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual((first.content, second.content), (b"%PDF editado", b"%PDF editado"))
+        self.assertEqual(ReportRenderJob.objects.get().status, ReportRenderJob.Status.DONE)
+
+    def test_draft_is_a_separate_version(self):
+        with patch.object(gen, "build_report_pdf", return_value=b"%PDF") as build:
+            self._get_pdf()
+            self._get_pdf({"mode": "draft"})
+            self._get_pdf({"mode": "draft"})
+
+        self.assertEqual([call.kwargs["draft"] for call in build.call_args_list], [False, True])
+        self.assertEqual(
+            sorted(ReportRenderJob.objects.values_list("draft", "status")),
+            [(False, ReportRenderJob.Status.DONE), (True, ReportRenderJob.Status.DONE)],
+        )
+
+    def test_superseded_job_stops_between_layouts(self):
+        bookmarks = [("1. Local", (4, 0, 0), [], "open")]
+        body = _FakeDocument(["r1", "r2"] + [f"b{i}" for i in range(3, 26)], bookmarks=bookmarks, toc_end=2)
+        toc = _FakeDocument(["t1", "t2"])
+        toc_items = [
+            {"anchor_id": f"obj-{i}", "level": 1, "number": f"{i}.", "label": "Local", "display_text": "1. Local"}
+            for i in range(11)
+        ]
+        calls = []
+
+        def fake_render(**kwargs):
+            calls.append(kwargs.get("toc_only", False))
+            if len(calls) == 1:
+                # nova edição durante a diagramação do corpo
+                newer = ReportRenderJob.objects.create(
+                    report_case=self.report, requested_by=self.user, content_version="nova"
+                )
+                ReportRenderJob.objects.filter(status=ReportRenderJob.Status.RUNNING).update(
+                    status=ReportRenderJob.Status.SUPERSEDED, superseded_by=newer
+                )
+            return toc if kwargs.get("toc_only") else body
+
+        with patch.object(gen, "_collect_toc_items", return_value=toc_items), patch.object(
+            gen, "_render_document", side_effect=fake_render
+        ):
+            resp = self._get_pdf()
+
+        # job antigo: só o corpo (o sumário não é diagramado); o novo, completo
+        self.assertEqual(calls, [False, False, True])
+        self.assertEqual(resp.status_code, 200)
+        stale = ReportRenderJob.objects.exclude(content_version="nova").get()
+        self.assertEqual(stale.status, ReportRenderJob.Status.SUPERSEDED)
+        self.assertFalse(stale.output)
+
+    def test_request_only_enqueues_and_returns_202(self):
+        with patch.object(gen, "build_report_pdf", return_value=b"%PDF") as build:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+
+        build.assert_not_called()
+        self.assertEqual((first.status_code, second.status_code), (202, 202))
+        self.assertEqual(first["Retry-After"], str(gen.PDF_STATUS_RETRY_SECONDS))
+        job = ReportRenderJob.objects.get()
+        self.assertEqual(job.status, ReportRenderJob.Status.QUEUED)
+        self.assertIn(f"job={job.pk}", first.context["refresh_url"])
+
+    def test_failed_job_returns_error_page(self):
+        with patch.object(gen, "build_report_pdf", side_effect=RuntimeError("boom")):
+            resp = self._get_pdf()
+
+        self.assertEqual(resp.status_code, 500)
+        self.assertTemplateUsed(resp, "report_maker/report_pdf_status.html")
+        self.assertContains(resp, "Não foi possível gerar o PDF", status_code=500)
+        self.assertEqual(ReportRenderJob.objects.get().status, ReportRenderJob.Status.FAILED)
+
+
+class ReportFinalPdfTests(_ReportPdfViewTestBase):
+    """
+    Laudo concluído: PDF renderizado uma única vez, gravado em
+    reports/<id>/final/ e servido do storage com ETag (SHA-256).
+    """
+
+    def _close(self):
+        self.report.close()
+        self.report.save()
+        self.report.refresh_from_db()
+
+    def test_closed_report_renders_once_and_serves_stored_file(self):
+        self._close()
+
+        with patch.object(gen, "build_report_pdf", return_value=b"%PDF final") as build:
+            first = self._get_pdf()
+            second = self.client.get(self.url)
+
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(b"".join(second.streaming_content), b"%PDF final")
+
+        self.report.refresh_from_db()
+        digest = hashlib.sha256(b"%PDF final").hexdigest()
+        self.assertTrue(self.report.final_pdf.name.startswith(f"reports/{self.report.pk}/final/"))
+        self.assertEqual(self.report.final_pdf_sha256, digest)
+        self.assertEqual(second["ETag"], f'"{digest}"')
+
+    def test_concurrent_first_downloads_share_one_job(self):
+        self._close()
+
+        with patch.object(gen, "build_report_pdf", return_value=b"%PDF final") as build:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            build.assert_not_called()
+            call_command("render_report_pdfs", "--once", stdout=StringIO())
+            resp = self.client.get(first.context["refresh_url"])
+
+        self.assertEqual((first.status_code, second.status_code), (202, 202))
+        self.assertEqual(first.context["refresh_url"], second.context["refresh_url"])
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(b"".join(resp.streaming_content), b"%PDF final")
+
+    def test_closed_report_if_none_match_returns_304(self):
+        self._close()
+
+        with patch.object(gen, "build_report_pdf", return_value=b"%PDF final"):
+            etag = self._get_pdf()["ETag"]
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, 304)
+
+    def test_store_final_pdf_keeps_first_artifact(self):
+        self._close()
+
+        self.assertTrue(self.report.store_final_pdf(b"first", "a.pdf"))
+        other = ReportCase.objects.get(pk=self.report.pk)
+        other.final_pdf = ""
+        self.assertFalse(other.store_final_pdf(b"second", "b.pdf"))
+        self.assertEqual(other.final_pdf_sha256, hashlib.sha256(b"first").hexdigest())
@@ -0,0 +1,147 @@
+# report_maker/tests/test_pdf_pool.py
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from report_maker.utils import pdf_pool
+
+
+class PdfRendererLoopTests(SimpleTestCase):
+    """
+    Laço do processo renderer (executado aqui numa thread, sem spawn):
+    respostas, erros e reciclagem por número de laudos.
+    """
+
+    def _run_worker(self, renders, *, max_jobs=10, max_rss=1 << 40):
+        parent, child = multiprocessing.Pipe()
+        with patch.object(pdf_pool, "_warm_up"), patch.object(pdf_pool, "_render", side_effect=renders):
+            thread = threading.Thread(target=pdf_pool._worker_main, args=(child, 0, max_jobs, max_rss))
+            thread.start()
+            self.assertTrue(parent.poll(5))
+            self.assertEqual(parent.recv(), pdf_pool.READY)
+            replies = []
+            for i in range(len(renders)):
+                parent.send((f"laudo-{i}", 1, "http://localhost/"))
+                if not parent.poll(5):
+                    break
+                replies.append(parent.recv())
+                if replies[-1][2]:
+                    break
+            if not replies or not replies[-1][2]:
+                parent.send(None)
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+        return replies
+
+    def test_returns_pdf_bytes_and_keeps_running(self):
+        replies = self._run_worker([b"%PDF um", b"%PDF dois"])
+        self.assertEqual(replies, [(True, b"%PDF um", False), (True, b"%PDF dois", False)])
+
+    def test_recycles_after_max_jobs(self):
+        replies = self._run_worker([b"%PDF um", b"%PDF dois"], max_jobs=1)
+        self.assertEqual(replies, [(True, b"%PDF um", True)])
+
+    def test_recycles_above_rss_limit(self):
+        replies = self._run_worker([b"%PDF um"], max_rss=1)
+        self.assertEqual(replies, [(True, b"%PDF um", True)])
+
+    def test_failure_is_reported_and_renderer_recycled(self):
+        (ok, payload, recycle), = self._run_worker([RuntimeError("boom")])
+        self.assertFalse(ok)
+        self.assertIn("boom", payload)
+        self.assertTrue(recycle)
+
+    def test_ready_is_not_sent_before_warm_up(self):
+        parent, child = multiprocessing.Pipe()
+        warmed = threading.Event()
+        release = threading.Event()
+
+        def slow_warm_up():
+            warmed.set()
+            release.wait(5)
+
+        with patch.object(pdf_pool, "_warm_up", side_effect=slow_warm_up):
+            thread = threading.Thread(target=pdf_pool._worker_main, args=(child, 0, 10, 1 << 40))
+            thread.start()
+            self.assertTrue(warmed.wait(5))
+            self.assertFalse(parent.poll(0.1))
+            release.set()
+            self.assertTrue(parent.poll(5))
+            self.assertEqual(parent.recv(), pdf_pool.READY)
+            parent.send(None)
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_pool_disabled_renders_in_process(self):
+        with override_settings(REPORT_PDF_POOL_SIZE=0):
+            self.assertIsNone(pdf_pool.get_pdf_pool())
+
+
+class _FakeConn:
+    def __init__(self, events, reply):
+        self.events, self.reply = events, reply
+
+    def send(self, message):
+        self.events.append("send")
+
+    def poll(self, timeout):
+        return True
+
+    def recv(self):
+        return self.reply
+
+
+class _FakeRenderer:
+    """Renderer sem processo: registra spawn, espera pelo READY, envio e parada."""
+
+    reply = (True, b"%PDF", False)
+
+    def __init__(self, ctx, **options):
+        self.events = []
+        self.conn = _FakeConn(self.events, self.reply)
+        self.stopped = threading.Event()
+        _FakeRenderer.spawned.append(self)
+
+    def alive(self):
+        return not self.stopped.is_set()
+
+    def wait_ready(self, timeout):
+        self.events.append("ready")
+        return True
+
+    def stop(self, *, graceful=True):
+        self.stopped.set()
+
+
+class PdfRenderPoolTests(SimpleTestCase):
+    """Pool: renderers iniciados com o pool, substituídos na reciclagem."""
+
+    def setUp(self):
+        _FakeRenderer.spawned = []
+        patcher = patch.object(pdf_pool, "_Renderer", _FakeRenderer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_renderers_start_with_the_pool(self):
+        pool = pdf_pool.PdfRenderPool(size=2)
+
+        self.assertEqual(len(_FakeRenderer.spawned), 2)
+        self.assertEqual(pool.render("laudo", 1, "http://localhost/"), b"%PDF")
+        self.assertEqual(len(_FakeRenderer.spawned), 2)
+        # um renderer ocupado (LIFO: o último iniciado); o laudo só é enviado depois do READY
+        self.assertEqual([r.events for r in _FakeRenderer.spawned], [[], ["ready", "send"]])
+
+    def test_recycled_renderer_is_replaced_in_background(self):
+        pool = pdf_pool.PdfRenderPool(size=1)
+        first = _FakeRenderer.spawned[0]
+
+        first.conn.reply = (True, b"%PDF", True)  # recycle
+        pool.render("laudo", 1, "http://localhost/")
+
+        self.assertTrue(first.stopped.wait(5))
+        self.assertEqual(len(_FakeRenderer.spawned), 2)
+        self.assertEqual(pool._idle.get_nowait(), _FakeRenderer.spawned[1])
@@ -0,0 +1,129 @@
+# report_maker/tests/test_render_cache.py
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test import TestCase
+
+from report_maker.models import RenderCacheEntry
+from report_maker.templatetags import markdown_extras
+from report_maker.utils.render_cache import RenderCache, get_render_cache, make_key
+
+
+class RenderCacheTests(TestCase):
+    def setUp(self):
+        self.cache = RenderCache(memory_entries=2, max_bytes=0)
+
+    def test_key_depends_on_kind_version_and_text(self):
+        base = make_key("markdown", "v1", "texto")
+        self.assertEqual(base, make_key("markdown", "v1", "texto"))
+        self.assertNotEqual(base, make_key("math", "v1", "texto"))
+        self.assertNotEqual(base, make_key("markdown", "v2", "texto"))
+
+    def test_memory_then_persistent_tier(self):
+        self.cache.set("markdown", "k1", "<p>1</p>")
+        self.assertEqual(self.cache.get("markdown", "k1"), "<p>1</p>")
+
+        # nova instância (outro processo): só a camada persistente responde
+        other = RenderCache(memory_entries=2, max_bytes=0)
+        self.assertEqual(other.get("markdown", "k1"), "<p>1</p>")
+        self.assertIsNone(other.get("markdown", "nope"))
+
+        kinds = other.stats()["kinds"]["markdown"]
+        self.assertEqual((kinds["db_hits"], kinds["misses"]), (1, 1))
+        self.assertEqual(self.cache.stats()["kinds"]["markdown"]["memory_hits"], 1)
+
+    def test_memory_tier_is_lru_bounded(self):
+        for i in range(3):
+            self.cache.set("math", f"k{i}", f"v{i}")
+        self.assertEqual(self.cache.stats()["memory_entries"], 2)
+
+    def test_evict_removes_least_recently_used(self):
+        cache = RenderCache(memory_entries=0, max_bytes=10)
+        cache.set("math", "old", "x" * 6)
+        cache.set("math", "new", "y" * 6)
+        RenderCacheEntry.objects.filter(key="old").update(last_used_at="2000-01-01T00:00:00Z")
+
+        self.assertEqual(cache.evict(), 1)
+        self.assertEqual(list(RenderCacheEntry.objects.values_list("key", flat=True)), ["new"])
+
+    def test_evict_failure_inside_transaction_uses_savepoint(self):
+        cache = RenderCache(memory_entries=0, max_bytes=10)
+
+        def broken_aggregate(**kwargs):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM tabela_inexistente")
+
+        with transaction.atomic():
+            with patch.object(RenderCacheEntry.objects, "aggregate", side_effect=broken_aggregate), self.assertLogs(
+                "report_maker.utils.render_cache", level="WARNING"
+            ):
+                self.assertEqual(cache.evict(), 0)
+            # a transação externa continua utilizável
+            self.assertEqual(RenderCacheEntry.objects.count(), 0)
+
+    def test_read_failure_inside_transaction_uses_savepoint(self):
+        def broken_filter(**kwargs):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM tabela_inexistente")
+
+        with transaction.atomic():
+            with patch.object(RenderCacheEntry.objects, "filter", side_effect=broken_filter), self.assertLogs(
+                "report_maker.utils.render_cache", level="WARNING"
+            ):
+                self.assertIsNone(self.cache.get("markdown", "k1"))
+            # a transação externa continua utilizável
+            self.assertEqual(RenderCacheEntry.objects.count(), 0)
+
+    def test_counters_are_logged_periodically(self):
+        cache = RenderCache(memory_entries=2, max_bytes=0, stats_log_seconds=0.001)
+        cache.set("markdown", "k1", "<p>1</p>")
+        time.sleep(0.01)
+
+        with self.assertLogs("report_maker.utils.render_cache", level="INFO") as logs:
+            cache.get("markdown", "k1")
+
+        self.assertTrue(any("[markdown]" in line and "taxa de acerto 1.0" in line for line in logs.output))
+
+
+class RenderMarkdownCacheTests(TestCase):
+    def setUp(self):
+        get_render_cache().clear_memory()
+
+    def test_second_render_skips_pipeline(self):
+        def fake_many(items):
+            return [f"<k>{t}</k>" for t in items]
+
+        with patch.object(markdown_extras, "render_katex_many", side_effect=fake_many):
+            first = markdown_extras.render_markdown("**a** {math$ x^2 $}")
+
+        with patch.object(markdown_extras.md, "markdown") as md_call:
+            second = markdown_extras.render_markdown("**a** {math$ x^2 $}")
+
+        md_call.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_equations_cached_individually(self):
+        calls = []
+
+        def fake_many(items):
+            calls.append(list(items))
+            return [f"<k>{t}</k>" for t in items]
+
+        with patch.object(markdown_extras, "render_katex_many", side_effect=fake_many):
+            markdown_extras.render_markdown("um {math$ x^2 $}")
+            markdown_extras.render_markdown("outro texto {math$ x^2 $} {math$ y $}")
+
+        self.assertEqual(calls, [["x^2"], ["y"]])
+
+    def test_failed_math_is_not_cached(self):
+        with patch.object(markdown_extras, "render_katex_many", return_value=[None]):
+            markdown_extras.render_markdown("falha {math$ z $}")
+
+        with patch.object(markdown_extras, "render_katex_many", return_value=["<k>z</k>"]) as katex:
+            out = markdown_extras.render_markdown("falha {math$ z $}")
+
+        katex.assert_called_once()
+        self.assertIn("<k>z</k>", out)
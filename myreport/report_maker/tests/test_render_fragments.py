@@ -0,0 +1,96 @@
+# report_maker/tests/test_render_fragments.py
+from __future__ import annotations
+
+import uuid
+from unittest.mock import patch
+
+from django.template.loader import render_to_string
+from django.test import TestCase
+
+from report_maker.models import ExamObject, GenericExamObject
+from report_maker.templatetags import markdown_extras
+from report_maker.tests.test_storage_cleanup import make_reportcase, make_user
+from report_maker.utils import render_fragments
+from report_maker.utils.render_fragments import attach_object_fragments
+from report_maker.views.report_document import ReportDocumentAssembler
+
+
+class ObjectFragmentCacheTests(TestCase):
+    """
+    Bloco de cada objeto de exame renderizado uma vez e reaproveitado:
+    só objetos editados ou com numeração alterada são re-renderizados.
+    """
+
+    def setUp(self):
+        self.report = make_reportcase(author=make_user(i=1), i=1)
+        self.objects = [
+            GenericExamObject.objects.create(report_case=self.report, title=f"Objeto {i}") for i in range(1, 4)
+        ]
+
+    def _render(self, target="pdf"):
+        outline_ui = ReportDocumentAssembler(self.report).assemble().outline_ui
+        with patch.object(render_fragments, "render_to_string", side_effect=render_to_string) as render:
+            outline_ui = attach_object_fragments(outline_ui, target=target)
+        titles = sorted(call.args[1]["o"].title for call in render.call_args_list)
+        blocks = {o.title: o.html for g in outline_ui for o in g.objects if o.html}
+        return titles, blocks
+
+    def test_repeat_render_reuses_every_fragment(self):
+        rendered, blocks = self._render()
+        self.assertEqual(rendered, ["Objeto 1", "Objeto 2", "Objeto 3"])
+        self.assertIn("Objeto 2", blocks["Objeto 2"])
+
+        rendered, cached = self._render()
+        self.assertEqual(rendered, [])
+        self.assertEqual(cached, blocks)
+
+    def test_edit_rerenders_only_that_object(self):
+        self._render()
+
+        self.objects[1].title = "Objeto 2 revisado"
+        self.objects[1].save()
+
+        rendered, blocks = self._render()
+        self.assertEqual(rendered, ["Objeto 2 revisado"])
+        self.assertIn("Objeto 2 revisado", blocks["Objeto 2 revisado"])
+
+    def test_reorder_rerenders_only_objects_whose_number_moved(self):
+        self._render()
+
+        first, second, third = self.objects
+        ExamObject.objects.filter(pk=second.pk).update(order=10)
+        ExamObject.objects.filter(pk=third.pk).update(order=second.order)
+        ExamObject.objects.filter(pk=second.pk).update(order=third.order)
+
+        rendered, _blocks = self._render()
+        self.assertEqual(rendered, ["Objeto 2", "Objeto 3"])
+
+    def test_targets_are_cached_separately(self):
+        self._render("pdf")
+        rendered, blocks = self._render("showpage")
+
+        self.assertEqual(len(rendered), 3)
+        self.assertIn('<h2 class="section-heading">', blocks["Objeto 1"])
+
+    def test_fragment_with_failed_math_is_not_cached(self):
+        outline_ui = ReportDocumentAssembler(self.report).assemble().outline_ui
+        # expressão inédita: fora dos caches de markdown/equações do processo
+        tex_id = uuid.uuid4().hex
+
+        def render_with_math(template_name, context):
+            # seção sem HTML gravado: equação renderizada agora, com o KaTeX fora do ar
+            if context["o"].title == "Objeto 2":
+                math_html, _complete = markdown_extras.render_markdown_html(f"Área {{math$ x^{{{tex_id}}} $}}")
+                return render_to_string(template_name, context) + math_html
+            return render_to_string(template_name, context)
+
+        with patch.object(markdown_extras, "render_katex_many", side_effect=lambda items: [None] * len(items)), patch.object(
+            render_fragments, "render_to_string", side_effect=render_with_math
+        ):
+            outline_ui = attach_object_fragments(outline_ui, target="pdf")
+        blocks = {o.title: o.html for g in outline_ui for o in g.objects}
+        self.assertIn("math-error", blocks["Objeto 2"])
+
+        rendered, blocks = self._render()
+        self.assertEqual(rendered, ["Objeto 2"])
+        self.assertNotIn("math-error", blocks["Objeto 2"])
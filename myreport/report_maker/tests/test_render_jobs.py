@@ -0,0 +1,323 @@
+# report_maker/tests/test_render_jobs.py
+from __future__ import annotations
+
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from institutions.models import Institution, InstitutionCity, Nucleus, Team
+from report_maker.models import ReportCase, ReportRenderJob
+from report_maker.utils.pdf_render_queue import enqueue_report_pdf, job_heartbeat
+
+UserModel = get_user_model()
+
+
+class ReportRenderJobTests(TestCase):
+    """
+    Fila de PDFs: submit (202), status, download e worker.
+    """
+
+    def setUp(self):
+        self._media = tempfile.mkdtemp()
+        self._override = override_settings(MEDIA_ROOT=self._media)
+        self._override.enable()
+
+        self.user = UserModel.objects.create_user(username="u1", password="pass123")
+        self.other = UserModel.objects.create_user(username="u2", password="pass123")
+
+        self.inst = Institution.objects.create(
+            acronym="SPTC",
+            name="Superintendência da Polícia Técnico-Científica",
+            kind=Institution.Kind.SCIENTIFIC_POLICE,
+            is_active=True,
+        )
+        self.city = InstitutionCity.objects.create(institution=self.inst, name="Campinas", state="SP")
+        self.nucleus = Nucleus.objects.create(institution=self.inst, name="Núcleo Campinas", city=self.city)
+        self.team = Team.objects.create(nucleus=self.nucleus, name="Equipe 01", description="")
+
+        self.user.can_edit_reports = True
+        self.user.can_create_reports = True
+        self.user.can_create_reports_until = timezone.now().date() + timedelta(days=30)
+        self.user.team = self.team
+        self.user.save()
+
+        self.report = ReportCase(
+            author=self.user,
+            report_number="123.123/2026",
+            requesting_authority="Autoridade Requisitante (teste)",
+            institution=self.inst,
+            nucleus=self.nucleus,
+            team=self.team,
+        )
+        self.report.save()
+
+        self.submit_url = reverse("report_maker:report_pdf_job_submit", kwargs={"pk": self.report.pk})
+
+    def tearDown(self):
+        self._override.disable()
+        shutil.rmtree(self._media, ignore_errors=True)
+
+    def _status_url(self, job):
+        return reverse(
+            "report_maker:report_pdf_job_status", kwargs={"pk": self.report.pk, "job_id": job.pk}
+        )
+
+    def _download_url(self, job):
+        return reverse(
+            "report_maker:report_pdf_job_download", kwargs={"pk": self.report.pk, "job_id": job.pk}
+        )
+
+    # ─────────────────────────────────────────────
+    # Submit
+    # ─────────────────────────────────────────────
+    def test_submit_returns_202_and_queues_job(self):
+        self.client.login(username="u1", password="pass123")
+        resp = self.client.post(self.submit_url)
+
+        self.assertEqual(resp.status_code, 202)
+        data = resp.json()
+        job = ReportRenderJob.objects.get(pk=data["job_id"])
+        self.assertEqual(job.status, ReportRenderJob.Status.QUEUED)
+        self.assertEqual(data["status_url"], self._status_url(job))
+        self.assertIsNone(data["download_url"])
+
+    def test_submit_reuses_pending_job(self):
+        self.client.login(username="u1", password="pass123")
+        first = self.client.post(self.submit_url).json()
+        second = self.client.post(self.submit_url).json()
+
+        self.assertEqual(first["job_id"], second["job_id"])
+        self.assertEqual(ReportRenderJob.objects.count(), 1)
+
+    def test_submit_non_author_404(self):
+        self.client.login(username="u2", password="pass123")
+        resp = self.client.post(self.submit_url)
+        self.assertEqual(resp.status_code, 404)
+
+    def test_submit_requires_post(self):
+        self.client.login(username="u1", password="pass123")
+        resp = self.client.get(self.submit_url)
+        self.assertEqual(resp.status_code, 405)
+
+    # ─────────────────────────────────────────────
+    # Status / download
+    # ─────────────────────────────────────────────
+    def test_download_before_done_returns_409(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        self.client.login(username="u1", password="pass123")
+
+        resp = self.client.get(self._download_url(job))
+        self.assertEqual(resp.status_code, 409)
+
+    def test_status_returns_immediately(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        self.client.login(username="u1", password="pass123")
+
+        started = time.monotonic()
+        data = self.client.get(self._status_url(job), {"wait": 20}).json()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(data["status"], ReportRenderJob.Status.QUEUED)
+
+    def test_status_of_other_user_job_404(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        self.client.login(username="u2", password="pass123")
+
+        resp = self.client.get(self._status_url(job))
+        self.assertEqual(resp.status_code, 404)
+
+    # ─────────────────────────────────────────────
+    # Worker
+    # ─────────────────────────────────────────────
+    def test_claim_next_is_exclusive(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+
+        claimed = ReportRenderJob.claim_next(worker="w1")
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, ReportRenderJob.Status.RUNNING)
+        self.assertIsNone(ReportRenderJob.claim_next(worker="w2"))
+
+    def test_requeue_stale_running_job(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        ReportRenderJob.objects.filter(pk=job.pk).update(
+            status=ReportRenderJob.Status.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(ReportRenderJob.requeue_stale(older_than=timedelta(minutes=10)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportRenderJob.Status.QUEUED)
+
+    def test_running_job_with_recent_heartbeat_is_not_requeued(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        ReportRenderJob.claim_next(worker="w1")
+        ReportRenderJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(ReportRenderJob.requeue_stale(older_than=timedelta(minutes=2)), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportRenderJob.Status.RUNNING)
+        self.assertEqual(job.attempts, 1)
+
+    def test_stale_job_fails_after_max_attempts(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        ReportRenderJob.objects.filter(pk=job.pk).update(
+            status=ReportRenderJob.Status.RUNNING,
+            attempts=3,
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(ReportRenderJob.requeue_stale(older_than=timedelta(minutes=2), max_attempts=3), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportRenderJob.Status.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_heartbeat_is_renewed_while_job_runs(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+
+        with patch.object(ReportRenderJob, "beat", return_value=True) as beat:
+            with job_heartbeat(job, interval=0.01):
+                time.sleep(0.1)
+
+        self.assertGreater(beat.call_count, 1)
+        beat.assert_called_with(job.pk)
+
+    def test_worker_renders_and_download_serves_pdf(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+
+        with patch(
+            "report_maker.views.report_pdf_generator.build_report_pdf",
+            return_value=b"%PDF-1.7 fake",
+        ) as build:
+            call_command("render_report_pdfs", "--once", stdout=StringIO())
+
+        build.assert_called_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportRenderJob.Status.DONE)
+
+        self.client.login(username="u1", password="pass123")
+        status = self.client.get(self._status_url(job)).json()
+        self.assertEqual(status["download_url"], self._download_url(job))
+
+        resp = self.client.get(self._download_url(job))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertEqual(b"".join(resp.streaming_content), b"%PDF-1.7 fake")
+
+    def test_worker_records_failure(self):
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+
+        with patch(
+            "report_maker.views.report_pdf_generator.build_report_pdf",
+            side_effect=RuntimeError("boom"),
+        ):
+            call_command("render_report_pdfs", "--once", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportRenderJob.Status.FAILED)
+        self.assertIn("boom", job.error)
+
+    def test_submit_for_closed_report_with_final_pdf_is_done(self):
+        self.report.close()
+        self.report.save()
+        self.report.store_final_pdf(b"%PDF final", "final.pdf")
+
+        self.client.login(username="u1", password="pass123")
+        data = self.client.post(self.submit_url).json()
+
+        self.assertEqual(data["status"], ReportRenderJob.Status.DONE)
+        job = ReportRenderJob.objects.get(pk=data["job_id"])
+        self.assertEqual(job.output.name, self.report.final_pdf.name)
+
+    # ─────────────────────────────────────────────
+    # Retenção
+    # ─────────────────────────────────────────────
+    def _finished_job(self, hours_ago: float) -> ReportRenderJob:
+        job = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        ReportRenderJob.objects.filter(pk=job.pk).update(status=ReportRenderJob.Status.RUNNING)
+        job.refresh_from_db()
+        job.mark_done(b"%PDF", "laudo.pdf")
+        ReportRenderJob.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(hours=hours_ago))
+        return job
+
+    def test_purge_removes_old_finished_jobs_and_files(self):
+        old = self._finished_job(hours_ago=48)
+        recent = self._finished_job(hours_ago=1)
+        pending = ReportRenderJob.objects.create(report_case=self.report, requested_by=self.user)
+        storage = old.output.storage
+
+        call_command("render_report_pdfs", "--purge", "--retention-hours", "24", stdout=StringIO())
+
+        self.assertEqual(
+            set(ReportRenderJob.objects.values_list("pk", flat=True)), {recent.pk, pending.pk}
+        )
+        self.assertFalse(storage.exists(old.output.name))
+        self.assertTrue(storage.exists(recent.output.name))
+
+    def test_purge_keeps_final_pdf_of_closed_report(self):
+        self.report.close()
+        self.report.save()
+        self.report.store_final_pdf(b"%PDF final", "final.pdf")
+        job = enqueue_report_pdf(self.report, self.user)
+        ReportRenderJob.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(hours=48))
+
+        self.assertEqual(ReportRenderJob.purge_finished(older_than=timedelta(hours=24)), 1)
+        self.assertTrue(self.report.final_pdf.storage.exists(self.report.final_pdf.name))
+
+    # ─────────────────────────────────────────────
+    # Single-flight
+    # ─────────────────────────────────────────────
+    def test_submit_from_other_request_shares_same_version(self):
+        first = enqueue_report_pdf(self.report, self.user)
+        second = enqueue_report_pdf(ReportCase.objects.get(pk=self.report.pk), self.user)
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertTrue(first.content_version)
+
+    def test_new_version_supersedes_pending_job(self):
+        self.client.login(username="u1", password="pass123")
+        old = self.client.post(self.submit_url).json()
+
+        self.report.requesting_authority = "Outra autoridade"
+        self.report.save()
+        new = self.client.post(self.submit_url).json()
+
+        self.assertNotEqual(old["job_id"], new["job_id"])
+        stale = ReportRenderJob.objects.get(pk=old["job_id"])
+        self.assertEqual(stale.status, ReportRenderJob.Status.SUPERSEDED)
+        self.assertEqual(str(stale.superseded_by_id), new["job_id"])
+
+        # quem acompanhava o job antigo passa a acompanhar o novo
+        status = self.client.get(self._status_url(stale)).json()
+        self.assertEqual(status["job_id"], new["job_id"])
+
+    def test_draft_and_final_jobs_do_not_supersede_each_other(self):
+        final = enqueue_report_pdf(self.report, self.user)
+        draft = enqueue_report_pdf(self.report, self.user, draft=True)
+
+        self.assertNotEqual(final.content_version, draft.content_version)
+        self.assertTrue(draft.draft)
+        final.refresh_from_db()
+        self.assertEqual(final.status, ReportRenderJob.Status.QUEUED)
+        self.assertEqual(enqueue_report_pdf(self.report, self.user, draft=True).pk, draft.pk)
+
+    def test_superseded_running_job_discards_output(self):
+        job = enqueue_report_pdf(self.report, self.user)
+        job = ReportRenderJob.claim_next(worker="w1")
+
+        self.report.requesting_authority = "Outra autoridade"
+        self.report.save()
+        newer = enqueue_report_pdf(self.report, self.user)
+
+        self.assertFalse(job.mark_done(b"%PDF old", "old.pdf"))
+        self.assertEqual(job.status, ReportRenderJob.Status.SUPERSEDED)
+        self.assertFalse(job.output)
+        self.assertEqual(job.resolve().pk, newer.pk)
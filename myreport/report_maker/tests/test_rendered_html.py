@@ -0,0 +1,99 @@
+# report_maker/tests/test_rendered_html.py
+from __future__ import annotations
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from institutions.models import Institution, InstitutionCity, Nucleus, Team
+from report_maker.models import CadaverExamObject, ExamObject, ReportCase, ReportTextBlock
+from report_maker.templatetags import markdown_extras
+from report_maker.utils.rendered_html import chunk_key, markdown_chunks
+from report_maker.views.report_outline import build_report_outline
+
+UserModel = get_user_model()
+
+
+class RenderOnWriteTests(TestCase):
+    """
+    Render-on-write: o HTML dos textos é gerado na gravação e reaproveitado
+    pela outline (showpage/PDF) sem passar pelo render_markdown.
+    """
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(username="u1", password="pass123")
+        inst = Institution.objects.create(
+            acronym="SPTC",
+            name="Superintendência da Polícia Técnico-Científica",
+            kind=Institution.Kind.SCIENTIFIC_POLICE,
+            is_active=True,
+        )
+        city = InstitutionCity.objects.create(institution=inst, name="Campinas", state="SP")
+        nucleus = Nucleus.objects.create(institution=inst, name="Núcleo Campinas", city=city)
+        team = Team.objects.create(nucleus=nucleus, name="Equipe 01", description="")
+
+        self.report = ReportCase(
+            author=self.user,
+            report_number="123.123/2026",
+            requesting_authority="Autoridade Requisitante (teste)",
+            institution=inst,
+            nucleus=nucleus,
+            team=team,
+        )
+        self.report.save()
+
+    def test_markdown_chunks_follow_h2_split(self):
+        text = "Intro\n\n## Parte A\nTexto A\n\n## Parte B\nTexto B"
+        self.assertEqual(markdown_chunks(text, "md"), ["Intro", "Texto A", "Texto B"])
+        self.assertEqual(markdown_chunks("simples", "text"), ["simples"])
+
+    def test_text_block_stores_html_per_chunk(self):
+        tb = ReportTextBlock.objects.create(
+            report_case=self.report,
+            placement=ReportTextBlock.Placement.HISTORIC,
+            body="**a**\n\n## Detalhe\n*b*",
+        )
+
+        self.assertIn("<strong>a</strong>", tb.rendered_html[chunk_key("**a**")])
+        self.assertIn("<em>b</em>", tb.rendered_html[chunk_key("*b*")])
+        self.assertTrue(tb.rendered_source_hash)
+
+        # mesma fonte -> não renderiza de novo
+        with patch.object(markdown_extras, "_render_markdown_uncached") as render:
+            tb.save()
+        render.assert_not_called()
+
+    def test_exam_object_fields_rendered_and_used_by_outline(self):
+        obj = CadaverExamObject.objects.create(
+            report_case=self.report,
+            title="Cadáver 1",
+            description="Corpo em **decúbito** dorsal",
+            injuries="Sem lesões aparentes",
+        )
+        self.assertIn(chunk_key("Sem lesões aparentes"), obj.rendered_html)
+
+        outline, _next = build_report_outline(
+            report=self.report,
+            exam_objects_qs=ExamObject.objects.filter(report_case=self.report),
+            text_blocks_qs=self.report.text_blocks.all(),
+        )
+
+        sections = outline[0].objects[0].sections
+        self.assertTrue(all(s.html for s in sections))
+        self.assertIn("<strong>decúbito</strong>", sections[0].html)
+
+    def test_backfill_command_fills_missing_rows(self):
+        tb = ReportTextBlock.objects.create(
+            report_case=self.report,
+            placement=ReportTextBlock.Placement.CONCLUSION,
+            body="Conclusão **final**",
+        )
+        ReportTextBlock.objects.filter(pk=tb.pk).update(rendered_html={}, rendered_source_hash="")
+
+        call_command("backfill_rendered_html", stdout=StringIO())
+
+        tb.refresh_from_db()
+        self.assertIn("<strong>final</strong>", tb.rendered_html[chunk_key("Conclusão **final**")])
@@ -0,0 +1,185 @@
+# report_maker/tests/test_report_document.py
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from institutions.models import Institution, InstitutionCity, Nucleus, Team
+from report_maker.models import (
+    CadaverExamObject,
+    ExamObject,
+    GenericExamObject,
+    ReportCase,
+    ReportTextBlock,
+    VehicleInspectionExamObject,
+)
+from report_maker.models.exam_base import downcast_exam_objects
+from report_maker.models.images import ObjectImage
+from report_maker.views.report_document import ReportDocumentAssembler
+
+UserModel = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="test_report_document_")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReportDocumentAssemblerTests(TestCase):
+    """
+    O documento do laudo é carregado num número fixo de consultas,
+    independente da quantidade de objetos, imagens e blocos.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = UserModel.objects.create_user(username="u1", password="pass123")
+        inst = Institution.objects.create(
+            acronym="SPTC",
+            name="Superintendência da Polícia Técnico-Científica",
+            kind=Institution.Kind.SCIENTIFIC_POLICE,
+            is_active=True,
+        )
+        city = InstitutionCity.objects.create(institution=inst, name="Campinas", state="SP")
+        nucleus = Nucleus.objects.create(institution=inst, name="Núcleo Campinas", city=city)
+        team = Team.objects.create(nucleus=nucleus, name="Equipe 01", description="")
+
+        self.report = ReportCase(
+            author=self.user,
+            report_number="123.123/2026",
+            requesting_authority="Autoridade Requisitante (teste)",
+            institution=inst,
+            nucleus=nucleus,
+            team=team,
+        )
+        self.report.save()
+        self.client.login(username="u1", password="pass123")
+
+    def _image_file(self) -> SimpleUploadedFile:
+        buf = io.BytesIO()
+        Image.new("RGB", (10, 10)).save(buf, format="PNG")
+        return SimpleUploadedFile("teste.png", buf.getvalue(), content_type="image/png")
+
+    def _add_image(self, obj, index: int) -> ObjectImage:
+        return ObjectImage.objects.create(
+            content_object=obj,
+            image=self._image_file(),
+            index=index,
+            original_width=10,
+            original_height=10,
+        )
+
+    def _populate(self, n: int) -> None:
+        ReportTextBlock.objects.update_or_create(
+            report_case=self.report,
+            placement=ReportTextBlock.Placement.HISTORIC,
+            defaults={"body": f"Histórico {n}"},
+        )
+        for model, extra in (
+            (GenericExamObject, {}),
+            (CadaverExamObject, {}),
+            (VehicleInspectionExamObject, {}),
+        ):
+            for i in range(n):
+                obj = model.objects.create(report_case=self.report, title=f"{model.__name__} {n}-{i}", **extra)
+                self._add_image(obj, 1)
+                self._add_image(obj, 2)
+
+    def _load_report(self) -> ReportCase:
+        return ReportCase.objects.select_related("author", "institution", "nucleus__city", "team").get(pk=self.report.pk)
+
+    def test_query_count_does_not_grow_with_document(self):
+        self._populate(1)
+        report = self._load_report()
+        ContentType.objects.clear_cache()
+
+        # blocos, objetos base, 1 por classe concreta (3), content types e imagens
+        with self.assertNumQueries(7):
+            document = ReportDocumentAssembler(report).assemble()
+
+        self.assertEqual(len(document.exam_objects), 3)
+
+        self._populate(4)
+        report = self._load_report()
+        ContentType.objects.clear_cache()
+
+        with self.assertNumQueries(7):
+            document = ReportDocumentAssembler(report).assemble()
+
+        self.assertEqual(len(document.exam_objects), 15)
+        self.assertEqual(sum(len(v) for v in document.images_by_key.values()), 30)
+
+    def test_document_structure(self):
+        self._populate(1)
+        document = ReportDocumentAssembler(self._load_report()).assemble()
+
+        cadaver = next(o for o in document.concrete_objects if isinstance(o, CadaverExamObject))
+        self.assertEqual([img.index for img in document.images_for(cadaver)], [1, 2])
+
+        historic = document.text_blocks_by_placement[ReportTextBlock.Placement.HISTORIC]
+        self.assertEqual([tb.body for tb in historic], ["Histórico 1"])
+        self.assertEqual(document.text_blocks_by_placement[ReportTextBlock.Placement.CONCLUSION], [])
+
+        figures = [it.figure_label for g in document.outline_ui for o in g.objects for it in o.images]
+        self.assertEqual(figures, [f"Figura {i}" for i in range(1, 7)])
+
+    def test_views_query_count_is_constant(self):
+        self._populate(1)
+        urls = [
+            reverse("report_maker:reportcase_detail", kwargs={"pk": self.report.pk}),
+            reverse("report_maker:reportcase_showpage", kwargs={"pk": self.report.pk}),
+        ]
+
+        def count(url) -> int:
+            self.client.get(url)  # aquece o cache de renderização (markdown dos blocos iniciais)
+            ContentType.objects.clear_cache()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        small = [count(url) for url in urls]
+        self._populate(4)
+        large = [count(url) for url in urls]
+
+        self.assertEqual(small, large)
+
+
+    def test_downcast_one_query_per_concrete_type_preserving_order(self):
+        self._populate(2)
+        qs = ExamObject.objects.filter(report_case=self.report).order_by("order")
+        expected = [(o.pk, o.concrete_model) for o in qs]
+
+        # objetos base + 3 classes concretas
+        with self.assertNumQueries(4):
+            concrete = qs.all().downcast()
+
+        self.assertEqual([(o.pk, o._meta.model_name) for o in concrete], expected)
+        self.assertEqual(
+            {o.concrete_model for o in qs},
+            {"genericexamobject", "cadaverexamobject", "vehicleinspectionexamobject"},
+        )
+
+    def test_downcast_caches_child_on_base_and_handles_legacy_rows(self):
+        cadaver = CadaverExamObject.objects.create(report_case=self.report, title="Cadáver")
+        legacy = GenericExamObject.objects.create(report_case=self.report, title="Antigo")
+        ExamObject.objects.filter(pk=legacy.pk).update(concrete_model="")  # registro anterior ao campo
+
+        base_objects = list(ExamObject.objects.filter(report_case=self.report).order_by("order"))
+        concrete = downcast_exam_objects(base_objects)
+
+        self.assertEqual([type(o) for o in concrete], [CadaverExamObject, GenericExamObject])
+        with self.assertNumQueries(0):
+            self.assertEqual(base_objects[0].concrete, cadaver)
@@ -0,0 +1,83 @@
+# report_maker/tests/test_sequence_counter.py
+from __future__ import annotations
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from report_maker.models import ExamObject, ObjectImage, ReportTextBlock, SequenceCounter
+from report_maker.tests.test_storage_cleanup import make_location_object, make_reportcase, make_user
+
+
+class SequenceCounterTests(TestCase):
+    """
+    Posições (índice das figuras, ordem dos objetos, posição dos textos)
+    distribuídas pelo contador por pai, sem MAX() a cada inserção.
+    """
+
+    def setUp(self):
+        self.report = make_reportcase(author=make_user(i=1), i=1)
+        self.obj = make_location_object(report=self.report, i=1)
+
+    def _add_image(self, **kwargs) -> ObjectImage:
+        return ObjectImage.objects.create(
+            content_object=self.obj,
+            image="reports/teste/foto.png",
+            original_width=1,
+            original_height=1,
+            **kwargs,
+        )
+
+    def test_allocates_ranges_and_seeds_from_existing_values(self):
+        self.assertEqual([self._add_image().index for _ in range(3)], [1, 2, 3])
+
+        # contador perdido: recriado a partir do maior índice existente
+        SequenceCounter.objects.filter(scope=SequenceCounter.OBJECT_IMAGE_INDEX).delete()
+        self.assertEqual(ObjectImage.allocate_indexes(self.obj.pk, count=5), 4)
+        self.assertEqual(ObjectImage.allocate_indexes(self.obj.pk), 9)
+
+    def test_insert_does_not_aggregate_existing_rows(self):
+        self._add_image()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._add_image()
+        sql = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        self.assertFalse([q for q in sql if "MAX(" in q.upper()])
+
+    def test_explicit_index_collision_resyncs_counter(self):
+        self._add_image()
+        self._add_image(index=2)
+
+        self.assertEqual(self._add_image().index, 3)
+
+    def test_deleting_last_image_returns_its_index(self):
+        _first, second, _third = (self._add_image() for _ in range(3))
+
+        second.delete()
+        self.assertEqual(self._add_image().index, 4)
+
+        ObjectImage.objects.get(index=4).delete()
+        self.assertEqual(self._add_image().index, 4)
+
+    def test_exam_object_order_and_text_position_share_the_counter(self):
+        second = make_location_object(report=self.report, i=2)
+        self.assertEqual((self.obj.order, second.order), (1, 2))
+
+        blocks = [
+            ReportTextBlock.objects.create(
+                report_case=self.report,
+                placement=ReportTextBlock.Placement.OBJECT_GROUP_INTRO,
+                group_key=f"GRUPO_{i}",
+                body="texto",
+            )
+            for i in range(2)
+        ]
+        self.assertEqual([b.position for b in blocks], [1, 2])
+
+        scopes = set(SequenceCounter.objects.filter(parent_id=self.report.pk).values_list("scope", flat=True))
+        self.assertEqual(scopes, {SequenceCounter.EXAM_OBJECT_ORDER, SequenceCounter.TEXT_BLOCK_POSITION})
+
+        report_pk = self.report.pk
+        self.report.delete()
+        self.assertFalse(SequenceCounter.objects.filter(parent_id=report_pk).exists())
+        self.assertFalse(ExamObject.objects.exists())
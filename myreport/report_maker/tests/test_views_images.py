@@ -9,7 +9,9 @@ from datetime import timedelta
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -211,3 +213,55 @@ class ObjectImageViewsTests(TestCase):
         url = reverse("report_maker:images_reorder")
         resp = self.client.post(url, data=json.dumps({"items": []}), content_type="application/json")
         self.assertEqual(resp.status_code, 403)
+
+    def test_images_reorder_applies_order_in_constant_statements(self):
+        self.login(self.user)
+        images = [
+            ObjectImage.objects.create(
+                content_object=self.exam_object,
+                image=f"reports/teste/foto{i}.png",
+                original_width=1,
+                original_height=1,
+            )
+            for i in range(6)
+        ]
+        ordered = [str(img.pk) for img in reversed(images)]
+
+        url = reverse("report_maker:images_reorder")
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(url, data=json.dumps({"ordered_ids": ordered}), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+
+        statements = [
+            q["sql"].split()[0]
+            for q in ctx.captured_queries
+            if "report_maker_objectimage" in q["sql"] and "SAVEPOINT" not in q["sql"]
+        ]
+        # validação + trava, bump e ordem final
+        self.assertEqual(statements, ["SELECT", "UPDATE", "UPDATE"])
+
+        indexes = dict(ObjectImage.objects.values_list("pk", "index"))
+        self.assertEqual([indexes[img.pk] for img in images], [6, 5, 4, 3, 2, 1])
+
+    def test_images_reorder_rejects_incomplete_list_and_locked_report(self):
+        self.login(self.user)
+        images = [
+            ObjectImage.objects.create(
+                content_object=self.exam_object,
+                image=f"reports/teste/foto{i}.png",
+                original_width=1,
+                original_height=1,
+            )
+            for i in range(3)
+        ]
+        url = reverse("report_maker:images_reorder")
+
+        resp = self.client.post(
+            url, data=json.dumps({"ordered_ids": [str(images[0].pk)]}), content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 400)
+
+        self._lock_report()
+        ordered = [str(img.pk) for img in images]
+        resp = self.client.post(url, data=json.dumps({"ordered_ids": ordered}), content_type="application/json")
+        self.assertEqual(resp.status_code, 403)
@@ -214,7 +214,8 @@ class ReportCaseViewsTests(TestCase):
     # ─────────────────────────────────────────────
     def test_report_pdf_author_ok_if_route_exists(self):
         """
-        Smoke test: se a rota existir, deve responder 200/302.
+        Smoke test: se a rota existir, deve responder 200/302 (ou 202: PDF
+        enfileirado, ainda em geração).
 
         Se não existir no seu projeto, comente este teste ou ajuste o name da URL.
         """
@@ -226,7 +227,7 @@ class ReportCaseViewsTests(TestCase):
             self.skipTest("Rota de PDF não configurada (report_maker:report_pdf).")
 
         resp = self.client.get(url)
-        self.assertIn(resp.status_code, (200, 302, 303))
+        self.assertIn(resp.status_code, (200, 202, 302, 303))
 
     def test_report_pdf_non_author_404_if_route_exists(self):
         self.login(self.other)
@@ -16,7 +16,7 @@ from institutions.models import (
     Nucleus,
     Team,
 )
-from report_maker.models import ReportCase
+from report_maker.models import ReportCase, ReportRenderJob
 from report_maker.models.report_text_block import ReportTextBlock
 
 UserModel = get_user_model()
@@ -157,8 +157,9 @@ class ReportMakerViewsSmokeTests(TestCase):
 
         self.login(self.user)
         resp2 = self.client.get(url)
-        self.assertEqual(resp2.status_code, 200)
-        self.assertEqual(resp2["Content-Type"], "application/pdf")
+        # PDF enfileirado: página de acompanhamento até o worker concluir
+        self.assertEqual(resp2.status_code, 202)
+        self.assertTrue(ReportRenderJob.objects.filter(report_case=self.report).exists())
 
     # ─────────────────────────────────────────────
     # Close (conclusão)
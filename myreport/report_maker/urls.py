@@ -17,6 +17,11 @@ from report_maker.views.report_case_close import ReportCaseCloseView
 from report_maker.views.report_case_preview import ReportCasePreviewView
 from report_maker.views.report_case_showpage import ReportCaseShowPageView
 from report_maker.views.report_pdf_generator import reportPDFGenerator
+from report_maker.views.report_render_jobs import (
+    report_pdf_job_submit,
+    report_pdf_job_status,
+    report_pdf_job_download,
+)
 
 from report_maker.views.exam_object_dashboard import ExamObjectDashboardView
 from report_maker.views.exam_objects_reorder import exam_objects_reorder
@@ -48,9 +53,11 @@ from report_maker.views.vehicle_inspection_views import (
 )
 
 from report_maker.views.images import (
+    ObjectImageBulkUploadView,
     ObjectImageCreateView,
     ObjectImageUpdateView,
     ObjectImageDeleteView,
+    image_status,
     images_reorder,
 )
 
@@ -89,6 +96,19 @@ urlpatterns = [
     # PDF do laudo (artefato DERIVADO; pode ser gerado a qualquer momento)
     path("reports/<uuid:pk>/pdf/", reportPDFGenerator, name="report_pdf"),
 
+    # PDF em segundo plano (fila ReportRenderJob + worker render_report_pdfs)
+    path("reports/<uuid:pk>/pdf/jobs/", report_pdf_job_submit, name="report_pdf_job_submit"),
+    path(
+        "reports/<uuid:pk>/pdf/jobs/<uuid:job_id>/",
+        report_pdf_job_status,
+        name="report_pdf_job_status",
+    ),
+    path(
+        "reports/<uuid:pk>/pdf/jobs/<uuid:job_id>/download/",
+        report_pdf_job_download,
+        name="report_pdf_job_download",
+    ),
+
     # Página de ajuda para uso de markdown
     path("help/markdown/", MarkdownHelpView.as_view(), name="markdown_help"),
     path("help/markdown/preview/", markdown_preview_view, name="markdown_preview"),
@@ -262,6 +282,11 @@ urlpatterns = [
         ObjectImageCreateView.as_view(),
         name="image_add",
     ),
+    path(
+        "images/<str:app_label>/<str:model>/<uuid:object_id>/bulk/",
+        ObjectImageBulkUploadView.as_view(),
+        name="image_bulk_upload",
+    ),
     path(
         "images/<uuid:pk>/edit/",
         ObjectImageUpdateView.as_view(),
@@ -272,6 +297,11 @@ urlpatterns = [
         ObjectImageDeleteView.as_view(),
         name="image_delete",
     ),
+    path(
+        "images/<uuid:pk>/status/",
+        image_status,
+        name="image_status",
+    ),
 ]
 
 urlpatterns += [
@@ -1,10 +1,8 @@
 # report_maker/utils/google_maps.py
 from __future__ import annotations
 
-import io
 import re
 import urllib.parse
-import qrcode
 
 
 class GoogleMapsLocationMixin:
@@ -43,7 +41,6 @@ class GoogleMapsLocationMixin:
             "lat": lat,
             "lng": lng,
             "raw_query": query,
-            "qrcode_png": self._make_qrcode(url),
         }
 
     def _build_from_query(self, query: str) -> dict:
@@ -53,17 +50,10 @@ class GoogleMapsLocationMixin:
             "lat": None,
             "lng": None,
             "raw_query": query,
-            "qrcode_png": self._make_qrcode(url),
         }
 
     # ───────── helpers ─────────
 
-    def _make_qrcode(self, url: str) -> bytes:
-        qr = qrcode.make(url)
-        buf = io.BytesIO()
-        qr.save(buf, format="PNG")
-        return buf.getvalue()
-
     def _extract_latlng_from_url(self, url: str):
         m = re.search(r"@(-?\d+\.\d+),(-?\d+\.\d+)", url)
         if m:
@@ -0,0 +1,251 @@
+# report_maker/utils/image_blobs.py
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from PIL import Image
+
+from report_maker.models import ImageBlob, ObjectImage
+
+logger = logging.getLogger(__name__)
+
+# Armazenamento endereçado pelo conteúdo:
+#   blobs/<aa>/<bb>/<sha256>.<ext>
+BLOBS_DIR = "blobs"
+HASH_CHUNK_SIZE = 64 * 1024
+
+FORMAT_EXTENSIONS = {
+    "JPEG": ".jpg",
+    "PNG": ".png",
+    "WEBP": ".webp",
+    "GIF": ".gif",
+    "TIFF": ".tif",
+    "BMP": ".bmp",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class StoredBlob:
+    """
+    Conteúdo já gravado no armazenamento de blobs (ainda sem referência no banco).
+
+    `source` guarda o conteúdo lido, para regravar o arquivo se ele sumir
+    antes da referência (ver acquire_blobs).
+    """
+
+    sha256: str
+    name: str
+    size: int
+    source: Optional[File] = field(default=None, compare=False, repr=False)
+
+
+def _storage():
+    return ObjectImage._meta.get_field("image").storage
+
+
+def blob_name(sha256: str, ext: str) -> str:
+    return f"{BLOBS_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def content_hash(fh) -> tuple[str, int]:
+    """SHA-256 e tamanho lidos em blocos (sem carregar o arquivo inteiro); volta ao início."""
+    digest = hashlib.sha256()
+    size = 0
+    fh.seek(0)
+    for chunk in fh.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    fh.seek(0)
+    return digest.hexdigest(), size
+
+
+def _extension(fh) -> str:
+    # pelo formato real (cabeçalho): o nome depende só do conteúdo
+    try:
+        with Image.open(fh) as im:
+            fmt = im.format
+    except Exception:
+        fmt = None
+    finally:
+        fh.seek(0)
+    fallback = os.path.splitext(getattr(fh, "name", "") or "")[1].lower()
+    return FORMAT_EXTENSIONS.get(fmt, fallback)
+
+
+def store_blob(fh) -> StoredBlob:
+    """
+    Grava o conteúdo no armazenamento de blobs, se ainda não existir.
+
+    Conteúdo repetido (mesma foto em outro objeto/laudo) só é lido para o
+    hash, sem nova gravação. Não acessa o banco: pode rodar em threads.
+    """
+    if not isinstance(fh, File):
+        fh = File(fh)
+    sha256, size = content_hash(fh)
+    name = blob_name(sha256, _extension(fh))
+
+    stored = StoredBlob(sha256=sha256, name=name, size=size, source=fh)
+    _write_if_missing(stored)
+    return stored
+
+
+def _write_if_missing(stored: StoredBlob) -> None:
+    storage = _storage()
+    if storage.exists(stored.name):
+        return
+    stored.source.seek(0)
+    saved = storage.save(stored.name, stored.source)
+    if saved != stored.name:
+        # gravado por outro processo no intervalo
+        storage.delete(saved)
+
+
+def store_blob_data(data: bytes) -> StoredBlob:
+    return store_blob(ContentFile(data))
+
+
+def link_blob(img: ObjectImage, stored: StoredBlob) -> ObjectImage:
+    """
+    Aponta a imagem para o blob (sem salvar). A referência é contada no
+    save (signal pre_save de ObjectImage) ou em acquire_blobs (bulk_create).
+    """
+    img.image = stored.name
+    img.blob_id = stored.sha256
+    img._stored_blob = stored
+    return img
+
+
+def acquire_blobs(blobs: list[StoredBlob]) -> None:
+    """
+    Soma uma referência por item (repetições contam), criando os registros
+    que faltarem. Deve rodar na mesma transação que grava as ObjectImage.
+
+    Com as linhas já travadas, confere os arquivos e regrava os ausentes: o
+    upload pode ter visto o arquivo pouco antes de a última referência
+    anterior apagá-lo (delete_orphan_blob trava a mesma linha).
+    """
+    counts = Counter(b.sha256 for b in blobs)
+    if not counts:
+        return
+    by_sha = {b.sha256: b for b in blobs}
+
+    existing = set(ImageBlob.objects.select_for_update().filter(pk__in=counts).values_list("pk", flat=True))
+    missing = [
+        ImageBlob(sha256=sha, file=by_sha[sha].name, size=by_sha[sha].size)
+        for sha in counts
+        if sha not in existing
+    ]
+    if missing:
+        ImageBlob.objects.bulk_create(missing, ignore_conflicts=True)
+
+    ImageBlob.objects.filter(pk__in=counts).update(
+        ref_count=F("ref_count")
+        + Case(
+            *[When(pk=sha, then=Value(n)) for sha, n in counts.items()],
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+    for stored in by_sha.values():
+        if stored.source is not None:
+            _write_if_missing(stored)
+        elif not _storage().exists(stored.name):
+            logger.error("Blob %s sem arquivo e sem conteúdo para regravar.", stored.name)
+
+
+def release_blob(sha256: str) -> None:
+    """
+    Remove uma referência ao blob. Na última, zera a contagem e, após o
+    commit, apaga arquivo e registro (delete_orphan_blob). A contagem é
+    conferida com as ObjectImage restantes antes (nunca remove conteúdo
+    ainda referenciado).
+    """
+    with transaction.atomic():
+        blob = ImageBlob.objects.select_for_update().filter(pk=sha256).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            ImageBlob.objects.filter(pk=sha256).update(ref_count=F("ref_count") - 1)
+            return
+
+        remaining = ObjectImage.objects.filter(blob_id=sha256).count()
+        if remaining:
+            ImageBlob.objects.filter(pk=sha256).update(ref_count=remaining)
+            return
+
+        # o registro fica (sem referências) até o arquivo sair: é a linha
+        # que serializa a remoção com um novo upload do mesmo conteúdo
+        ImageBlob.objects.filter(pk=sha256).update(ref_count=0)
+        stored = StoredBlob(sha256=sha256, name=blob.file.name, size=blob.size)
+
+    transaction.on_commit(lambda: delete_orphan_blob(stored))
+
+
+def delete_orphan_blob(stored: StoredBlob) -> None:
+    """
+    Apaga o arquivo e o registro do blob se nada o referencia (última
+    referência liberada ou upload cuja inserção falhou).
+
+    Tudo sob a trava da linha (criada, sem referências, se ainda não
+    existir): um acquire_blobs concorrente espera e, achando o arquivo
+    apagado, regrava; se chegou antes, a contagem impede a remoção.
+    """
+    with transaction.atomic():
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(sha256=stored.sha256, file=stored.name, size=stored.size)],
+            ignore_conflicts=True,
+        )
+        blob = ImageBlob.objects.select_for_update().filter(pk=stored.sha256).first()
+        if blob is None or blob.ref_count or ObjectImage.objects.filter(blob_id=stored.sha256).exists():
+            return
+        try:
+            _storage().delete(stored.name)
+        except Exception:
+            logger.warning("Falha ao remover o blob %s.", stored.name, exc_info=True)
+        blob.delete()
+
+
+def swap_to_blob(img: ObjectImage, old_name: str, data: bytes, **updates) -> Optional[str]:
+    """
+    Troca o arquivo da imagem pelo blob de `data` com UPDATE condicional (o
+    registro ainda aponta para old_name) e libera o arquivo anterior.
+
+    - sucesso: devolve o novo nome;
+    - o registro mudou no intervalo (nova troca/exclusão): nada é alterado
+      e devolve None.
+
+    `updates` são gravados no mesmo UPDATE (ex.: dimensões).
+    """
+    stored = store_blob_data(data)
+    old_blob_id = img.blob_id
+
+    with transaction.atomic():
+        acquire_blobs([stored])
+        swapped = ObjectImage.objects.filter(pk=img.pk, image=old_name).update(
+            image=stored.name, blob_id=stored.sha256, **updates
+        )
+        if not swapped:
+            transaction.set_rollback(True)
+
+    if not swapped:
+        delete_orphan_blob(stored)
+        return None
+
+    if old_blob_id:
+        release_blob(old_blob_id)
+    else:
+        # imagem anterior à deduplicação: arquivo próprio
+        try:
+            _storage().delete(old_name)
+        except Exception:
+            logger.warning("Falha ao remover o arquivo %s.", old_name, exc_info=True)
+    return stored.name
@@ -0,0 +1,250 @@
+# report_maker/utils/image_derivatives.py
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import posixpath
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from common.image_processing import (
+    AXIS_SWAPPING_ORIENTATIONS,
+    decode_budget,
+    draft_for,
+    estimated_decode_bytes,
+    exif_orientation,
+    fit_within,
+    open_image,
+)
+from report_maker.utils.storage_cleanup import delete_storage_prefix
+
+logger = logging.getLogger(__name__)
+
+# Defaults (sobrescrevíveis em settings)
+DEFAULT_PRINT_DPI = 200
+DEFAULT_PRINT_QUALITY = 85
+
+# Derivados ficam ao lado do original, numa pasta por imagem:
+#   <pasta do original>/_derivatives/<image_id>/print/<largura>w-<hash>.jpg
+#   <pasta do original>/_derivatives/<image_id>/web/<tamanho>-<largura>w-<hash>.{webp,jpg}
+# (a remoção da pasta do objeto leva junto os derivados).
+DERIVATIVES_DIR = "_derivatives"
+
+# Versões para as telas (detalhe do laudo, showpage, formulários):
+# tamanho -> largura máxima em px.
+DEFAULT_WEB_WIDTHS = {"small": 320, "medium": 960}
+DEFAULT_WEB_QUALITY = 80
+
+CM_PER_INCH = 2.54
+
+
+def print_dpi() -> int:
+    return int(getattr(settings, "REPORT_PDF_IMAGE_DPI", DEFAULT_PRINT_DPI))
+
+
+def print_width_px(img, dpi: Optional[int] = None) -> int:
+    """Largura (px) da figura impressa: width_cm_dot convertida na resolução configurada."""
+    dpi = dpi or print_dpi()
+    width_cm = float(img.width_cm_dot)
+    return max(1, round(width_cm / CM_PER_INCH * dpi))
+
+
+def derivatives_prefix(img, image_name: Optional[str] = None) -> str:
+    """Pasta dos derivados da imagem (image_name: nome do original, se diferente do atual)."""
+    image_name = image_name or img.image.name
+    return f"{posixpath.dirname(image_name)}/{DERIVATIVES_DIR}/{img.pk}"
+
+
+def print_prefix(img, image_name: Optional[str] = None) -> str:
+    return f"{derivatives_prefix(img, image_name)}/print"
+
+
+def _source_hash(img) -> str:
+    return hashlib.sha256(img.image.name.encode("utf-8")).hexdigest()[:12]
+
+
+def print_derivative_name(img, width_px: int) -> str:
+    """
+    O nome inclui a largura e o hash do arquivo original: trocar a imagem ou
+    a largura de exibição gera outro derivado (os antigos são removidos pelos
+    signals de ObjectImage).
+    """
+    return f"{print_prefix(img)}/{width_px}w-{_source_hash(img)}.jpg"
+
+
+def _to_rgb(im: Image.Image) -> Image.Image:
+    """Achata transparência sobre fundo branco (JPEG não tem canal alfa)."""
+    if im.mode in ("RGBA", "LA", "P"):
+        im = im.convert("RGBA")
+        background = Image.new("RGB", im.size, (255, 255, 255))
+        background.paste(im, mask=im.getchannel("A"))
+        return background
+    if im.mode != "RGB":
+        return im.convert("RGB")
+    return im
+
+
+def _resized(im: Image.Image, width_px: int) -> Image.Image:
+    height_px = max(1, round(im.height * width_px / im.width))
+    return im.resize((width_px, height_px), Image.Resampling.LANCZOS)
+
+
+def _encode(im: Image.Image, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "WEBP":
+        im.save(buf, format="WEBP", quality=quality, method=4)
+    else:
+        im.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _save(storage, name: str, data: bytes) -> str:
+    saved = storage.save(name, ContentFile(data))
+    if saved != name:
+        # outro processo gerou o mesmo derivado no intervalo
+        storage.delete(saved)
+    return name
+
+
+@contextmanager
+def _decoded(source, max_width: int):
+    """
+    Original já orientado, decodificado perto de max_width (draft JPEG) e
+    dentro dos orçamentos de pixels/memória de common.image_processing.
+    """
+    im = open_image(source)
+    orientation = exif_orientation(im)
+    width, height = im.size
+    if orientation in AXIS_SWAPPING_ORIENTATIONS:
+        width, height = height, width
+    draft_for(im, fit_within(width, height, max_width=max_width), orientation)
+
+    with decode_budget().reserve(estimated_decode_bytes(im)), im:
+        yield ImageOps.exif_transpose(im)
+
+
+def _encode_jpeg(source, width_px: int) -> Optional[bytes]:
+    with _decoded(source, width_px) as im:
+        if im.width <= width_px:
+            return None
+
+        im = _to_rgb(_resized(im, width_px))
+        quality = int(getattr(settings, "REPORT_PDF_IMAGE_QUALITY", DEFAULT_PRINT_QUALITY))
+        return _encode(im, "JPEG", quality)
+
+
+def ensure_print_derivative(img, dpi: Optional[int] = None) -> Optional[str]:
+    """
+    Garante o JPEG da figura no tamanho exato de impressão e devolve o nome
+    no storage.
+
+    Retorna None quando o original já é menor ou igual à largura impressa
+    (não há ganho em reamostrar) ou quando o original não pode ser lido.
+    """
+    if not getattr(img, "image", None) or not img.image.name:
+        return None
+
+    storage = img.image.storage
+    width_px = print_width_px(img, dpi)
+    name = print_derivative_name(img, width_px)
+
+    if storage.exists(name):
+        return name
+
+    try:
+        with storage.open(img.image.name, "rb") as source:
+            data = _encode_jpeg(source, width_px)
+    except Exception:
+        logger.warning("Falha ao gerar o derivado de impressão da imagem %s.", img.pk, exc_info=True)
+        return None
+
+    if data is None:
+        return None
+
+    return _save(storage, name, data)
+
+
+def web_widths() -> dict[str, int]:
+    return dict(getattr(settings, "REPORT_IMAGE_WEB_WIDTHS", DEFAULT_WEB_WIDTHS))
+
+
+def build_web_renditions(img) -> list[dict]:
+    """
+    Gera as versões de tela da imagem (WebP + JPEG de fallback por tamanho)
+    e devolve a descrição gravada em ObjectImage.renditions:
+
+        [{"size": "small", "width": 320, "height": 213,
+          "webp": "<nome>", "jpeg": "<nome>"}, ...]
+
+    Nunca amplia: tamanhos maiores que o original saem na largura do
+    original (e larguras repetidas são descartadas).
+    """
+    storage = img.image.storage
+    prefix = f"{derivatives_prefix(img)}/web"
+    source_hash = _source_hash(img)
+    quality = int(getattr(settings, "REPORT_IMAGE_WEB_QUALITY", DEFAULT_WEB_QUALITY))
+
+    renditions: list[dict] = []
+    largest = max(int(w) for w in web_widths().values())
+    with storage.open(img.image.name, "rb") as source, _decoded(source, largest) as original:
+        original = _to_rgb(original)
+
+        for size, max_width in sorted(web_widths().items(), key=lambda item: item[1]):
+            width_px = min(int(max_width), original.width)
+            if renditions and renditions[-1]["width"] == width_px:
+                continue
+
+            im = _resized(original, width_px) if width_px < original.width else original
+            stem = f"{prefix}/{size}-{width_px}w-{source_hash}"
+            renditions.append(
+                {
+                    "size": size,
+                    "width": im.width,
+                    "height": im.height,
+                    "webp": _save(storage, f"{stem}.webp", _encode(im, "WEBP", quality)),
+                    "jpeg": _save(storage, f"{stem}.jpg", _encode(im, "JPEG", quality)),
+                }
+            )
+
+    return renditions
+
+
+def ensure_web_renditions(img, *, force: bool = False) -> list[dict]:
+    """
+    Gera (se preciso) e persiste as versões de tela da imagem.
+
+    Grava via update() para não disparar de novo os signals de save.
+    Falhas são registradas e a imagem segue sem versões (os templates usam
+    o original).
+    """
+    if not getattr(img, "image", None) or not img.image.name:
+        return []
+    if img.renditions and not force:
+        return img.renditions
+
+    try:
+        renditions = build_web_renditions(img)
+    except Exception:
+        logger.warning("Falha ao gerar as versões de tela da imagem %s.", img.pk, exc_info=True)
+        return []
+
+    type(img).objects.filter(pk=img.pk).update(renditions=renditions)
+    img.renditions = renditions
+    return renditions
+
+
+def rendition_names(renditions) -> list[str]:
+    """Nomes de arquivo citados em ObjectImage.renditions."""
+    return [r[key] for r in renditions or [] for key in ("webp", "jpeg") if r.get(key)]
+
+
+def invalidate_derivatives(img, storage=None) -> None:
+    """Remove todos os derivados de uma imagem."""
+    if not getattr(img, "image", None) or not img.image.name:
+        return
+    delete_storage_prefix(storage or img.image.storage, derivatives_prefix(img))
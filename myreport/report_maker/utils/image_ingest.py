@@ -0,0 +1,193 @@
+# report_maker/utils/image_ingest.py
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from common.image_processing import ImageTooLarge, normalize_image, open_image
+from report_maker.models import ObjectImage
+from report_maker.utils.image_blobs import acquire_blobs, delete_orphan_blob, link_blob, store_blob, swap_to_blob
+from report_maker.utils.image_derivatives import ensure_web_renditions, print_prefix
+from report_maker.utils.image_metadata import read_metadata
+from report_maker.utils.storage_cleanup import delete_storage_prefix
+
+logger = logging.getLogger(__name__)
+
+# Regra dos 14cm (14 * 114.2857 ≈ 1600px)
+DEFAULT_MAX_WIDTH = 1600
+DEFAULT_QUALITY = 85
+
+DEFAULT_BULK_WORKERS = 8
+
+
+def read_upload_header(img: ObjectImage, uploaded) -> ObjectImage:
+    """
+    Dimensões e metadados EXIF (captura, GPS, orientação, câmera) do upload,
+    numa única leitura do cabeçalho (sem decodificar os pixels).
+    Levanta ImageTooLarge acima do orçamento de pixels e exceção do Pillow
+    se o arquivo não for imagem.
+    """
+    try:
+        with open_image(uploaded) as im:
+            img.original_width, img.original_height = im.size
+            read_metadata(im).apply_to(img)
+    finally:
+        uploaded.seek(0)
+    return img
+
+
+def attach_upload(img: ObjectImage, uploaded) -> ObjectImage:
+    """
+    Lê dimensões e metadados (cabeçalho), grava o upload no armazenamento
+    de blobs (conteúdo repetido não é regravado) e aponta a imagem para
+    ele, sem salvar o registro.
+    """
+    read_upload_header(img, uploaded)
+    return link_blob(img, store_blob(uploaded))
+
+
+def process_object_image(img: ObjectImage) -> ObjectImage:
+    """
+    Processa uma imagem já reivindicada (status PROCESSING), fora do request:
+
+    1. normaliza o original (orientação EXIF, RGB, largura máxima, JPEG) e
+       troca o arquivo, se necessário;
+    2. gera as versões de tela (WebP + JPEG);
+    3. marca READY (ou FAILED, com log).
+
+    As dimensões gravadas acompanham a normalização, exceto quando já
+    tiverem sido ajustadas pelo usuário (width_override).
+    """
+    Status = ObjectImage.ProcessingStatus
+    old_name = img.image.name
+
+    try:
+        max_width = int(getattr(settings, "REPORT_IMAGE_MAX_WIDTH", DEFAULT_MAX_WIDTH))
+        quality = int(getattr(settings, "REPORT_IMAGE_QUALITY", DEFAULT_QUALITY))
+        with img.image.open("rb") as fh:
+            normalized = normalize_image(fh, max_width=max_width, quality=quality)
+
+        if normalized is not None:
+            updates = {"renditions": []}
+            if (img.original_width, img.original_height) == (normalized.source_width, normalized.source_height):
+                updates.update(original_width=normalized.width, original_height=normalized.height)
+
+            new_name = swap_to_blob(img, old_name, normalized.data, **updates)
+            if new_name is None:
+                # arquivo trocado/excluído durante o processamento: a nova
+                # versão (se houver) já está na fila
+                return img
+
+            # derivados de impressão gerados a partir do arquivo anterior
+            delete_storage_prefix(img.image.storage, print_prefix(img, old_name))
+            img.refresh_from_db(fields=["image", "blob", "original_width", "original_height", "renditions"])
+
+        renditions = ensure_web_renditions(img, force=True)
+    except Exception:
+        logger.exception("Falha ao processar a imagem %s.", img.pk)
+        renditions = []
+
+    if not renditions:
+        _finish(img, Status.FAILED)
+        return img
+
+    _finish(img, Status.READY)
+    return img
+
+
+def _finish(img: ObjectImage, status: str) -> None:
+    # condicional: uma nova troca de arquivo no intervalo volta a PENDING e
+    # não deve ser sobrescrita
+    ObjectImage.objects.filter(pk=img.pk, processing_status=ObjectImage.ProcessingStatus.PROCESSING).update(
+        processing_status=status
+    )
+    img.processing_status = status
+
+
+# =========================
+# Upload em lote
+# =========================
+@dataclass(frozen=True, slots=True)
+class BulkUploadError:
+    name: str
+    error: str
+
+
+def _allocate_and_insert(object_id, images: list[ObjectImage]) -> None:
+    """
+    Reserva índices contíguos no contador do objeto (uma alocação para o
+    lote todo) e insere tudo num único bulk_create. As referências aos blobs
+    entram na mesma transação (bulk_create não dispara os signals de save).
+    Índice gravado por fora do contador: o contador é avançado e o lote,
+    refeito uma vez.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                first = ObjectImage.allocate_indexes(object_id, count=len(images))
+                for offset, img in enumerate(images):
+                    img.index = first + offset
+                acquire_blobs([img._stored_blob for img in images])
+                ObjectImage.objects.bulk_create(images)
+                return
+        except IntegrityError:
+            if attempt:
+                raise
+            ObjectImage.resync_indexes(object_id)
+
+
+def bulk_create_object_images(target, files) -> tuple[list[ObjectImage], list[BulkUploadError]]:
+    """
+    Cria várias ObjectImage para o mesmo objeto numa única operação:
+
+    - leitura de dimensões, hash e gravação dos arquivos em paralelo
+      (thread pool); conteúdo já armazenado não é regravado;
+    - índices contíguos alocados de uma vez, na ordem dos arquivos enviados;
+    - um único INSERT (bulk_create), já na fila de processamento (PENDING).
+
+    Arquivos que não são imagem são recusados individualmente (errors); se
+    a inserção falhar, os arquivos gravados (sem outra referência) são
+    removidos.
+    """
+    files = list(files)
+    workers = int(getattr(settings, "REPORT_IMAGE_BULK_WORKERS", DEFAULT_BULK_WORKERS))
+
+    # instâncias montadas aqui (content_type/objeto em cache): as threads
+    # só fazem E/S (o Pillow, o hash e a gravação liberam o GIL) e nenhuma
+    # consulta ao banco
+    pending = [
+        ObjectImage(content_object=target, processing_status=ObjectImage.ProcessingStatus.PENDING)
+        for _ in files
+    ]
+
+    def _store(args):
+        img, uploaded = args
+        try:
+            return attach_upload(img, uploaded)
+        except ImageTooLarge as exc:
+            return BulkUploadError(name=uploaded.name, error=str(exc))
+        except Exception as exc:
+            logger.info("Upload em lote: arquivo recusado (%s): %s", uploaded.name, exc)
+            return BulkUploadError(name=uploaded.name, error="Arquivo de imagem inválido.")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files) or 1))) as pool:
+        # map preserva a ordem de envio (= ordem das figuras)
+        results = list(pool.map(_store, zip(pending, files)))
+
+    images = [r for r in results if isinstance(r, ObjectImage)]
+    errors = [r for r in results if isinstance(r, BulkUploadError)]
+    if not images:
+        return [], errors
+
+    try:
+        _allocate_and_insert(target.pk, images)
+    except Exception:
+        for img in images:
+            delete_orphan_blob(img._stored_blob)
+        raise
+
+    return images, errors
@@ -0,0 +1,123 @@
+# report_maker/utils/image_metadata.py
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.utils import timezone
+from PIL import ExifTags, Image
+
+from common.image_processing import exif_orientation
+
+logger = logging.getLogger(__name__)
+
+# Tags EXIF (IFD0, Exif IFD e GPS IFD)
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_DATETIME = 0x0132
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_OFFSET_TIME_ORIGINAL = 0x9011
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+
+EXIF_DATETIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+CAMERA_MAX_LENGTH = 64
+
+
+@dataclass(frozen=True, slots=True)
+class ImageMetadata:
+    """Metadados EXIF gravados em ObjectImage (mesmos nomes dos campos)."""
+
+    captured_at: Optional[datetime] = None
+    gps_latitude: Optional[float] = None
+    gps_longitude: Optional[float] = None
+    exif_orientation: int = 1
+    camera_make: str = ""
+    camera_model: str = ""
+
+    def apply_to(self, img) -> None:
+        for field, value in asdict(self).items():
+            setattr(img, field, value)
+        img.metadata_extracted = True
+
+
+FIELDS = tuple(ImageMetadata.__dataclass_fields__) + ("metadata_extracted",)
+
+
+def _text(value) -> str:
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "ignore")
+    return str(value or "").strip("\x00 ").strip()[:CAMERA_MAX_LENGTH]
+
+
+def _captured_at(exif: Image.Exif) -> Optional[datetime]:
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    raw = _text(exif_ifd.get(TAG_DATETIME_ORIGINAL) or exif.get(TAG_DATETIME))
+    try:
+        value = datetime.strptime(raw, EXIF_DATETIME_FORMAT)
+    except ValueError:
+        return None
+
+    # fuso da câmera (EXIF 2.31); sem ele, o horário é local (TIME_ZONE)
+    offset = _text(exif_ifd.get(TAG_OFFSET_TIME_ORIGINAL))
+    if len(offset) == 6 and offset[0] in "+-" and offset[3] == ":":
+        try:
+            delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+        except ValueError:
+            delta = None
+        if delta is not None:
+            return value.replace(tzinfo=dt_timezone(delta if offset[0] == "+" else -delta))
+    return timezone.make_aware(value, timezone.get_default_timezone())
+
+
+def _degrees(value, ref, limit: float) -> Optional[float]:
+    try:
+        d, m, s = (float(v) for v in value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    degrees = d + m / 60 + s / 3600
+    if _text(ref).upper() in ("S", "W"):
+        degrees = -degrees
+    if not -limit <= degrees <= limit:
+        return None
+    return round(degrees, 7)
+
+
+def read_metadata(im: Image.Image) -> ImageMetadata:
+    """Metadados de uma imagem aberta (só o cabeçalho é lido; nada é decodificado)."""
+    try:
+        exif = im.getexif()
+    except Exception:
+        return ImageMetadata()
+
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    latitude = _degrees(gps.get(GPS_LATITUDE), gps.get(GPS_LATITUDE_REF), 90)
+    longitude = _degrees(gps.get(GPS_LONGITUDE), gps.get(GPS_LONGITUDE_REF), 180)
+    if latitude is None or longitude is None:
+        latitude = longitude = None
+
+    orientation = exif_orientation(im)
+    return ImageMetadata(
+        captured_at=_captured_at(exif),
+        gps_latitude=latitude,
+        gps_longitude=longitude,
+        exif_orientation=orientation if 1 <= orientation <= 8 else 1,
+        camera_make=_text(exif.get(TAG_MAKE)),
+        camera_model=_text(exif.get(TAG_MODEL)),
+    )
+
+
+def extract_metadata(fh) -> ImageMetadata:
+    """Abre o arquivo (cabeçalho) e lê os metadados; volta ao início. Arquivo ilegível: metadados vazios."""
+    try:
+        with Image.open(fh) as im:
+            return read_metadata(im)
+    except Exception:
+        logger.info("Metadados EXIF ilegíveis.", exc_info=True)
+        return ImageMetadata()
+    finally:
+        fh.seek(0)
@@ -0,0 +1,47 @@
+// report_maker/utils/katex_daemon.js
+//
+// Processo KaTeX persistente: lê pedidos JSON (um por linha) no stdin e
+// responde um JSON por linha no stdout. Evita pagar a inicialização do
+// Node.js a cada equação (ver report_maker/utils/katex_worker.py).
+//
+// Pedido:   {"id": 1, "items": ["x^2", "\\frac{a}{b}"]}
+// Resposta: {"id": 1, "html": ["<span class=\"katex\">…", null]}
+//
+// Itens que falham retornam null (o lado Python aplica o fallback math-error).
+
+'use strict'
+
+const readline = require('readline')
+const katex = require('katex')
+
+const OPTIONS = { throwOnError: false, displayMode: false }
+
+function renderOne(tex) {
+  try {
+    return katex.renderToString(String(tex), OPTIONS)
+  } catch (err) {
+    return null
+  }
+}
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false })
+
+rl.on('line', function (line) {
+  if (!line.trim()) return
+
+  let request
+  try {
+    request = JSON.parse(line)
+  } catch (err) {
+    process.stdout.write(JSON.stringify({ id: null, error: 'invalid_json' }) + '\n')
+    return
+  }
+
+  const items = Array.isArray(request.items) ? request.items : []
+  const response = { id: request.id, html: items.map(renderOne) }
+  process.stdout.write(JSON.stringify(response) + '\n')
+})
+
+rl.on('close', function () {
+  process.exit(0)
+})
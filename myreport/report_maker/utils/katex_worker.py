@@ -0,0 +1,181 @@
+# report_maker/utils/katex_worker.py
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DAEMON_SCRIPT = Path(__file__).resolve().with_name("katex_daemon.js")
+
+# Tempo máximo de espera por uma resposta do daemon (um lote inteiro).
+DEFAULT_TIMEOUT_SECONDS = 20.0
+
+# Após uma falha, não tenta reiniciar o daemon antes deste intervalo
+# (evita disparar um processo por chamada se o Node/KaTeX estiver indisponível).
+RESTART_BACKOFF_SECONDS = 30.0
+
+
+class KatexWorker:
+    """
+    Cliente do processo KaTeX persistente (katex_daemon.js).
+
+    - Um único processo Node.js por processo Python, iniciado sob demanda.
+    - Protocolo JSON-lines via stdin/stdout; cada chamada envia um LOTE de
+      equações e recebe todas numa única ida e volta.
+    - Se o processo morrer ou não responder, é encerrado e reiniciado na
+      próxima chamada (respeitando RESTART_BACKOFF_SECONDS); os itens afetados
+      retornam None (fallback no chamador).
+    - Thread-safe: um lock serializa o acesso ao pipe.
+    """
+
+    def __init__(self, *, node_bin: str, script: Path, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.node_bin = node_bin
+        self.script = script
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: Optional[queue.Queue] = None
+        self._next_id = 0
+        self._failed_at: Optional[float] = None
+        self._pid: Optional[int] = None
+
+    # ---------------------------------------------------------------------
+    # Processo
+    # ---------------------------------------------------------------------
+    def _start(self) -> None:
+        self._proc = subprocess.Popen(
+            [self.node_bin, str(self.script)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=None,  # erros do Node vão para o log do servidor
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            cwd=str(settings.BASE_DIR),
+        )
+        self._pid = os.getpid()
+
+        # Leitura em thread dedicada: permite timeout portável (inclusive Windows).
+        lines: queue.Queue = queue.Queue()
+        stdout = self._proc.stdout
+
+        def _reader():
+            for line in stdout:
+                lines.put(line)
+            lines.put(None)  # EOF: processo encerrado
+
+        threading.Thread(target=_reader, name="katex-daemon-reader", daemon=True).start()
+        self._lines = lines
+
+    def _alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _stop(self) -> None:
+        proc, self._proc, self._lines = self._proc, None, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=5)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+    # ---------------------------------------------------------------------
+    # API
+    # ---------------------------------------------------------------------
+    def _roundtrip(self, items: list[str]) -> list[Optional[str]]:
+        if self._proc is not None and self._pid != os.getpid():
+            # processo filho (fork): o daemon pertence ao pai; inicia um próprio
+            self._proc, self._lines = None, None
+
+        if not self._alive():
+            self._stop()
+            self._start()
+
+        self._next_id += 1
+        request_id = self._next_id
+
+        self._proc.stdin.write(json.dumps({"id": request_id, "items": items}) + "\n")
+        self._proc.stdin.flush()
+
+        while True:
+            line = self._lines.get(timeout=self.timeout)
+            if line is None:
+                raise RuntimeError("Processo KaTeX encerrado durante a renderização.")
+
+            response = json.loads(line)
+            # respostas atrasadas de um lote anterior (após timeout) são descartadas
+            if response.get("id") == request_id:
+                break
+
+        html_list = response.get("html")
+        if not isinstance(html_list, list) or len(html_list) != len(items):
+            raise RuntimeError("Resposta inválida do processo KaTeX.")
+        return [h.strip() if isinstance(h, str) else None for h in html_list]
+
+    def render_many(self, items: list[str]) -> list[Optional[str]]:
+        """
+        Renderiza um lote de expressões TeX (inline) numa única ida e volta.
+
+        Retorna uma lista alinhada a `items`; None indica falha do item.
+        """
+        if not items:
+            return []
+
+        with self._lock:
+            if self._failed_at is not None and time.monotonic() - self._failed_at < RESTART_BACKOFF_SECONDS:
+                return [None] * len(items)
+
+            # uma nova tentativa cobre o caso do processo ter morrido entre chamadas
+            for attempt in (1, 2):
+                try:
+                    result = self._roundtrip(items)
+                    self._failed_at = None
+                    return result
+                except Exception:
+                    logger.warning("Falha no processo KaTeX (tentativa %s).", attempt, exc_info=True)
+                    self._stop()
+
+            self._failed_at = time.monotonic()
+
+        return [None] * len(items)
+
+
+_worker: Optional[KatexWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_katex_worker() -> KatexWorker:
+    """
+    Instância única (por processo) do cliente KaTeX.
+    """
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = KatexWorker(
+                    node_bin=str(getattr(settings, "KATEX_NODE_BIN", "node")),
+                    script=DAEMON_SCRIPT,
+                )
+                atexit.register(_worker.close)
+    return _worker
+
+
+def render_katex_many(items: list[str]) -> list[Optional[str]]:
+    return get_katex_worker().render_many(items)
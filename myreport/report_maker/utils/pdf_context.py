@@ -0,0 +1,142 @@
+# report_maker/utils/pdf_context.py
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from weasyprint import CSS
+from weasyprint.text.fonts import FontConfiguration
+
+PDF_STYLESHEET = "report_maker/css/report_pdf.css"
+# Acrescentada só no modo rascunho (marca d'água "RASCUNHO")
+PDF_DRAFT_STYLESHEET = "report_maker/css/report_pdf_draft.css"
+
+DEFAULT_ASSET_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# Arquivos maiores são sempre lidos do disco (não ocupam o cache)
+ASSET_MAX_FILE_BYTES = 2 * 1024 * 1024
+
+# Mídia repetida entre renderizações: emblemas da instituição e snapshots do
+# cabeçalho do laudo. Fotos ficam de fora (derivados de impressão, ver
+# make_print_url_fetcher).
+SHARED_MEDIA_RE = re.compile(r"^(institutions/emblems/|reports/[^/]+/header/)")
+
+
+@dataclass(frozen=True, slots=True)
+class _Asset:
+    mtime_ns: int
+    size: int
+    data: bytes
+    mime_type: str
+
+
+class PdfRendererContext:
+    """
+    Estado reaproveitado entre renderizações do mesmo processo:
+
+    - report_pdf.css já interpretado e a FontConfiguration compartilhada
+      (refeitos quando o CSS muda no disco). Ficam por thread: os objetos
+      do pango não são thread-safe;
+    - caminhos de estáticos resolvidos por finders.find;
+    - conteúdo de estáticos e emblemas em memória (LRU limitada em bytes),
+      validado pelo mtime e tamanho do arquivo a cada uso.
+    """
+
+    def __init__(self, *, max_bytes: int = DEFAULT_ASSET_CACHE_MAX_BYTES):
+        self.max_bytes = max(0, max_bytes)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._assets: OrderedDict[str, _Asset] = OrderedDict()
+        self._bytes = 0
+        self._static_paths: dict[str, Optional[str]] = {}
+
+    # ---------------------------------------------------------------------
+    # Folha de estilo e fontes
+    # ---------------------------------------------------------------------
+    def styles(self, *, draft: bool = False) -> tuple[FontConfiguration, list[CSS]]:
+        """
+        (font_config, stylesheets) do PDF, interpretados uma vez por thread.
+        draft=True acrescenta a folha do rascunho às mesmas folhas do final.
+        """
+        names = (PDF_STYLESHEET, PDF_DRAFT_STYLESHEET) if draft else (PDF_STYLESHEET,)
+        paths = []
+        for name in names:
+            css_path = self.find_static(name)
+            if not css_path:
+                raise FileNotFoundError(f"CSS do PDF não encontrado: {name}")
+            paths.append(css_path)
+
+        key = tuple((css_path, os.stat(css_path).st_mtime_ns) for css_path in paths)
+        variants = getattr(self._local, "styles", None)
+        if variants is None:
+            variants = self._local.styles = {}
+        cached = variants.get(draft)
+        if cached is None or cached[0] != key:
+            font_config = FontConfiguration()
+            cached = (key, font_config, [CSS(filename=css_path, font_config=font_config) for css_path in paths])
+            variants[draft] = cached
+        return cached[1], cached[2]
+
+    # ---------------------------------------------------------------------
+    # Estáticos e emblemas
+    # ---------------------------------------------------------------------
+    def find_static(self, rel: str) -> Optional[str]:
+        """finders.find memorizado; refeito se o arquivo encontrado sumir."""
+        found = self._static_paths.get(rel)
+        if found is None or not os.path.exists(found):
+            found = finders.find(rel)
+            self._static_paths[rel] = found
+        return found
+
+    def asset(self, file_path: Path | str, url: str) -> dict:
+        """Resposta de url_fetcher para o arquivo, servida da memória quando possível."""
+        key = str(file_path)
+        stat = os.stat(key)
+        mime_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+        with self._lock:
+            cached = self._assets.get(key)
+            if cached is not None and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+                self._assets.move_to_end(key)
+                return {"string": cached.data, "mime_type": cached.mime_type, "redirected_url": url}
+
+        if stat.st_size > min(ASSET_MAX_FILE_BYTES, self.max_bytes):
+            return {"file_obj": open(key, "rb"), "mime_type": mime_type, "redirected_url": url}
+
+        data = Path(key).read_bytes()
+        asset = _Asset(mtime_ns=stat.st_mtime_ns, size=len(data), data=data, mime_type=mime_type)
+        with self._lock:
+            previous = self._assets.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._assets[key] = asset
+            self._bytes += asset.size
+            while self._bytes > self.max_bytes and self._assets:
+                _, evicted = self._assets.popitem(last=False)
+                self._bytes -= evicted.size
+        return {"string": data, "mime_type": mime_type, "redirected_url": url}
+
+
+_context: Optional[PdfRendererContext] = None
+_context_lock = threading.Lock()
+
+
+def get_pdf_context() -> PdfRendererContext:
+    """
+    Instância única (por processo) do contexto de renderização.
+    """
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = PdfRendererContext(
+                    max_bytes=int(getattr(settings, "REPORT_PDF_ASSET_CACHE_MAX_BYTES", DEFAULT_ASSET_CACHE_MAX_BYTES)),
+                )
+    return _context
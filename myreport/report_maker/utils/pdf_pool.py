@@ -0,0 +1,365 @@
+# report_maker/utils/pdf_pool.py
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import traceback
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = 300.0
+# Espera pelo renderer pronto (spawn + django.setup + aquecimento), fora do timeout do laudo
+DEFAULT_STARTUP_TIMEOUT_SECONDS = 120.0
+DEFAULT_MEMORY_LIMIT_MB = 3072
+DEFAULT_WORKER_MAX_JOBS = 20
+DEFAULT_WORKER_MAX_RSS_MB = 1024
+
+# Espera pelo encerramento voluntário de um renderer antes do kill
+STOP_GRACE_SECONDS = 5.0
+
+# Aviso do renderer ao pai: setup e aquecimento concluídos
+READY = "ready"
+
+
+class PdfRenderError(RuntimeError):
+    """Falha da renderização no processo renderer (traceback do filho na mensagem)."""
+
+
+class PdfRenderTimeout(PdfRenderError):
+    """Renderização excedeu o tempo limite; o renderer foi encerrado."""
+
+
+class PdfRenderCancelled(PdfRenderError):
+    """Job substituído (ou finalizado) durante a renderização: trabalho abandonado entre diagramações."""
+
+
+def job_still_running(job_id):
+    """
+    Verificação entre diagramações (build_report_pdf(should_continue=...))
+    de um ReportRenderJob: renova o heartbeat e devolve False quando o job
+    já não está RUNNING (ex.: SUPERSEDED). None sem job.
+    """
+    if job_id is None:
+        return None
+    from report_maker.models import ReportRenderJob
+
+    return lambda: ReportRenderJob.beat(job_id)
+
+
+# ---------------------------------------------------------------------
+# Processo renderer (filho)
+# ---------------------------------------------------------------------
+def _current_rss() -> int:
+    """RSS atual em bytes (Linux); fora dele, o pico (ru_maxrss)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _limit_memory(limit_bytes: int) -> None:
+    if not limit_bytes:
+        return
+    try:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+    except (ImportError, ValueError, OSError):
+        logger.warning("RLIMIT_AS indisponível; renderer sem limite de memória.", exc_info=True)
+
+
+def _warm_up() -> None:
+    """
+    Carrega WeasyPrint, o template e o contexto de renderização do processo
+    (report_pdf.css interpretado e FontConfiguration, ver utils.pdf_context)
+    e diagrama um documento mínimo: o cache de fontes (fontconfig/pango)
+    fica pronto antes do primeiro laudo.
+    """
+    from django.template.loader import get_template
+    from weasyprint import HTML
+
+    from report_maker.utils.pdf_context import get_pdf_context
+    import report_maker.views.report_pdf_generator  # noqa: F401
+
+    get_template("report_maker/report_pdf.html")
+    font_config, stylesheets = get_pdf_context().styles()
+    HTML(string="<p>Aquecimento 0123456789 ÁÉÍÓÚÇ</p>").render(stylesheets=stylesheets, font_config=font_config)
+
+
+def _render(report_id, user_id, base_url: str, draft: bool = False, job_id=None) -> bytes:
+    from django.contrib.auth import get_user_model
+
+    from report_maker.models import ReportCase
+    from report_maker.views.report_pdf_generator import build_report_pdf
+
+    report = ReportCase.objects.select_related("author", "institution", "nucleus__city", "team").get(pk=report_id)
+    user = get_user_model().objects.get(pk=user_id) if user_id is not None else None
+    return build_report_pdf(
+        report, user=user, base_url=base_url, draft=draft, should_continue=job_still_running(job_id)
+    )
+
+
+def _worker_main(conn, memory_limit: int, max_jobs: int, max_rss: int) -> None:
+    """
+    Laço do renderer: avisa READY após o aquecimento; então recebe
+    (report_id, user_id, base_url, draft, job_id) e devolve
+    (ok, bytes|traceback, recycle), com ok=None para job cancelado.
+    Encerra após max_jobs ou quando o RSS passa de max_rss (a memória do
+    WeasyPrint não volta ao sistema).
+    """
+    import django
+    from django.db import close_old_connections
+
+    django.setup()
+    _limit_memory(memory_limit)
+    try:
+        _warm_up()
+    except Exception:
+        logger.warning("Falha no aquecimento do renderer de PDF.", exc_info=True)
+    try:
+        conn.send(READY)
+    except (OSError, ValueError):
+        return
+
+    jobs = 0
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        try:
+            payload, ok = _render(*message), True
+        except PdfRenderCancelled as exc:
+            payload, ok = str(exc), None
+        except MemoryError:
+            payload, ok = "Memória do renderer esgotada (REPORT_PDF_MEMORY_LIMIT_MB).", False
+        except Exception:
+            payload, ok = traceback.format_exc(), False
+        finally:
+            close_old_connections()
+
+        jobs += 1
+        recycle = ok is False or jobs >= max_jobs or _current_rss() >= max_rss
+        try:
+            conn.send((ok, payload, recycle))
+        except (OSError, ValueError):
+            break
+        if recycle:
+            break
+    conn.close()
+
+
+# ---------------------------------------------------------------------
+# Pool (processo pai)
+# ---------------------------------------------------------------------
+class _Renderer:
+    def __init__(self, ctx, *, memory_limit: int, max_jobs: int, max_rss: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, memory_limit, max_jobs, max_rss),
+            name="pdf-renderer",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Aguarda o aviso READY (aquecimento concluído); False se não veio no prazo ou o processo morreu."""
+        if not self.ready:
+            try:
+                if self.conn.poll(timeout) and self.conn.recv() == READY:
+                    self.ready = True
+            except (EOFError, OSError):
+                pass
+        return self.ready
+
+    def stop(self, *, graceful: bool = True) -> None:
+        try:
+            if graceful and self.alive():
+                self.conn.send(None)
+                self.process.join(STOP_GRACE_SECONDS)
+        except (OSError, ValueError):
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(STOP_GRACE_SECONDS)
+        self.conn.close()
+
+
+class PdfRenderPool:
+    """
+    Pool de processos renderer de longa duração (WeasyPrint fora do
+    processo web/worker).
+
+    - `size` processos iniciados com o pool (spawn: não herdam threads nem
+      conexões do pai), já importados e aquecidos antes do primeiro laudo;
+      até `size` renderizações simultâneas.
+    - Cada renderer roda com RLIMIT_AS e é reciclado após `max_jobs`
+      laudos ou quando o RSS passa de `max_rss_mb`; o substituto é
+      iniciado na hora e aquece em segundo plano.
+    - Renderização acima de `timeout` segundos, contados depois que o
+      renderer avisou que está pronto: o renderer é morto e a chamada
+      levanta PdfRenderTimeout.
+    - Thread-safe: cada chamada ocupa um renderer por vez.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+        max_jobs: int = DEFAULT_WORKER_MAX_JOBS,
+        max_rss_mb: int = DEFAULT_WORKER_MAX_RSS_MB,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT_SECONDS,
+    ):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._options = {
+            "memory_limit": max(0, memory_limit_mb) * 1024 * 1024,
+            "max_jobs": max(1, max_jobs),
+            "max_rss": max(1, max_rss_mb) * 1024 * 1024,
+        }
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle: queue.LifoQueue[_Renderer] = queue.LifoQueue()
+        self._pid = os.getpid()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Renderer:
+        return _Renderer(self._ctx, **self._options)
+
+    def _replace(self, renderer: _Renderer, *, graceful: bool = True) -> None:
+        """Inicia o substituto (aquece sem bloquear) e encerra o renderer em segundo plano."""
+        if not self._closed:
+            self._idle.put(self._spawn())
+        threading.Thread(
+            target=renderer.stop, kwargs={"graceful": graceful}, name="pdf-renderer-stop", daemon=True
+        ).start()
+
+    def _checkout(self) -> _Renderer:
+        while True:
+            try:
+                renderer = self._idle.get_nowait()
+            except queue.Empty:
+                # substituto não iniciado (ex.: falha no spawn)
+                renderer = self._spawn()
+            if not renderer.alive():
+                # morreu ocioso (ex.: OOM killer)
+                self._replace(renderer, graceful=False)
+                continue
+            if renderer.wait_ready(self.startup_timeout):
+                return renderer
+            self._replace(renderer, graceful=False)
+            raise PdfRenderError(f"Processo renderer não ficou pronto em {self.startup_timeout:g}s.")
+
+    def render(self, report_id, user_id, base_url: str, draft: bool = False, job_id=None) -> bytes:
+        """PDF do laudo renderizado num processo do pool (job_id: cancelável, ver job_still_running)."""
+        with self._slots:
+            renderer = self._checkout()
+            try:
+                renderer.conn.send((report_id, user_id, base_url, draft, job_id))
+                if not renderer.conn.poll(self.timeout):
+                    self._replace(renderer, graceful=False)
+                    raise PdfRenderTimeout(f"Renderização do laudo {report_id} excedeu {self.timeout:g}s.")
+                ok, payload, recycle = renderer.conn.recv()
+            except PdfRenderTimeout:
+                raise
+            except (EOFError, OSError) as exc:
+                # renderer morto (ex.: OOM killer) no meio da renderização
+                self._replace(renderer, graceful=False)
+                raise PdfRenderError(f"Processo renderer encerrado (exit {renderer.process.exitcode}).") from exc
+
+            if recycle:
+                self._replace(renderer)
+            else:
+                self._idle.put(renderer)
+
+        if ok is None:
+            raise PdfRenderCancelled(payload)
+        if not ok:
+            raise PdfRenderError(payload)
+        return payload
+
+    def close(self) -> None:
+        if self._pid != os.getpid():
+            return
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[PdfRenderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> Optional[PdfRenderPool]:
+    """
+    Instância única (por processo) do pool; None com REPORT_PDF_POOL_SIZE=0
+    (renderização no próprio processo). Criar o pool já inicia os renderers.
+    """
+    global _pool
+    size = int(getattr(settings, "REPORT_PDF_POOL_SIZE", 0) or 0)
+    if size <= 0:
+        return None
+    if _pool is None or _pool._pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool._pid != os.getpid():
+                _pool = PdfRenderPool(
+                    size=size,
+                    timeout=float(getattr(settings, "REPORT_PDF_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)),
+                    memory_limit_mb=int(getattr(settings, "REPORT_PDF_MEMORY_LIMIT_MB", DEFAULT_MEMORY_LIMIT_MB)),
+                    max_jobs=int(getattr(settings, "REPORT_PDF_WORKER_MAX_JOBS", DEFAULT_WORKER_MAX_JOBS)),
+                    max_rss_mb=int(getattr(settings, "REPORT_PDF_WORKER_MAX_RSS_MB", DEFAULT_WORKER_MAX_RSS_MB)),
+                )
+                atexit.register(_pool.close)
+    return _pool
+
+
+def render_report_pdf(
+    report, *, user, base_url: str, request=None, draft: bool = False, job_id=None
+) -> bytes:
+    """
+    Bytes do PDF do laudo: no pool de renderers quando configurado; senão,
+    build_report_pdf no próprio processo (com o request, se houver).
+
+    Com job_id, a renderização é abandonada (PdfRenderCancelled) entre
+    diagramações se o job deixar de estar RUNNING.
+    """
+    pool = get_pdf_pool()
+    if pool is None:
+        from report_maker.views import report_pdf_generator
+
+        return report_pdf_generator.build_report_pdf(
+            report,
+            user=user,
+            base_url=base_url,
+            request=request,
+            draft=draft,
+            should_continue=job_still_running(job_id),
+        )
+    return pool.render(report.pk, getattr(user, "pk", None), base_url, draft, job_id)
@@ -0,0 +1,207 @@
+# report_maker/utils/pdf_render_queue.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from report_maker.models import ExamObject, ObjectImage, ReportCase, ReportRenderJob, ReportTextBlock
+from report_maker.utils.pdf_pool import PdfRenderCancelled, render_report_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def report_content_version(report: ReportCase, user, *, draft: bool = False) -> str:
+    """
+    Versão do conteúdo que o PDF do laudo reproduz: o próprio laudo, textos,
+    objetos (ordem, edição e HTML gravado) e imagens. Consultas só de
+    metadados, sem renderizar nada. Laudo em edição usa o cabeçalho do
+    usuário, então o usuário e sua lotação entram na versão; o rascunho
+    (draft) é outro arquivo, logo outra versão.
+    """
+    h = hashlib.sha256()
+
+    def feed(*values) -> None:
+        h.update(json.dumps(values, default=str).encode("utf-8"))
+        h.update(b"\0")
+
+    feed(report.pk, report.updated_at, report.can_edit, bool(draft))
+    if report.can_edit:
+        feed(
+            getattr(user, "pk", None),
+            getattr(getattr(user, "institution", None), "pk", None),
+            getattr(getattr(user, "nucleus", None), "pk", None),
+            getattr(getattr(user, "team", None), "pk", None),
+        )
+
+    object_ids = []
+    for row in ExamObject.objects.filter(report_case=report).order_by("order").values_list(
+        "pk", "order", "updated_at", "rendered_source_hash"
+    ):
+        object_ids.append(row[0])
+        feed(*row)
+
+    for row in ReportTextBlock.objects.filter(report_case=report).order_by("pk").values_list(
+        "pk", "placement", "group_key", "position", "updated_at"
+    ):
+        feed(*row)
+
+    if object_ids:
+        for row in ObjectImage.objects.filter(object_id__in=object_ids).order_by("object_id", "index", "pk").values_list(
+            "pk", "object_id", "index", "caption", "image", "processing_status", "renditions"
+        ):
+            feed(*row)
+
+    return h.hexdigest()
+
+
+def enqueue_report_pdf(report: ReportCase, user, *, draft: bool = False) -> ReportRenderJob:
+    """
+    Enfileira a renderização do PDF do laudo (single-flight por versão).
+    draft=True: rascunho rápido (só em edição; laudo concluído usa o PDF final).
+
+    - Já existe job da mesma versão pendente (QUEUED/RUNNING), ou concluído
+      há menos de REPORT_PDF_REUSE_SECONDS: ele é devolvido e os pedidos
+      simultâneos compartilham a mesma renderização.
+    - Versão nova: cria o job e marca os pendentes do mesmo modo (final ou
+      rascunho) como SUPERSEDED (superseded_by aponta para o novo), em vez de
+      enfileirá-lo atrás deles.
+
+    O lock da linha do laudo serializa pedidos simultâneos. Laudo concluído
+    com PDF final já gravado gera um job concluído, sem renderização; sem o
+    arquivo (ainda não gerado ou perdido), segue o single-flight normal e o
+    worker o grava (ensure_final_pdf).
+    """
+    if not report.can_edit and report.has_final_pdf and report.final_pdf.storage.exists(report.final_pdf.name):
+        return ReportRenderJob.objects.create(
+            report_case=report,
+            requested_by=user,
+            status=ReportRenderJob.Status.DONE,
+            output=report.final_pdf.name,
+            finished_at=timezone.now(),
+        )
+
+    version = report_content_version(report, user, draft=draft)
+    Status = ReportRenderJob.Status
+    reuse_seconds = int(getattr(settings, "REPORT_PDF_REUSE_SECONDS", 600))
+
+    with transaction.atomic():
+        list(ReportCase.objects.select_for_update().filter(pk=report.pk).values_list("pk", flat=True))
+
+        same_version = ReportRenderJob.objects.filter(report_case=report, content_version=version)
+        current = (
+            same_version.filter(
+                Q(status__in=ReportRenderJob.PENDING_STATUSES)
+                | Q(status=Status.DONE, finished_at__gte=timezone.now() - timedelta(seconds=reuse_seconds))
+            )
+            .exclude(status=Status.DONE, output="")
+            .order_by("-created_at")
+            .first()
+        )
+        if current and (current.status != Status.DONE or current.output.storage.exists(current.output.name)):
+            return current
+
+        job = ReportRenderJob.objects.create(
+            report_case=report, requested_by=user, content_version=version, draft=draft
+        )
+        superseded = (
+            ReportRenderJob.objects.filter(
+                report_case=report, draft=draft, status__in=ReportRenderJob.PENDING_STATUSES
+            )
+            .exclude(pk=job.pk)
+            .update(status=Status.SUPERSEDED, superseded_by=job, finished_at=timezone.now())
+        )
+
+    if superseded:
+        logger.info("Laudo %s: %s job(s) de PDF substituído(s) pelo job %s", report.pk, superseded, job.pk)
+    return job
+
+
+@contextmanager
+def job_heartbeat(job: ReportRenderJob, interval: float | None = None):
+    """
+    Renova job.heartbeat_at a cada `interval` segundos (thread própria, com
+    conexão própria) enquanto o bloco executa: renderizações longas não são
+    confundidas com jobs abandonados por requeue_stale.
+    """
+    if interval is None:
+        interval = float(getattr(settings, "REPORT_PDF_JOB_HEARTBEAT_SECONDS", 15))
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                if not ReportRenderJob.beat(job.pk):
+                    break
+        except Exception:
+            logger.warning("Falha ao renovar o heartbeat do job %s", job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"render-heartbeat-{job.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_render_job(job: ReportRenderJob) -> ReportRenderJob:
+    """
+    Processa um job já reivindicado (status RUNNING): gera o PDF e grava o
+    resultado no próprio job. Erros são registrados no job, nunca propagados.
+    O heartbeat do job é renovado durante todo o processamento; job
+    substituído no meio é abandonado entre as diagramações.
+    """
+    with job_heartbeat(job):
+        return _run_render_job(job)
+
+
+def _run_render_job(job: ReportRenderJob) -> ReportRenderJob:
+    # import tardio: o gerador carrega o WeasyPrint
+    from report_maker.views.report_pdf_generator import ensure_final_pdf, report_pdf_filename
+
+    report = (
+        ReportCase.objects.select_related("author", "institution", "nucleus", "team")
+        .get(pk=job.report_case_id)
+    )
+
+    base_url = getattr(settings, "REPORT_PDF_BASE_URL", "http://localhost/")
+
+    try:
+        if not report.can_edit:
+            # Laudo concluído: o resultado é o próprio PDF final (imutável).
+            ensure_final_pdf(report, user=job.requested_by, base_url=base_url)
+            job.mark_done_from_storage(report.final_pdf.name)
+            return job
+
+        # substituído entre a reivindicação e o início: não renderiza à toa
+        job.refresh_from_db(fields=["status", "superseded_by"])
+        if job.status != ReportRenderJob.Status.RUNNING:
+            return job
+
+        pdf_bytes = render_report_pdf(
+            report, user=job.requested_by, base_url=base_url, draft=job.draft, job_id=job.pk
+        )
+    except PdfRenderCancelled:
+        logger.info("Job %s substituído durante a renderização; trabalho abandonado", job.pk)
+        job.refresh_from_db(fields=["status", "superseded_by"])
+        return job
+    except Exception:
+        logger.exception("Falha ao renderizar PDF do laudo %s (job %s)", job.report_case_id, job.pk)
+        job.mark_failed(traceback.format_exc())
+        return job
+
+    if not job.mark_done(pdf_bytes, f"{report_pdf_filename(report, draft=job.draft)}.pdf"):
+        logger.info("Job %s substituído durante a renderização; PDF descartado", job.pk)
+    return job
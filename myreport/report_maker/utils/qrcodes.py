@@ -0,0 +1,74 @@
+# report_maker/utils/qrcodes.py
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import threading
+from typing import Optional
+
+import qrcode
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# Repositório compartilhado, endereçado por conteúdo: o mesmo link gera
+# sempre o mesmo arquivo, reaproveitado por todos os objetos e laudos.
+QRCODE_DIR = "qrcodes"
+
+# Arquivos já confirmados no storage (por processo): evita exists() a cada render.
+_known: set[tuple[str, str]] = set()
+_known_lock = threading.Lock()
+
+
+def make_qrcode_png(data: str) -> bytes:
+    qr = qrcode.make(data)
+    buf = io.BytesIO()
+    qr.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def qrcode_name(data: str) -> str:
+    """Nome no storage: qrcodes/<sha256(data)>.png."""
+    digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+    return f"{QRCODE_DIR}/{digest}.png"
+
+
+def ensure_qrcode(data: str, storage=None) -> str:
+    """
+    Garante o PNG do QR Code no storage e devolve o nome do arquivo.
+    Só gera a imagem quando ela ainda não existe.
+    """
+    storage = storage or default_storage
+    name = qrcode_name(data)
+    key = (str(getattr(storage, "location", "")), name)
+
+    if key in _known:
+        return name
+
+    if not storage.exists(name):
+        saved = storage.save(name, ContentFile(make_qrcode_png(data)))
+        if saved != name:
+            # outro processo gravou o mesmo conteúdo no intervalo: descarta a cópia
+            storage.delete(saved)
+
+    with _known_lock:
+        _known.add(key)
+    return name
+
+
+def qrcode_url(data: str, storage=None) -> Optional[str]:
+    """
+    URL do QR Code (gera e persiste na primeira vez). None em caso de falha
+    do storage: o laudo segue sem a imagem, apenas com o link.
+    """
+    if not data:
+        return None
+
+    storage = storage or default_storage
+    try:
+        return storage.url(ensure_qrcode(data, storage))
+    except Exception:
+        logger.warning("Falha ao gravar o QR Code de localização.", exc_info=True)
+        return None
@@ -0,0 +1,315 @@
+# report_maker/utils/render_cache.py
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Defaults (sobrescrevíveis em settings)
+DEFAULT_MEMORY_ENTRIES = 2048
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Intervalo (s) entre registros dos contadores no log; 0 desliga
+DEFAULT_STATS_LOG_SECONDS = 300
+
+# A cada N gravações no banco, verifica o limite de tamanho.
+EVICTION_CHECK_EVERY = 200
+
+# last_used_at só é atualizado quando mais antigo que isso (evita 1 UPDATE por leitura).
+TOUCH_AFTER = timedelta(hours=12)
+
+
+def make_key(kind: str, version: str, text: str) -> str:
+    """
+    Chave endereçada por conteúdo: SHA-256 de tipo + versão + texto.
+    """
+    h = hashlib.sha256()
+    h.update(kind.encode("utf-8"))
+    h.update(b"\0")
+    h.update(version.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    Cache de renderização em duas camadas.
+
+    - Frente: LRU em memória, por processo (OrderedDict).
+    - Persistente: tabela RenderCacheEntry, limitada por tamanho total
+      (remove as entradas menos usadas recentemente).
+
+    Falhas do banco nunca quebram a renderização: o cache apenas deixa de
+    acertar. Leituras e escritas rodam em savepoint para não contaminar a
+    transação corrente.
+
+    Contadores (por tipo): memory_hits, db_hits, misses, writes, evictions.
+    Registrados no log (INFO) a cada stats_log_seconds, para dimensionar o cache.
+    """
+
+    def __init__(self, *, memory_entries: int, max_bytes: int, stats_log_seconds: float = DEFAULT_STATS_LOG_SECONDS):
+        self.memory_entries = max(0, memory_entries)
+        self.max_bytes = max(0, max_bytes)
+        self.stats_log_seconds = max(0.0, stats_log_seconds)
+        self._next_stats_log = time.monotonic() + self.stats_log_seconds
+
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._writes_since_check = 0
+        self._stats: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        )
+
+    # ---------------------------------------------------------------------
+    # Estatísticas
+    # ---------------------------------------------------------------------
+    def _count(self, kind: str, counter: str, n: int = 1) -> None:
+        if n:
+            with self._lock:
+                self._stats[kind][counter] += n
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_kind = {kind: dict(values) for kind, values in self._stats.items()}
+            memory_size = len(self._lru)
+
+        for values in per_kind.values():
+            lookups = values["memory_hits"] + values["db_hits"] + values["misses"]
+            hits = values["memory_hits"] + values["db_hits"]
+            values["hit_ratio"] = round(hits / lookups, 4) if lookups else None
+
+        return {
+            "memory_entries": memory_size,
+            "memory_capacity": self.memory_entries,
+            "max_bytes": self.max_bytes,
+            "kinds": per_kind,
+        }
+
+    def log_stats(self) -> None:
+        """Registra no log os contadores acumulados do processo, por tipo."""
+        stats = self.stats()
+        for kind, values in sorted(stats["kinds"].items()):
+            logger.info(
+                "Cache de renderização [%s]: %s acerto(s) em memória, %s no banco, %s erro(s), "
+                "%s gravação(ões), %s remoção(ões); taxa de acerto %s",
+                kind,
+                values["memory_hits"],
+                values["db_hits"],
+                values["misses"],
+                values["writes"],
+                values["evictions"],
+                values["hit_ratio"],
+            )
+        logger.info(
+            "Cache de renderização: %s/%s entrada(s) em memória, limite persistente %s bytes",
+            stats["memory_entries"],
+            stats["memory_capacity"],
+            stats["max_bytes"],
+        )
+
+    def _maybe_log_stats(self) -> None:
+        if not self.stats_log_seconds or time.monotonic() < self._next_stats_log:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_stats_log:
+                return
+            self._next_stats_log = time.monotonic() + self.stats_log_seconds
+        self.log_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    # ---------------------------------------------------------------------
+    # Camada em memória
+    # ---------------------------------------------------------------------
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+            return value
+
+    def _memory_put(self, key: str, value: str) -> None:
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.memory_entries:
+                self._lru.popitem(last=False)
+
+    # ---------------------------------------------------------------------
+    # API
+    # ---------------------------------------------------------------------
+    def get_many(self, kind: str, keys: Iterable[str]) -> dict[str, str]:
+        """
+        Busca várias chaves (memória e, para as restantes, UMA consulta ao banco).
+        Retorna apenas as encontradas.
+        """
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, str] = {}
+
+        pending = []
+        for key in keys:
+            value = self._memory_get(key)
+            if value is None:
+                pending.append(key)
+            else:
+                found[key] = value
+        self._count(kind, "memory_hits", len(found))
+
+        if pending:
+            from_db = self._db_get_many(pending)
+            for key, value in from_db.items():
+                self._memory_put(key, value)
+            found.update(from_db)
+            self._count(kind, "db_hits", len(from_db))
+            self._count(kind, "misses", len(pending) - len(from_db))
+
+        self._maybe_log_stats()
+        return found
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        return self.get_many(kind, [key]).get(key)
+
+    def set_many(self, kind: str, items: dict[str, str]) -> None:
+        if not items:
+            return
+        for key, value in items.items():
+            self._memory_put(key, value)
+        self._db_set_many(kind, items)
+        self._count(kind, "writes", len(items))
+
+    def set(self, kind: str, key: str, value: str) -> None:
+        self.set_many(kind, {key: value})
+
+    # ---------------------------------------------------------------------
+    # Camada persistente
+    # ---------------------------------------------------------------------
+    def _db_get_many(self, keys: list[str]) -> dict[str, str]:
+        from report_maker.models import RenderCacheEntry
+
+        # Savepoint: chamado também de save() de modelos dentro do atomic das
+        # views; uma falha aqui não pode deixar a transação externa quebrada.
+        try:
+            with transaction.atomic():
+                rows = list(
+                    RenderCacheEntry.objects.filter(key__in=keys).values_list("key", "value", "last_used_at")
+                )
+
+                stale_before = timezone.now() - TOUCH_AFTER
+                stale = [key for key, _value, used in rows if used < stale_before]
+                if stale:
+                    RenderCacheEntry.objects.filter(key__in=stale).update(last_used_at=timezone.now())
+        except Exception:
+            logger.warning("Cache de renderização (leitura) indisponível.", exc_info=True)
+            return {}
+
+        return {key: value for key, value, _used in rows}
+
+    def _db_set_many(self, kind: str, items: dict[str, str]) -> None:
+        from report_maker.models import RenderCacheEntry
+
+        now = timezone.now()
+        entries = [
+            RenderCacheEntry(
+                key=key,
+                kind=kind,
+                value=value,
+                size=len(value.encode("utf-8")),
+                last_used_at=now,
+            )
+            for key, value in items.items()
+        ]
+
+        try:
+            with transaction.atomic():
+                RenderCacheEntry.objects.bulk_create(entries, ignore_conflicts=True)
+        except Exception:
+            logger.warning("Cache de renderização (escrita) indisponível.", exc_info=True)
+            return
+
+        with self._lock:
+            self._writes_since_check += len(entries)
+            check = self._writes_since_check >= EVICTION_CHECK_EVERY
+            if check:
+                self._writes_since_check = 0
+
+        if check:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Mantém a camada persistente abaixo de max_bytes, removendo as entradas
+        menos usadas recentemente (com folga de 10% para não rodar a cada escrita).
+        """
+        from report_maker.models import RenderCacheEntry
+
+        if not self.max_bytes:
+            return 0
+
+        # Savepoint, como em _db_get_many/_db_set_many: chamado de save() dentro
+        # do atomic das views, uma falha aqui não pode quebrar a transação externa.
+        try:
+            with transaction.atomic():
+                total = RenderCacheEntry.objects.aggregate(total=Sum("size"))["total"] or 0
+                if total <= self.max_bytes:
+                    return 0
+
+                excess = total - int(self.max_bytes * 0.9)
+                victims: list[str] = []
+                freed = 0
+                by_use = RenderCacheEntry.objects.order_by("last_used_at").values_list("key", "size")
+                for key, size in by_use.iterator():
+                    victims.append(key)
+                    freed += size
+                    if freed >= excess:
+                        break
+
+                removed = 0
+                for start in range(0, len(victims), 500):
+                    removed += RenderCacheEntry.objects.filter(key__in=victims[start:start + 500]).delete()[0]
+        except Exception:
+            logger.warning("Falha ao aplicar o limite do cache de renderização.", exc_info=True)
+            return 0
+
+        self._count("_all", "evictions", removed)
+        return removed
+
+
+_cache: Optional[RenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """
+    Instância única (por processo) do cache de renderização.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RenderCache(
+                    memory_entries=int(getattr(settings, "RENDER_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+                    max_bytes=int(getattr(settings, "RENDER_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    stats_log_seconds=float(
+                        getattr(settings, "RENDER_CACHE_STATS_LOG_SECONDS", DEFAULT_STATS_LOG_SECONDS)
+                    ),
+                )
+    return _cache
@@ -0,0 +1,137 @@
+# report_maker/utils/render_fragments.py
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import replace
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+from report_maker.models import ExamObject
+from report_maker.templatetags.markdown_extras import markdown_render_status
+from report_maker.utils.render_cache import get_render_cache, make_key
+
+# Bloco de cada objeto por destino, e os templates que ele inclui
+FRAGMENT_TEMPLATES = {
+    "pdf": ("report_maker/partials/pdf_object_block.html",),
+    "showpage": (
+        "report_maker/partials/showpage_object_block.html",
+        "report_maker/partials/responsive_image.html",
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def _template_version(target: str) -> str:
+    """
+    Fonte dos templates do bloco + configuração do markdown + MEDIA_URL:
+    um deploy que mude qualquer um deles invalida os fragmentos persistidos.
+    """
+    from report_maker.templatetags.markdown_extras import RENDER_CONFIG_VERSION
+
+    h = hashlib.sha256()
+    for name in FRAGMENT_TEMPLATES[target]:
+        h.update(get_template(name).template.source.encode("utf-8"))
+        h.update(b"\0")
+    h.update(RENDER_CONFIG_VERSION.encode("utf-8"))
+    h.update(str(settings.MEDIA_URL).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _images_version(figures) -> str:
+    """Versão do conjunto de imagens do objeto (ordem, arquivo, legenda e versões de tela)."""
+    h = hashlib.sha256()
+    for figure in figures:
+        img = figure.img
+        h.update(
+            json.dumps(
+                [str(img.pk), img.image.name, img.caption, img.original_width, img.processing_status, img.renditions],
+                sort_keys=True,
+                default=str,
+            ).encode("utf-8")
+        )
+    return h.hexdigest()
+
+
+def _numbering(o) -> str:
+    """Numeração exibida no bloco: muda só quando a posição do objeto (ou das figuras) muda."""
+    return "|".join(
+        [
+            o.number,
+            o.anchor_id,
+            *(f"{s.number}#{s.anchor_id}" for s in o.sections),
+            *(figure.figure_label for figure in o.images),
+        ]
+    )
+
+
+def fragment_key(o, target: str) -> str | None:
+    """
+    Chave do bloco de um objeto de exame: (id, updated_at, HTML gravado,
+    versão das imagens, numeração). Blocos virtuais (textos do laudo) não
+    são cacheados.
+    """
+    obj = o.obj
+    if not isinstance(obj, ExamObject):
+        return None
+    parts = [
+        str(obj.pk),
+        obj.updated_at.isoformat() if obj.updated_at else "",
+        getattr(obj, "rendered_source_hash", "") or "",
+        _images_version(o.images),
+        _numbering(o),
+    ]
+    return make_key(f"fragment_{target}", _template_version(target), "\0".join(parts))
+
+
+def attach_object_fragments(outline_ui: list, *, target: str) -> list:
+    """
+    Devolve a outline com o HTML de cada objeto de exame (OutlineObjectUI.html),
+    vindo do RenderCache ou renderizado agora. Uma consulta para todos os
+    blocos e uma gravação para os que faltavam; editar um objeto ou mudar a
+    numeração de alguns só re-renderiza esses blocos.
+
+    Bloco com equação que falhou (KaTeX indisponível) é usado nesta
+    renderização, mas não é gravado: a chave não muda quando o KaTeX volta.
+    """
+    kind = f"fragment_{target}"
+    template_name = FRAGMENT_TEMPLATES[target][0]
+
+    keys = {}
+    for group in outline_ui:
+        for o in group.objects:
+            key = fragment_key(o, target)
+            if key:
+                keys[id(o)] = key
+    if not keys:
+        return outline_ui
+
+    cache = get_render_cache()
+    found = cache.get_many(kind, keys.values())
+
+    rendered: dict[str, str] = {}
+    complete: dict[str, str] = {}
+    for group in outline_ui:
+        for o in group.objects:
+            key = keys.get(id(o))
+            if key and key not in found and key not in rendered:
+                with markdown_render_status() as status:
+                    rendered[key] = render_to_string(template_name, {"o": o})
+                if status["complete"]:
+                    complete[key] = rendered[key]
+    cache.set_many(kind, complete)
+    found.update(rendered)
+
+    return [
+        replace(
+            group,
+            objects=tuple(
+                replace(o, html=mark_safe(found[keys[id(o)]])) if id(o) in keys else o
+                for o in group.objects
+            ),
+        )
+        for group in outline_ui
+    ]
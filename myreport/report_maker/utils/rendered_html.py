@@ -0,0 +1,136 @@
+# report_maker/utils/rendered_html.py
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Iterable
+
+# Campos de texto "renderizáveis" são convertidos para HTML na GRAVAÇÃO
+# (render-on-write). O HTML fica num mapa {sha256(trecho): html}, porque a
+# outline divide textos Markdown em sub-seções (H2) e cada trecho é
+# renderizado separadamente nos templates.
+
+_H2_RE = re.compile(r"^\s*##\s+(?P<label>.+?)\s*$")
+_HAS_H2_RE = re.compile(r"(?m)^\s*##\s+\S+")
+
+
+def split_markdown_h2_sections(md_text: str) -> list[tuple[str, str]]:
+    """Divide um texto Markdown em sub-seções a partir de headings H2."""
+    text = (md_text or "").strip()
+    if not text:
+        return []
+
+    lines = text.splitlines()
+
+    found_heading = False
+    sections: list[tuple[str, str]] = []
+    current_label = ""
+    buffer: list[str] = []
+
+    for line in lines:
+        match = _H2_RE.match(line)
+        if match:
+            found_heading = True
+            buffered_text = "\n".join(buffer).strip()
+            if buffered_text:
+                sections.append((current_label, buffered_text))
+            current_label = match.group("label").strip()
+            buffer = []
+            continue
+        buffer.append(line)
+
+    buffered_text = "\n".join(buffer).strip()
+    if buffered_text:
+        sections.append((current_label, buffered_text))
+
+    return sections if found_heading else []
+
+
+def normalize_fmt(fmt: str | None) -> str:
+    fmt_normalized = (fmt or "").strip().lower()
+    return "md" if fmt_normalized == "markdown" else fmt_normalized
+
+
+def is_markdown_like(text: str, fmt: str | None) -> bool:
+    fmt_normalized = normalize_fmt(fmt)
+    return fmt_normalized == "md" or (fmt_normalized == "text" and bool(_HAS_H2_RE.search(text or "")))
+
+
+def markdown_chunks(text: str, fmt: str | None) -> list[str]:
+    """
+    Trechos em que a outline exibirá o texto (mesma regra de
+    report_outline._expand_markdown_headings).
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    if is_markdown_like(text, fmt):
+        sections = split_markdown_h2_sections(text)
+        if sections:
+            return [chunk for _label, chunk in sections if chunk.strip()]
+
+    return [text]
+
+
+def chunk_key(text: str) -> str:
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
+
+
+def rendered_source_hash(sources: Iterable[tuple[str, str]]) -> str:
+    """
+    Hash das fontes (texto + formato) e da versão do renderizador: se nada
+    mudou, o HTML armazenado continua válido.
+    """
+    from report_maker.templatetags.markdown_extras import RENDER_CONFIG_VERSION
+
+    h = hashlib.sha256(RENDER_CONFIG_VERSION.encode("utf-8"))
+    for text, fmt in sources:
+        h.update(b"\0")
+        h.update(normalize_fmt(fmt).encode("utf-8"))
+        h.update(b"\0")
+        h.update((text or "").strip().encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_rendered_map(sources: Iterable[tuple[str, str]]) -> tuple[dict[str, str], bool]:
+    """
+    Renderiza todos os trechos das fontes.
+
+    Retorna (mapa, completo). Trechos que não puderam ser renderizados por
+    inteiro (ex.: KaTeX indisponível) ficam fora do mapa e `completo` é False:
+    a leitura cai no filtro render_markdown e a próxima gravação tenta de novo.
+    """
+    from report_maker.templatetags.markdown_extras import render_markdown_html
+
+    rendered: dict[str, str] = {}
+    complete = True
+
+    for text, fmt in sources:
+        for chunk in markdown_chunks(text, fmt):
+            key = chunk_key(chunk)
+            if key in rendered:
+                continue
+
+            html, ok = render_markdown_html(chunk)
+            if ok:
+                rendered[key] = html
+            else:
+                complete = False
+
+    return rendered, complete
+
+
+def refresh_rendered_html(instance, sources: list[tuple[str, str]]) -> bool:
+    """
+    Atualiza `rendered_html`/`rendered_source_hash` da instância se as fontes
+    mudaram. Retorna True quando os campos foram alterados.
+    """
+    source_hash = rendered_source_hash(sources)
+    if instance.rendered_source_hash == source_hash and instance.rendered_html is not None:
+        return False
+
+    rendered, complete = build_rendered_map(sources)
+    instance.rendered_html = rendered
+    instance.rendered_source_hash = source_hash if complete else ""
+    return True
@@ -185,8 +185,7 @@ def ai_textblock_generate(request):
             "exames": getattr(this_report, 'examination', '')
         }
 
-        for obj in this_report.exam_objects.all():
-            actual_obj = obj.concrete
+        for actual_obj in this_report.exam_objects.downcast():
             report_data["objects"].append({
                 "tipo": actual_obj._meta.verbose_name,
                 "description": getattr(actual_obj, 'description', '').strip(),
@@ -2,22 +2,25 @@
 from __future__ import annotations
 
 import json
+import uuid
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import UploadedFile
 from django.db import transaction
+from django.db.models import Case, F, OuterRef, PositiveIntegerField, Subquery, Value, When
 from django.http import Http404, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
 from django.urls import reverse
-from django.views.decorators.http import require_POST
-from django.views.generic import CreateView, DeleteView, UpdateView
-
-from PIL import Image
+from django.views.decorators.http import require_GET, require_POST
+from django.views.generic import CreateView, DeleteView, UpdateView, View
 
 from accounts.mixins import CanEditReportsRequiredMixin
 
 from report_maker.forms import ObjectImageForm
-from report_maker.models import ObjectImage
+from report_maker.models import ExamObject, ObjectImage, ReportCase
+from report_maker.utils.image_ingest import attach_upload, bulk_create_object_images
 from report_maker.views.mixins import NextUrlMixin
 
 
@@ -131,20 +134,71 @@ class ObjectImageCreateView(NextUrlMixin, _ImageAccessMixin, CreateView):
         form.instance.content_type = ct
         form.instance.object_id = obj.pk
 
-        # dimensões originais da imagem
+        # dimensões originais e arquivo compartilhado (conteúdo já enviado
+        # antes não é regravado)
         uploaded = form.cleaned_data.get("image")
         if uploaded:
-            with Image.open(uploaded) as im:
-                form.instance.original_width, form.instance.original_height = im.size
+            attach_upload(form.instance, uploaded)
 
         # index é calculado automaticamente no model (save)
-        return super().form_valid(form)
+        with transaction.atomic():
+            return super().form_valid(form)
 
     def get_fallback_url(self) -> str:
         _ct, _obj, report = self._get_target_object()
         return reverse("report_maker:reportcase_detail", kwargs={"pk": report.pk})
 
 
+# ─────────────────────────────────────────────────────────────
+# Upload em lote
+# ─────────────────────────────────────────────────────────────
+class ObjectImageBulkUploadView(_ImageAccessMixin, View):
+    """
+    Recebe várias imagens do mesmo objeto num único POST multipart
+    (campo `files`, repetido).
+
+    Os arquivos são gravados em paralelo e inseridos num único bulk_create,
+    com índices contíguos na ordem de envio. O processamento pesado
+    (orientação, redimensionamento, versões de tela) fica com o worker
+    `process_object_images`.
+    """
+
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        _ct, obj, _report = self._get_target_object()
+
+        files = request.FILES.getlist("files")
+        if not files:
+            return JsonResponse({"ok": False, "error": "Nenhum arquivo enviado."}, status=400)
+
+        max_files = int(getattr(settings, "REPORT_IMAGE_BULK_MAX_FILES", 300))
+        if len(files) > max_files:
+            return JsonResponse(
+                {"ok": False, "error": f"Envie no máximo {max_files} arquivos por vez."},
+                status=400,
+            )
+
+        images, errors = bulk_create_object_images(obj, files)
+
+        return JsonResponse(
+            {
+                "ok": bool(images),
+                "images": [
+                    {
+                        "id": str(img.pk),
+                        "index": img.index,
+                        "status": img.processing_status,
+                        "status_url": reverse("report_maker:image_status", kwargs={"pk": img.pk}),
+                    }
+                    for img in images
+                ],
+                "errors": [{"name": e.name, "error": e.error} for e in errors],
+            },
+            status=201 if images else 400,
+        )
+
+
 # ─────────────────────────────────────────────────────────────
 # Update
 # ─────────────────────────────────────────────────────────────
@@ -178,6 +232,10 @@ class ObjectImageUpdateView(NextUrlMixin, _ImageAccessMixin, UpdateView):
         current = self.get_object()
         form.instance.index = current.index
 
+        # novo arquivo: armazenamento de blobs (o anterior é liberado no save)
+        if "image" in form.changed_data and isinstance(form.cleaned_data.get("image"), UploadedFile):
+            attach_upload(form.instance, form.cleaned_data["image"])
+
         # 2. Captura a largura enviada pelo JavaScript (campo oculto width_override)
         width_override = self.request.POST.get('width_override')
         if width_override:
@@ -188,7 +246,8 @@ class ObjectImageUpdateView(NextUrlMixin, _ImageAccessMixin, UpdateView):
                 # Se houver erro na conversão, mantém o que está no arquivo
                 pass
 
-        return super().form_valid(form)
+        with transaction.atomic():
+            return super().form_valid(form)
 
     def get_fallback_url(self) -> str:
         obj = self.object.content_object
@@ -239,43 +298,84 @@ def images_reorder(request):
     except Exception:
         return HttpResponseBadRequest("JSON inválido")
 
-    qs = ObjectImage.objects.filter(pk__in=ordered_ids)
-    if qs.count() != len(ordered_ids):
-        return HttpResponseBadRequest("Há IDs inexistentes em ordered_ids")
-
-    # usa o 1º id enviado para determinar o grupo (mais previsível que qs.first())
-    first = ObjectImage.objects.filter(pk=ordered_ids[0]).first()
-    if not first:
-        return HttpResponseBadRequest("Imagens não encontradas")
-
+    try:
+        ordered_ids = [str(uuid.UUID(str(x))) for x in ordered_ids]
+    except (TypeError, ValueError, AttributeError):
+        return HttpResponseBadRequest("Há IDs inválidos em ordered_ids")
+
+    # o grupo (objeto) é o do 1º id enviado; laudo resolvido pelo ExamObject
+    # (herança multi-table: mesmo pk do objeto concreto)
+    anchor = ObjectImage.objects.filter(pk=ordered_ids[0])
+    report_of = ExamObject.objects.filter(pk=OuterRef("object_id"))
     group_qs = ObjectImage.objects.filter(
-        content_type_id=first.content_type_id,
-        object_id=first.object_id,
+        content_type_id=Subquery(anchor.values("content_type_id")),
+        object_id=Subquery(anchor.values("object_id")),
     )
 
-    if group_qs.count() != len(ordered_ids):
-        return HttpResponseBadRequest("Imagens não pertencem ao mesmo objeto")
-
-    obj = first.content_object
-    report = getattr(obj, "report_case", None)
-    if not report or report.author_id != request.user.id or not getattr(report, "can_edit", False):
-        return HttpResponseForbidden("Sem permissão")
+    with transaction.atomic():
+        # validação, permissão e trava do grupo numa única consulta
+        rows = list(
+            group_qs.select_for_update()
+            .annotate(
+                report_author_id=Subquery(
+                    report_of.values("report_case__author_id"),
+                    output_field=ReportCase._meta.get_field("author").target_field,
+                ),
+                report_status=Subquery(report_of.values("report_case__status")),
+                report_locked=Subquery(report_of.values("report_case__is_locked")),
+            )
+            .values_list("pk", "report_author_id", "report_status", "report_locked")
+        )
+        if not rows:
+            return HttpResponseBadRequest("Imagens não encontradas")
 
-    ordered_ids_str = [str(x) for x in ordered_ids]
+        group_ids = {str(pk) for pk, *_report in rows}
+        if len(ordered_ids) != len(group_ids) or set(ordered_ids) != group_ids:
+            return HttpResponseBadRequest("Imagens não pertencem ao mesmo objeto (ou lista incompleta)")
 
-    with transaction.atomic():
-        locked = list(group_qs.select_for_update().order_by("id"))
+        _pk, author_id, status, locked = rows[0]
+        if author_id != request.user.id or status != ReportCase.Status.OPEN or locked:
+            return HttpResponseForbidden("Sem permissão")
 
-        tmp_base = 1_000_000
-        for i, img in enumerate(locked, start=1):
-            img.index = tmp_base + i
-            img.save(update_fields=["index"])
+        # "bump" + ordem final (evita colisão do UniqueConstraint): dois UPDATEs
+        # com CASE, independentemente do número de imagens
+        bump = 1_000_000
+        bump_cases = [When(pk=img_id, then=Value(bump + idx)) for idx, img_id in enumerate(ordered_ids, start=1)]
+        final_cases = [When(pk=img_id, then=Value(idx)) for idx, img_id in enumerate(ordered_ids, start=1)]
 
-        img_map = {str(img.pk): img for img in locked}
-        for idx, img_id in enumerate(ordered_ids_str, start=1):
-            img = img_map.get(img_id)
-            if img:
-                img.index = idx
-                img.save(update_fields=["index"])
+        ObjectImage.objects.filter(pk__in=ordered_ids).update(
+            index=Case(*bump_cases, default=F("index"), output_field=PositiveIntegerField())
+        )
+        ObjectImage.objects.filter(pk__in=ordered_ids).update(
+            index=Case(*final_cases, default=F("index"), output_field=PositiveIntegerField())
+        )
 
     return JsonResponse({"ok": True})
+
+
+# ─────────────────────────────────────────────────────────────
+# Status do processamento (function-based)
+# ─────────────────────────────────────────────────────────────
+@login_required
+@require_GET
+def image_status(request, pk):
+    """
+    Estado do processamento da imagem (PENDING/PROCESSING/READY/FAILED),
+    consultado pela tela do laudo até a imagem ficar pronta.
+    """
+    image = ObjectImage.objects.filter(pk=pk).first()
+    report = getattr(getattr(image, "content_object", None), "report_case", None)
+    if not image or not report or report.author_id != request.user.id:
+        raise Http404
+
+    responsive = image.responsive
+    return JsonResponse(
+        {
+            "ok": True,
+            "id": str(image.pk),
+            "status": image.processing_status,
+            "is_processing": image.is_processing,
+            "url": image.image.url,
+            "thumb_url": responsive["src"] if responsive else None,
+        }
+    )
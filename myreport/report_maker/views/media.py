@@ -0,0 +1,61 @@
+# path: myreport/report_maker/views/media.py
+from __future__ import annotations
+
+import re
+
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.views.decorators.http import require_safe
+
+from common.media_serving import clean_media_name, serve_media
+from report_maker.models import ExamObject, ObjectImage, ReportCase
+from report_maker.utils.image_blobs import BLOBS_DIR
+from report_maker.utils.image_derivatives import DERIVATIVES_DIR
+
+_UUID = r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"
+
+# reports/<laudo>/...
+_REPORT_RE = re.compile(rf"^reports/(?P<report>{_UUID})/")
+# blobs/<aa>/<bb>/_derivatives/<imagem>/...
+_BLOB_DERIVATIVE_RE = re.compile(rf"^{BLOBS_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/{DERIVATIVES_DIR}/(?P<image>{_UUID})/")
+# blobs/<aa>/<bb>/<sha256>.<ext>
+_BLOB_RE = re.compile(rf"^{BLOBS_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/(?P<sha>[0-9a-f]{{64}})(\.[a-z0-9]+)?$")
+
+
+def _can_access(user, name: str) -> bool:
+    """
+    Autorização por prefixo, com uma única consulta indexada:
+    - laudo (reports/<id>/): só o autor;
+    - blob e derivados: o usuário é autor de um laudo que usa a imagem;
+    - demais pastas (brasões, perfis, rede, grupos...): usuário autenticado.
+    """
+    own_objects = ExamObject.objects.filter(report_case__author_id=user.pk).values("pk")
+
+    if match := _REPORT_RE.match(name):
+        return ReportCase.objects.filter(pk=match["report"], author_id=user.pk).exists()
+    if match := _BLOB_DERIVATIVE_RE.match(name):
+        return ObjectImage.objects.filter(pk=match["image"], object_id__in=own_objects).exists()
+    if match := _BLOB_RE.match(name):
+        return ObjectImage.objects.filter(blob_id=match["sha"], object_id__in=own_objects).exists()
+    if name.startswith(("reports/", f"{BLOBS_DIR}/")):
+        return False
+    return True
+
+
+@login_required
+@require_safe
+def protected_media(request, name: str):
+    """
+    Arquivos de MEDIA_ROOT com autorização no Django.
+
+    A transferência fica com o servidor web (X-Accel-Redirect/X-Sendfile)
+    quando MEDIA_ACCEL está configurado; ver common.media_serving.
+    Sem acesso ou inexistente: 404 (não revela a existência do arquivo).
+    """
+    name = clean_media_name(name)
+    if name is None or not _can_access(request.user, name):
+        raise Http404
+    if not default_storage.exists(name):
+        raise Http404
+    return serve_media(request, default_storage, name)
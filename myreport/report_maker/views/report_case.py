@@ -1,19 +1,16 @@
 # report_maker/views/report_case.py
 from __future__ import annotations
 
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 
 from django.http import JsonResponse
-from PIL import Image
 from django.contrib.contenttypes.models import ContentType
-from django.core.files.base import ContentFile
-import io
 import uuid
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
-from django.db.models import Prefetch, Count
-from django.urls import reverse_lazy
+from django.db import transaction
+from django.urls import reverse, reverse_lazy
 from django.views.generic import (
     CreateView,
     DeleteView,
@@ -23,11 +20,13 @@ from django.views.generic import (
 )
 
 from accounts.mixins import CanCreateReportsRequiredMixin, CanEditReportsRequiredMixin
+from common.image_processing import ImageTooLarge
 
 from report_maker.forms.report_case import ReportCaseForm
 from report_maker.models import ExamObjectGroup, ReportCase, ReportTextBlock
 from report_maker.models.images import ObjectImage
-from report_maker.views.report_outline import build_report_outline
+from report_maker.utils.image_ingest import attach_upload
+from report_maker.views.report_document import ReportDocumentAssembler
 
 
 # ─────────────────────────────────────────────────────────────
@@ -84,40 +83,18 @@ class ReportCaseDetailView(LoginRequiredMixin, ReportCaseAuthorQuerySetMixin, De
         ctx = super().get_context_data(**kwargs)
         report: ReportCase = ctx["report"]
 
-        images_qs = ObjectImage.objects.order_by("index", "id")
+        # Documento do laudo (textos, objetos, imagens e outline) em consultas fixas
+        document = ReportDocumentAssembler(report).assemble()
 
-        exam_objects_qs = (
-            report.exam_objects.all()
-            .prefetch_related(Prefetch("images", queryset=images_qs))
-            .order_by("order", "created_at")
-        )
-        ctx["exam_objects"] = exam_objects_qs
-
-        # Textos do laudo
-        text_blocks_qs = report.text_blocks.all().order_by("placement", "position", "created_at")
-        ctx["text_blocks"] = text_blocks_qs
-
-        ctx["text_blocks_by_placement"] = {
-            k: list(text_blocks_qs.filter(placement=k))
-            for k, _ in ReportTextBlock.Placement.choices
-        }
+        ctx["exam_objects"] = document.exam_objects
+        ctx["text_blocks"] = document.text_blocks
+        ctx["text_blocks_by_placement"] = document.text_blocks_by_placement
 
         # Preâmbulo: usuário > sistema
-        preamble_text = (
-            text_blocks_qs.filter(placement=ReportTextBlock.Placement.PREAMBLE)
-            .values_list("body", flat=True)
-            .first()
-        )
-        ctx["preamble"] = (preamble_text or "").strip() or report.preamble
+        ctx["preamble"] = document.preamble
 
         # Dropdown: "texto comum do grupo" (>=2 objetos)
-        counts = (
-            report.exam_objects.exclude(group_key__isnull=True)
-            .exclude(group_key="")
-            .values("group_key")
-            .annotate(n=Count("id"))
-        )
-        count_map = {row["group_key"]: row["n"] for row in counts}
+        count_map = Counter(obj.group_key for obj in document.exam_objects if obj.group_key)
 
         ctx["editorial_groups"] = [
             {"key": key, "label": label}
@@ -125,31 +102,23 @@ class ReportCaseDetailView(LoginRequiredMixin, ReportCaseAuthorQuerySetMixin, De
             if count_map.get(key, 0) >= 2
         ]
 
-        # Outline (showpage/pdf) ✅ build_report_outline retorna (outline, n_top)
-        outline, _n_top = build_report_outline(
-            report=report,
-            exam_objects_qs=exam_objects_qs,
-            text_blocks_qs=text_blocks_qs,
-            start_at=1,
-            prepend_blocks=report.get_render_blocks(),
-        )
-        ctx["outline"] = outline
+        ctx["outline"] = document.outline
 
         # ─────────────────────────────────────────────────────────────
         # Intros por grupo (OBJECT_GROUP_INTRO)
         # ─────────────────────────────────────────────────────────────
-        intro_rows = (
-            text_blocks_qs.filter(placement=ReportTextBlock.Placement.OBJECT_GROUP_INTRO)
-            .values_list("group_key", "body")
-        )
-        intro_by_key = {k: (b or "").strip() for k, b in intro_rows if k}
+        intro_by_key = {
+            tb.group_key: (tb.body or "").strip()
+            for tb in document.text_blocks_by_placement[ReportTextBlock.Placement.OBJECT_GROUP_INTRO]
+            if tb.group_key
+        }
 
         # Labels por grupo (choices)
         label_by_key = {k: lbl for k, lbl in ExamObjectGroup.choices}
 
         # Monta grupos “prontos” para o template (sem regroup + sem get_item)
         groups = OrderedDict()
-        for obj in list(exam_objects_qs):
+        for obj in document.exam_objects:
             key = (obj.group_key or "").strip() or ExamObjectGroup.OTHER
             groups.setdefault(
                 key,
@@ -160,7 +129,7 @@ class ReportCaseDetailView(LoginRequiredMixin, ReportCaseAuthorQuerySetMixin, De
                     "objects": [],
                 },
             )
-            groups[key]["objects"].append(obj)
+            groups[key]["objects"].append({"obj": obj, "images": document.images_for(obj)})
 
         # ✅ Ordem editorial fixa dos grupos (detail)
         GROUP_ORDER = [
@@ -197,50 +166,29 @@ class ReportCaseDetailView(LoginRequiredMixin, ReportCaseAuthorQuerySetMixin, De
 
         try:
             obj_id = uuid.UUID(obj_id_raw)
-            
-            # --- PROCESSAMENTO DA IMAGEM ---
-            img = Image.open(file)
-            
-            # Converte para RGB se for RGBA (evita erro ao salvar em JPEG)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-
-            # Regra dos 14cm (14 * 114.2857 ≈ 1600px)
-            MAX_WIDTH = 1600
-            
-            orig_width, orig_height = img.size
-            if orig_width > MAX_WIDTH:
-                ratio = MAX_WIDTH / float(orig_width)
-                new_height = int(float(orig_height) * float(ratio))
-                img = img.resize((MAX_WIDTH, new_height), Image.Resampling.LANCZOS)
-                final_width, final_height = MAX_WIDTH, new_height
-            else:
-                final_width, final_height = orig_width, orig_height
-
-            # Salva a imagem processada em um buffer de memória
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=85)
-            buffer.seek(0)
-            
-            # Substitui o arquivo original pelo processado
-            new_file_name = f"{uuid.uuid4()}.jpg"
-            processed_file = ContentFile(buffer.read(), name=new_file_name)
-            # -------------------------------
 
+            # Apenas o cabeçalho é lido aqui: orientação EXIF, redimensionamento
+            # e versões de tela ficam com o worker `process_object_images`.
             ct = ContentType.objects.get(app_label=app_label, model=model_name)
+            new_image = ObjectImage(content_type=ct, object_id=obj_id)
+            if getattr(new_image.content_object, 'report_case_id', None) != self.object.pk:
+                return JsonResponse({'error': 'Objeto não encontrado neste laudo.'}, status=400)
 
-            # Criar o objeto com as novas dimensões
-            new_image = ObjectImage.objects.create(
-                content_type=ct,
-                object_id=obj_id,
-                image=processed_file,
-                original_width=final_width,
-                original_height=final_height
-            )
+            # conteúdo já enviado antes (outro objeto/laudo) não é regravado
+            try:
+                attach_upload(new_image, file)
+            except ImageTooLarge as exc:
+                return JsonResponse({'error': str(exc)}, status=400)
+
+            with transaction.atomic():
+                new_image.save()
 
             return JsonResponse({
                 'success': True,
-                'url': new_image.image.url
+                'id': str(new_image.pk),
+                'url': new_image.image.url,
+                'status': new_image.processing_status,
+                'status_url': reverse('report_maker:image_status', kwargs={'pk': new_image.pk}),
             })
 
         except Exception as e:
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
@@ -11,6 +12,7 @@ from django.views.generic import UpdateView
 from accounts.mixins import CanEditReportsRequiredMixin
 from report_maker.forms.report_case_close import ReportCaseCloseForm
 from report_maker.models import ReportCase
+from report_maker.utils.pdf_render_queue import enqueue_report_pdf
 
 
 class ReportCaseCloseView(
@@ -24,8 +26,9 @@ class ReportCaseCloseView(
     Conceito atual:
     - concluir o laudo significa CONGELAR seu estado lógico;
     - após a conclusão, o laudo não pode mais ser editado;
-    - o PDF é um ARTEFATO DERIVADO e pode ser gerado a qualquer momento,
-      não sendo mais exigido no fluxo de conclusão.
+    - o PDF é um ARTEFATO DERIVADO: ao concluir, a renderização do PDF final
+      (imutável) é enfileirada; se o worker ainda não o tiver gerado, o
+      primeiro download o renderiza e grava.
 
     Responsabilidades:
     - validar acesso do autor;
@@ -67,6 +70,9 @@ class ReportCaseCloseView(
     def form_valid(self, form):
         report: ReportCase = form.save()
 
+        user = self.request.user
+        transaction.on_commit(lambda: enqueue_report_pdf(report, user))
+
         messages.success(
             self.request,
             "Laudo concluído e congelado com sucesso."
@@ -0,0 +1,183 @@
+# report_maker/views/report_document.py
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from report_maker.models import ExamObject, ReportCase, ReportTextBlock
+from report_maker.models.exam_base import downcast_exam_objects
+from report_maker.models.images import ObjectImage
+from report_maker.views.report_outline import (
+    OutlineGroup,
+    OutlineGroupUI,
+    build_outline_ui,
+    build_report_outline,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ReportDocument:
+    """
+    Documento do laudo já carregado: o que a showpage, o detalhe e o PDF
+    precisam para renderizar, sem novas consultas ao banco.
+    """
+
+    report: ReportCase
+    text_blocks: list[ReportTextBlock]
+    text_blocks_by_placement: dict[str, list[ReportTextBlock]]
+    preamble: str
+    exam_objects: list[ExamObject]  # instâncias base, concrete já em cache
+    concrete_objects: list[Any]
+    ct_map: dict
+    images_by_key: dict[tuple[int, Any], list[ObjectImage]]
+    outline: list[OutlineGroup]
+    next_top: int
+    outline_ui: list[OutlineGroupUI]
+
+    def images_for(self, obj) -> list[ObjectImage]:
+        """Imagens (ordenadas) de um objeto de exame (base ou concreto)."""
+        concrete = getattr(obj, "concrete", obj)
+        ct = self.ct_map.get(concrete.__class__)
+        if not ct:
+            return []
+        return self.images_by_key.get((ct.id, concrete.pk), [])
+
+
+class ReportDocumentAssembler:
+    """
+    Carrega o grafo do laudo num número FIXO de consultas, qualquer que seja
+    a quantidade de objetos, imagens ou blocos de texto:
+
+    1. blocos de texto (agrupados por placement em memória);
+    2. objetos de exame (base) e, para cada classe concreta presente, uma
+       consulta pelas filhas (downcast_exam_objects);
+    3. content types das classes concretas (cache do ContentType);
+    4. imagens de todos os objetos (uma única consulta GFK).
+
+    Os campos do próprio laudo usados pelos blocos iniciais (ex.: author)
+    devem vir no queryset da view (select_related).
+    """
+
+    def __init__(self, report: ReportCase, *, include_toc_text: bool = False):
+        self.report = report
+        # Texto "Sumário" do usuário: exibido na tela; o PDF gera o próprio sumário.
+        self.include_toc_text = include_toc_text
+
+    # ---------------------------------------------------------------------
+    # Carga
+    # ---------------------------------------------------------------------
+    def _load_text_blocks(self) -> list[ReportTextBlock]:
+        return list(self.report.text_blocks.all().order_by("placement", "position", "created_at"))
+
+    def _load_exam_objects(self) -> list[ExamObject]:
+        return list(self.report.exam_objects.all().order_by("order", "created_at"))
+
+    @staticmethod
+    def _load_images(concrete_objects: list, ct_map: dict) -> dict[tuple[int, Any], list[ObjectImage]]:
+        ids_by_ct = defaultdict(list)
+        for obj in concrete_objects:
+            ct = ct_map.get(obj.__class__)
+            if ct:
+                ids_by_ct[ct.id].append(obj.pk)
+
+        q = Q()
+        for ct_id, ids in ids_by_ct.items():
+            q |= Q(content_type_id=ct_id, object_id__in=ids)
+
+        images_by_key: dict[tuple[int, Any], list[ObjectImage]] = defaultdict(list)
+        if q:
+            imgs = ObjectImage.objects.filter(q).order_by("index", "id").select_related("content_type")
+            for img in imgs:
+                images_by_key[(img.content_type_id, img.object_id)].append(img)
+        return images_by_key
+
+    # ---------------------------------------------------------------------
+    # Blocos virtuais (antes/depois dos objetos)
+    # ---------------------------------------------------------------------
+    def _virtual_blocks(self, by_placement: dict[str, list[ReportTextBlock]]) -> tuple[list[dict], list[dict]]:
+        placements = ReportTextBlock.Placement
+
+        def first_body(placement) -> str:
+            blocks = by_placement.get(placement) or []
+            return (blocks[0].body or "") if blocks else ""
+
+        def joined_body(placement) -> str:
+            return "\n\n".join(tb.body or "" for tb in by_placement.get(placement) or [])
+
+        def text_section(label: str, value: str) -> dict:
+            return {"kind": "text_section", "label": label, "value": value, "fmt": "md"}
+
+        prepend_blocks: list[dict] = []
+
+        prepend_labels = [("Resumo", placements.SUMMARY)]
+        if self.include_toc_text:
+            prepend_labels.append(("Sumário", placements.TOC))
+        prepend_labels.append(("Histórico", placements.HISTORIC))
+
+        for label, placement in prepend_labels:
+            txt = first_body(placement)
+            if txt.strip():
+                prepend_blocks.append(text_section(label, txt))
+
+        prepend_blocks.extend(self.report.get_render_blocks() or [])
+
+        append_blocks: list[dict] = []
+        for label, placement in (
+            ("Considerações Finais", placements.FINAL_CONSIDERATIONS),
+            ("Conclusão", placements.CONCLUSION),
+        ):
+            txt = joined_body(placement)
+            if txt.strip():
+                append_blocks.append(text_section(label, txt))
+
+        return prepend_blocks, append_blocks
+
+    # ---------------------------------------------------------------------
+    # API
+    # ---------------------------------------------------------------------
+    def assemble(self) -> ReportDocument:
+        report = self.report
+
+        text_blocks = self._load_text_blocks()
+        by_placement: dict[str, list[ReportTextBlock]] = {k: [] for k, _ in ReportTextBlock.Placement.choices}
+        for tb in text_blocks:
+            by_placement.setdefault(tb.placement, []).append(tb)
+
+        preamble_blocks = by_placement.get(ReportTextBlock.Placement.PREAMBLE) or []
+        preamble_text = preamble_blocks[0].body if preamble_blocks else ""
+        preamble = (preamble_text or "").strip() or report.preamble
+
+        exam_objects = self._load_exam_objects()
+        concrete_objects = downcast_exam_objects(exam_objects)
+
+        models_set = {o.__class__ for o in concrete_objects}
+        ct_map = ContentType.objects.get_for_models(*models_set) if models_set else {}
+        images_by_key = self._load_images(concrete_objects, ct_map)
+
+        prepend_blocks, append_blocks = self._virtual_blocks(by_placement)
+        outline, next_top = build_report_outline(
+            report=report,
+            exam_objects_qs=exam_objects,
+            text_blocks_qs=text_blocks,
+            start_at=1,
+            prepend_blocks=prepend_blocks,
+            append_blocks=append_blocks,
+        )
+
+        return ReportDocument(
+            report=report,
+            text_blocks=text_blocks,
+            text_blocks_by_placement=by_placement,
+            preamble=preamble,
+            exam_objects=exam_objects,
+            concrete_objects=concrete_objects,
+            ct_map=ct_map,
+            images_by_key=images_by_key,
+            outline=outline,
+            next_top=next_top,
+            outline_ui=build_outline_ui(outline, ct_map, images_by_key),
+        )
@@ -1,14 +1,16 @@
 # myreport/report_maker/views/report_outline.py
 from __future__ import annotations
 
-import base64
 import re
 from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Iterable, Optional
 
-from report_maker.models import ReportTextBlock
-from report_maker.models.exam_base import ExamObjectGroup
+from report_maker.models import ReportCase, ReportTextBlock
+from report_maker.models.exam_base import ExamObjectGroup, downcast_exam_objects
+from report_maker.utils.qrcodes import qrcode_url
+from report_maker.utils.rendered_html import chunk_key
+from report_maker.utils.rendered_html import split_markdown_h2_sections as _split_markdown_h2_sections
 
 
 def _with_dash(number: str) -> str:
@@ -33,39 +35,6 @@ def _numbered(*parts: object, enabled: bool = True) -> str:
     return _with_dash(_join_number(*parts))
 
 
-def _split_markdown_h2_sections(md_text: str) -> list[tuple[str, str]]:
-    """Divide um texto Markdown em sub-seções a partir de headings H2."""
-    text = (md_text or "").strip()
-    if not text:
-        return []
-
-    heading_re = re.compile(r"^\s*##\s+(?P<label>.+?)\s*$")
-    lines = text.splitlines()
-
-    found_heading = False
-    sections: list[tuple[str, str]] = []
-    current_label = ""
-    buffer: list[str] = []
-
-    for line in lines:
-        match = heading_re.match(line)
-        if match:
-            found_heading = True
-            buffered_text = "\n".join(buffer).strip()
-            if buffered_text:
-                sections.append((current_label, buffered_text))
-            current_label = match.group("label").strip()
-            buffer = []
-            continue
-        buffer.append(line)
-
-    buffered_text = "\n".join(buffer).strip()
-    if buffered_text:
-        sections.append((current_label, buffered_text))
-
-    return sections if found_heading else []
-
-
 @dataclass(frozen=True)
 class OutlineSection:
     number: str
@@ -74,7 +43,8 @@ class OutlineSection:
     fmt: str
     kind: str = "section_field"
     maps_url: Optional[str] = None
-    qr_data_uri: Optional[str] = None
+    qr_url: Optional[str] = None
+    html: Optional[str] = None  # HTML pré-renderizado na gravação (render-on-write)
 
 
 @dataclass(frozen=True)
@@ -94,9 +64,116 @@ class OutlineGroup:
     objects: list[OutlineObject]
 
 
-def _png_bytes_to_data_uri(png_bytes: bytes) -> str:
-    b64 = base64.b64encode(png_bytes).decode("ascii")
-    return f"data:image/png;base64,{b64}"
+# ---------------------------------------------------------------------
+# View-model para os templates (tela e PDF)
+# ---------------------------------------------------------------------
+# Registros imutáveis e com __slots__ que apenas REFERENCIAM a outline e os
+# objetos do ORM. Substituem dataclasses.asdict(), que fazia deepcopy de cada
+# instância de modelo (e dos data URIs de QR code) a cada renderização.
+
+
+@dataclass(frozen=True, slots=True)
+class OutlineFigureUI:
+    img: Any
+    figure_label: str
+
+
+@dataclass(frozen=True, slots=True)
+class OutlineSectionUI:
+    number: str
+    label: str
+    text: str
+    fmt: str
+    kind: str
+    maps_url: Optional[str]
+    qr_url: Optional[str]
+    html: Optional[str]
+    anchor_id: str
+
+
+@dataclass(frozen=True, slots=True)
+class OutlineObjectUI:
+    number: str
+    obj: Any
+    title: str
+    sections: tuple[OutlineSectionUI, ...]
+    images: tuple[OutlineFigureUI, ...]
+    anchor_id: str
+    html: Optional[str] = None  # bloco já renderizado (utils.render_fragments)
+
+
+@dataclass(frozen=True, slots=True)
+class OutlineGroupUI:
+    number: str
+    group_key: str
+    group_label: str
+    intro_text: str
+    objects: tuple[OutlineObjectUI, ...]
+
+
+def build_outline_ui(outline: list[OutlineGroup], ct_map: dict, images_by_key: dict) -> list[OutlineGroupUI]:
+    """
+    Converte a outline no view-model dos templates: âncoras para o sumário e
+    numeração sequencial das figuras (imagens de cada objeto).
+    """
+    figure_counter = 1
+    outline_ui: list[OutlineGroupUI] = []
+
+    for g_index, group in enumerate(outline, start=1):
+        objects_ui: list[OutlineObjectUI] = []
+
+        for o_index, outlined_obj in enumerate(group.objects, start=1):
+            obj = outlined_obj.obj
+
+            sections_ui = tuple(
+                OutlineSectionUI(
+                    number=section.number,
+                    label=section.label,
+                    text=section.text,
+                    fmt=section.fmt,
+                    kind=section.kind,
+                    maps_url=section.maps_url,
+                    qr_url=section.qr_url,
+                    html=section.html,
+                    anchor_id=f"sec-{g_index}-{o_index}-{s_index}",
+                )
+                for s_index, section in enumerate(outlined_obj.sections, start=1)
+            )
+
+            if isinstance(obj, ReportCase):
+                ct_id = None
+            else:
+                ct = ct_map.get(obj.__class__)
+                ct_id = ct.id if ct else None
+
+            images_ui: list[OutlineFigureUI] = []
+            if ct_id:
+                for img in images_by_key.get((ct_id, obj.pk), []):
+                    images_ui.append(OutlineFigureUI(img=img, figure_label=f"Figura {figure_counter}"))
+                    figure_counter += 1
+
+            objects_ui.append(
+                OutlineObjectUI(
+                    number=outlined_obj.number,
+                    obj=obj,
+                    title=outlined_obj.title,
+                    sections=sections_ui,
+                    images=tuple(images_ui),
+                    anchor_id=f"obj-{g_index}-{o_index}",
+                )
+            )
+
+        outline_ui.append(
+            OutlineGroupUI(
+                number=group.number,
+                group_key=group.group_key,
+                group_label=group.group_label,
+                intro_text=group.intro_text,
+                objects=tuple(objects_ui),
+            )
+        )
+
+    return outline_ui
 
 
 def _get_group_intro_map(text_blocks_qs: Iterable[ReportTextBlock]) -> dict[str, str]:
@@ -112,7 +189,7 @@ def _expand_markdown_headings(
 ) -> list[tuple[str, str, str, str, str | None, str | None]]:
     expanded: list[tuple[str, str, str, str, str | None, str | None]] = []
 
-    for kind, label, text, fmt, maps_url, qr_data_uri in resolved:
+    for kind, label, text, fmt, maps_url, qr_url in resolved:
         fmt_normalized = (fmt or "").strip().lower()
         raw_text = text or ""
 
@@ -124,12 +201,12 @@ def _expand_markdown_headings(
         )
 
         if not is_markdown_like:
-            expanded.append((kind, label, text, fmt, maps_url, qr_data_uri))
+            expanded.append((kind, label, text, fmt, maps_url, qr_url))
             continue
 
         md_sections = _split_markdown_h2_sections(raw_text)
         if not md_sections:
-            expanded.append((kind, label, text, fmt_normalized, maps_url, qr_data_uri))
+            expanded.append((kind, label, text, fmt_normalized, maps_url, qr_url))
             continue
 
         for idx, (md_label, md_text) in enumerate(md_sections):
@@ -138,12 +215,12 @@ def _expand_markdown_headings(
 
             if md_label:
                 expanded.append(
-                    ("markdown_heading", md_label, md_text, fmt_normalized, maps_url, qr_data_uri)
+                    ("markdown_heading", md_label, md_text, fmt_normalized, maps_url, qr_url)
                 )
                 continue
 
             fallback_label = label if idx == 0 else ""
-            expanded.append((kind, fallback_label, md_text, fmt_normalized, maps_url, qr_data_uri))
+            expanded.append((kind, fallback_label, md_text, fmt_normalized, maps_url, qr_url))
 
     return expanded
 
@@ -164,6 +241,20 @@ def build_report_outline(
     outline: list[OutlineGroup] = []
     n_top = start_at
 
+    objects = downcast_exam_objects(exam_objects_qs)
+    text_blocks = list(text_blocks_qs)
+
+    # HTML pré-renderizado na gravação (ReportTextBlock / ExamObject.rendered_html),
+    # indexado pelo hash de cada trecho; ausente -> o template renderiza o texto.
+    rendered_lookup: dict[str, str] = {}
+    for source in (*text_blocks, *objects):
+        rendered_lookup.update(getattr(source, "rendered_html", None) or {})
+
+    def _stored_html(text: str) -> Optional[str]:
+        if not rendered_lookup:
+            return None
+        return rendered_lookup.get(chunk_key(text))
+
     def _add_virtual_groups(block_list: list[dict], current_n: int) -> int:
         """Converte blocos virtuais em OutlineGroups numerados, com suporte a headings Markdown."""
         for b in block_list:
@@ -203,14 +294,14 @@ def build_report_outline(
 
             if not resolved:
                 out_sections.append(
-                    OutlineSection(number="", label="", text=text, fmt=fmt)
+                    OutlineSection(number="", label="", text=text, fmt=fmt, html=_stored_html(text))
                 )
             else:
                 base_number = str(current_n)
                 child_index = 0
                 first_section_consumed = False
 
-                for sec_kind, sec_label, sec_text, sec_fmt, maps_url, qr_data_uri in resolved:
+                for sec_kind, sec_label, sec_text, sec_fmt, maps_url, qr_url in resolved:
                     has_label = bool((sec_label or "").strip())
 
                     if not first_section_consumed:
@@ -223,7 +314,8 @@ def build_report_outline(
                                 fmt=sec_fmt,
                                 kind=sec_kind,
                                 maps_url=maps_url,
-                                qr_data_uri=qr_data_uri,
+                                qr_url=qr_url,
+                                html=_stored_html(sec_text),
                             )
                         )
                         continue
@@ -238,7 +330,8 @@ def build_report_outline(
                                 fmt=sec_fmt,
                                 kind=sec_kind,
                                 maps_url=maps_url,
-                                qr_data_uri=qr_data_uri,
+                                qr_url=qr_url,
+                                html=_stored_html(sec_text),
                             )
                         )
                         continue
@@ -251,7 +344,8 @@ def build_report_outline(
                             fmt=sec_fmt,
                             kind=sec_kind,
                             maps_url=maps_url,
-                            qr_data_uri=qr_data_uri,
+                            qr_url=qr_url,
+                            html=_stored_html(sec_text),
                         )
                     )
 
@@ -295,13 +389,12 @@ def build_report_outline(
             return (GROUP_RANK[gk], gk)
         return (9_000, gk)
 
-    objects = [o.concrete for o in exam_objects_qs]
     grouped: OrderedDict[str, list[Any]] = OrderedDict()
     for obj in objects:
         gk = getattr(obj, "group_key", None) or UNGROUPED
         grouped.setdefault(gk, []).append(obj)
 
-    intro_by_group = _get_group_intro_map(text_blocks_qs)
+    intro_by_group = _get_group_intro_map(text_blocks)
 
     for group_key in sorted(grouped.keys(), key=_group_sort_key):
         group_objs = grouped[group_key]
@@ -329,17 +422,20 @@ def build_report_outline(
                 fmt = b.get("fmt", "text").strip()
                 text = ""
                 maps_url = None
-                qr_data_uri = None
+                qr_url = None
 
                 if kind == "geo_location":
-                    text = (getattr(obj, b.get("field", "geo_location"), "") or "").strip()
+                    field = b.get("field", "geo_location")
+                    text = (getattr(obj, field, "") or "").strip()
                     if text:
+                        # interpretação gravada no save (HasGeoLocationMixin.geo_parsed)
+                        data = getattr(obj, "geo_data", None) if field == "geo_location" else None
                         parser = getattr(obj, "parse_location_line", None)
-                        if callable(parser):
-                            data = parser(text) or {}
-                            maps_url = data.get("maps_url")
-                            if data.get("qrcode_png"):
-                                qr_data_uri = _png_bytes_to_data_uri(data["qrcode_png"])
+                        if data is None and callable(parser):
+                            data = parser(text)
+                        maps_url = (data or {}).get("maps_url")
+                        # QR Code persistido (qrcodes/<sha256>.png) e referenciado por URL
+                        qr_url = qrcode_url(maps_url) if maps_url else None
                 elif kind == "section_field":
                     text = (getattr(obj, b.get("field", ""), "") or "").strip()
                 elif kind == "render_section":
@@ -348,7 +444,7 @@ def build_report_outline(
                         text = (getter(b.get("key")) or "").strip()
 
                 if text:
-                    resolved.append((kind, label, text, fmt, maps_url, qr_data_uri))
+                    resolved.append((kind, label, text, fmt, maps_url, qr_url))
 
             resolved = _expand_markdown_headings(resolved)
             out_sections: list[OutlineSection] = []
@@ -357,7 +453,7 @@ def build_report_outline(
             current_parent_number = ""
             markdown_child_index = 0
 
-            for kind, label, text, fmt, maps_url, qr_data_uri in resolved:
+            for kind, label, text, fmt, maps_url, qr_url in resolved:
                 has_label = bool((label or "").strip())
 
                 if kind == "markdown_heading":
@@ -371,7 +467,8 @@ def build_report_outline(
                                 fmt,
                                 kind,
                                 maps_url,
-                                qr_data_uri,
+                                qr_url,
+                                _stored_html(text),
                             )
                         )
                     else:
@@ -390,7 +487,8 @@ def build_report_outline(
                                 fmt,
                                 kind,
                                 maps_url,
-                                qr_data_uri,
+                                qr_url,
+                                _stored_html(text),
                             )
                         )
                     continue
@@ -411,7 +509,8 @@ def build_report_outline(
                             fmt,
                             kind,
                             maps_url,
-                            qr_data_uri,
+                            qr_url,
+                            _stored_html(text),
                         )
                     )
                 else:
@@ -423,7 +522,8 @@ def build_report_outline(
                             fmt,
                             kind,
                             maps_url,
-                            qr_data_uri,
+                            qr_url,
+                            _stored_html(text),
                         )
                     )
 
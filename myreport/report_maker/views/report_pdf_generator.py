@@ -1,29 +1,33 @@
 from __future__ import annotations
 
+import base64
 import mimetypes
 import os
 import re
 import sys
-from collections import defaultdict
-from dataclasses import asdict
+from functools import partial
 from pathlib import Path
-from urllib.parse import urlparse
+from urllib.parse import unquote, urlencode, urlparse
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.contrib.contenttypes.models import ContentType
-from django.contrib.staticfiles import finders
-from django.db.models import Q
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404, render
 from django.template.loader import render_to_string
+from django.utils.http import parse_etags
 
-from weasyprint import CSS, HTML
+from weasyprint import HTML
 from weasyprint.urls import default_url_fetcher
 
-from report_maker.models import ReportCase, ReportTextBlock
-from report_maker.models.images import ObjectImage
-from report_maker.views.report_outline import build_report_outline
+from report_maker.models import ReportCase, ReportRenderJob
+from report_maker.utils.image_derivatives import ensure_print_derivative, print_width_px
+from report_maker.utils.pdf_context import SHARED_MEDIA_RE, get_pdf_context
+from report_maker.utils.pdf_pool import PdfRenderCancelled, render_report_pdf
+from report_maker.utils.pdf_render_queue import enqueue_report_pdf
+from report_maker.utils.render_fragments import attach_object_fragments
+from report_maker.views.report_document import ReportDocumentAssembler
+from report_maker.views.report_outline import OutlineGroupUI
 
 
 if sys.platform == "win32":
@@ -33,8 +37,7 @@ if sys.platform == "win32":
         os.environ["PATH"] = msys_bin + os.pathsep + os.environ.get("PATH", "")
 
 
-def _build_header_from_user(request) -> dict:
-    user = request.user
+def _build_header_from_user(user) -> dict:
     team = user.team
     nucleus = user.nucleus
     inst = user.institution
@@ -136,29 +139,110 @@ def django_url_fetcher(url: str):
             "redirected_url": url,
         }
 
+    # estáticos e emblemas: caminho e conteúdo reaproveitados entre
+    # renderizações (contexto do processo, validado por mtime)
+    context = get_pdf_context()
+
     if path.startswith(media_url):
         rel = path[len(media_url):].lstrip("/")
         file_path = Path(settings.MEDIA_ROOT) / Path(*rel.split("/"))
         if file_path.exists():
+            if SHARED_MEDIA_RE.match(rel):
+                return context.asset(file_path, url)
             return _open_file(file_path)
 
     if path.startswith(static_url):
         rel = path[len(static_url):].lstrip("/")
-        found = finders.find(rel)
+        found = context.find_static(rel)
         if found:
-            return _open_file(Path(found))
+            return context.asset(found, url)
 
     return default_url_fetcher(url)
 
 
-def _collect_toc_items(outline_ui: list[dict]) -> list[dict]:
+def make_print_url_fetcher(images):
+    """
+    url_fetcher do PDF que troca cada figura do laudo pelo seu derivado de
+    impressão (JPEG na largura impressa, ver utils.image_derivatives).
+
+    Demais URLs (e figuras sem derivado) seguem para django_url_fetcher.
+    """
+    media_url = (getattr(settings, "MEDIA_URL", "") or "/media/").rstrip("/") + "/"
+    # a mesma foto (blob compartilhado) pode aparecer em mais de uma figura:
+    # vale o derivado da maior largura impressa
+    by_name = {}
+    for img in images:
+        if not img.image:
+            continue
+        current = by_name.get(img.image.name)
+        if current is None or print_width_px(img) > print_width_px(current):
+            by_name[img.image.name] = img
+
+    def fetcher(url: str):
+        path = urlparse(url).path or ""
+        if path.startswith(media_url):
+            img = by_name.get(unquote(path[len(media_url):]).lstrip("/"))
+            if img is not None:
+                name = ensure_print_derivative(img)
+                if name:
+                    return {
+                        "file_obj": img.image.storage.open(name, "rb"),
+                        "mime_type": "image/jpeg",
+                        "redirected_url": url,
+                    }
+        return django_url_fetcher(url)
+
+    return fetcher
+
+
+# Figura sem versão de tela no rascunho: retângulo cinza no lugar da foto
+DRAFT_IMAGE_PLACEHOLDER = (
+    b'<svg xmlns="http://www.w3.org/2000/svg" width="400" height="300" viewBox="0 0 400 300">'
+    b'<rect width="400" height="300" fill="#e6e6e6" stroke="#999999" stroke-width="4"/>'
+    b"</svg>"
+)
+
+
+def make_draft_url_fetcher(images):
+    """
+    url_fetcher do PDF em modo rascunho: cada figura sai da menor versão de
+    tela já gerada (ObjectImage.renditions, JPEG) ou, sem ela, de um
+    placeholder. Nenhum derivado é gerado nem decodificado na renderização.
+    """
+    media_url = (getattr(settings, "MEDIA_URL", "") or "/media/").rstrip("/") + "/"
+    by_name = {img.image.name: img for img in images if img.image}
+
+    def fetcher(url: str):
+        path = urlparse(url).path or ""
+        if path.startswith(media_url):
+            img = by_name.get(unquote(path[len(media_url):]).lstrip("/"))
+            if img is not None:
+                renditions = sorted(
+                    (r for r in img.renditions or [] if r.get("jpeg")), key=lambda r: r.get("width") or 0
+                )
+                if renditions:
+                    try:
+                        return {
+                            "file_obj": img.image.storage.open(renditions[0]["jpeg"], "rb"),
+                            "mime_type": "image/jpeg",
+                            "redirected_url": url,
+                        }
+                    except OSError:
+                        pass
+                return {"string": DRAFT_IMAGE_PLACEHOLDER, "mime_type": "image/svg+xml", "redirected_url": url}
+        return django_url_fetcher(url)
+
+    return fetcher
+
+
+def _collect_toc_items(outline_ui: list[OutlineGroupUI]) -> list[dict]:
     items: list[dict] = []
 
     for group in outline_ui:
-        for obj in group.get("objects", []):
-            obj_number = (obj.get("number") or "").strip()
-            obj_title = (obj.get("title") or "").strip()
-            obj_anchor = obj.get("anchor_id")
+        for obj in group.objects:
+            obj_number = (obj.number or "").strip()
+            obj_title = (obj.title or "").strip()
+            obj_anchor = obj.anchor_id
 
             if obj_title:
                 display_text = f"{obj_number} {obj_title}".strip()
@@ -172,10 +256,10 @@ def _collect_toc_items(outline_ui: list[dict]) -> list[dict]:
                     }
                 )
 
-            for section in obj.get("sections", []):
-                section_number = (section.get("number") or "").strip()
-                section_label = (section.get("label") or "").strip()
-                section_anchor = section.get("anchor_id")
+            for section in obj.sections:
+                section_number = (section.number or "").strip()
+                section_label = (section.label or "").strip()
+                section_anchor = section.anchor_id
 
                 if section_label and section_number:
                     display_text = f"{section_number} {section_label}".strip()
@@ -218,50 +302,30 @@ def _apply_toc_pages(toc_items: list[dict], bookmark_pages: dict[str, int], offs
     return resolved
 
 
-def _normalize_outline_ui(outline: list, ct_map: dict, images_by_key: dict, report: ReportCase) -> list[dict]:
-    figure_counter = 1
-    outline_ui: list[dict] = []
-
-    for g_index, group in enumerate(outline, start=1):
-        g_dict = asdict(group)
-        g_objects_ui: list[dict] = []
-
-        for o_index, outlined_obj in enumerate(group.objects, start=1):
-            o_dict = asdict(outlined_obj)
-            obj = outlined_obj.obj
-
-            o_dict["anchor_id"] = f"obj-{g_index}-{o_index}"
-
-            for s_index, section in enumerate(o_dict.get("sections", []), start=1):
-                section["anchor_id"] = f"sec-{g_index}-{o_index}-{s_index}"
-
-            if isinstance(obj, ReportCase):
-                ct_id = None
-            else:
-                ct = ct_map.get(obj.__class__)
-                ct_id = ct.id if ct else None
-
-            images_ui = []
-            if ct_id:
-                for img in images_by_key.get((ct_id, obj.pk), []):
-                    images_ui.append(
-                        {
-                            "img": img,
-                            "figure_label": f"Figura {figure_counter}",
-                        }
-                    )
-                    figure_counter += 1
-
-            o_dict["images"] = images_ui
-            g_objects_ui.append(o_dict)
-
-        g_dict["objects"] = g_objects_ui
-        outline_ui.append(g_dict)
-
-    return outline_ui
-
-
-def _render_document(*, request, report, header, preamble, outline_ui, next_top, toc_items, include_auto_toc):
+# Sumário automático: laudos com mais de TOC_MIN_PAGES páginas e TOC_MIN_TITLES títulos
+TOC_MIN_PAGES = 20
+TOC_MIN_TITLES = 10
+# Âncora (report_pdf.html) do primeiro elemento após o sumário
+TOC_END_ANCHOR = "fim-sumario"
+
+
+def _render_document(
+    *,
+    report,
+    header,
+    preamble,
+    outline_ui,
+    next_top,
+    toc_items,
+    include_auto_toc,
+    toc_only=False,
+    total_pages=None,
+    draft=False,
+    context=None,
+    base_url,
+    request=None,
+    url_fetcher=django_url_fetcher,
+):
     html = render_to_string(
         "report_maker/report_pdf.html",
         {
@@ -273,228 +337,296 @@ def _render_document(*, request, report, header, preamble, outline_ui, next_top,
             "is_pdf": True,
             "include_auto_toc": include_auto_toc,
             "toc_items": toc_items,
+            "toc_only": toc_only,
+            "toc_end_anchor": TOC_END_ANCHOR,
+            "total_pages": total_pages,
         },
         request=request,
     )
 
-    css_path = finders.find("report_maker/css/report_pdf.css")
-    if not css_path:
-        raise FileNotFoundError("CSS do PDF não encontrado: report_maker/css/report_pdf.css")
-
-    base_url = request.build_absolute_uri("/")
+    font_config, stylesheets = (context or get_pdf_context()).styles(draft=draft)
 
     html_obj = HTML(
         string=html,
         base_url=base_url,
-        url_fetcher=django_url_fetcher,
+        url_fetcher=url_fetcher,
+    )
+    document = html_obj.render(
+        stylesheets=stylesheets,
+        font_config=font_config,
     )
-    document = html_obj.render(stylesheets=[CSS(filename=css_path)])
     return document
 
 
-@login_required
-def reportPDFGenerator(request, pk):
-    report = get_object_or_404(
-        ReportCase.objects.select_related("author", "institution", "nucleus", "team"),
-        pk=pk,
-        author=request.user,
+def _toc_page_count(document) -> int | None:
+    """Páginas ocupadas por "LAUDO Nº" + sumário: índice da página com TOC_END_ANCHOR."""
+    for index, page in enumerate(document.pages):
+        if TOC_END_ANCHOR in page.anchors:
+            return index
+    return None
+
+
+def _assemble_with_toc(body_document, toc_document, toc_pages: int):
+    """
+    Monta o documento final a partir de dois conjuntos de páginas já diagramados.
+
+    As primeiras `toc_pages` páginas do corpo ("LAUDO Nº" + sumário sem números)
+    dão lugar às páginas do sumário numerado, com a mesma diagramação; as demais
+    mantêm a numeração "Página N de M" da única diagramação do corpo.
+    """
+    return body_document.copy(list(toc_document.pages) + list(body_document.pages[toc_pages:]))
+
+
+def _pdf_response(pdf_bytes: bytes, filename: str) -> HttpResponse:
+    response = HttpResponse(pdf_bytes, content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.pdf"'
+    response["X-Content-Type-Options"] = "nosniff"
+    response["Content-Length"] = str(len(pdf_bytes))
+    return response
+
+
+def report_pdf_filename(report: ReportCase, *, draft: bool = False) -> str:
+    """
+    Nome do arquivo PDF (sem extensão) derivado do número e da tipificação
+    do laudo; o rascunho leva o sufixo "_rascunho".
+    """
+
+    def normalize(value: str) -> str:
+        value = value.replace("/", "_")
+        value = re.sub(r"[^a-zA-Z0-9_]", "", value)
+        return value.lower()
+
+    number_part = normalize(report.report_number)
+    type_part = normalize(report.criminal_typification)
+    name = f"{number_part}${type_part}"
+    return f"{name}_rascunho" if draft else name
+
+
+def build_report_pdf(
+    report: ReportCase,
+    *,
+    user,
+    base_url: str,
+    request=None,
+    draft: bool = False,
+    should_continue=None,
+) -> bytes:
+    """
+    Executa o pipeline completo do PDF do laudo (outline, markdown, WeasyPrint)
+    e devolve os bytes do arquivo.
+
+    Não depende de request: é usado tanto pela view síncrona quanto pelo
+    worker da fila de renderização (ReportRenderJob).
+
+    draft=True (conferência de diagramação durante a redação): uma única
+    diagramação, sem sumário; figuras pela versão de tela ou placeholder
+    (make_draft_url_fetcher) e marca d'água "RASCUNHO". Blocos e fórmulas
+    vêm dos mesmos caches do modo final.
+
+    should_continue (opcional) é consultado antes de cada diagramação; se
+    devolver False (job substituído, ver pdf_pool.job_still_running), a
+    renderização é abandonada com PdfRenderCancelled.
+    """
+    can_edit = bool(getattr(report, "can_edit", False))
+    header = _build_header_from_user(user) if can_edit else _build_header_from_snapshots(report)
+
+    document = ReportDocumentAssembler(report).assemble()
+    preamble = document.preamble
+    # bloco de cada objeto vindo do cache de fragmentos (só os alterados são renderizados)
+    outline_ui = attach_object_fragments(document.outline_ui, target="pdf")
+    next_top = document.next_top
+    raw_toc_items = _collect_toc_items(outline_ui)
+    make_url_fetcher = make_draft_url_fetcher if draft else make_print_url_fetcher
+    url_fetcher = make_url_fetcher(
+        img for images in document.images_by_key.values() for img in images
     )
 
-    can_edit = bool(getattr(report, "can_edit", False))
-    header = _build_header_from_user(request) if can_edit else _build_header_from_snapshots(report)
+    # CSS e fontes do processo, compartilhados entre o corpo e o sumário (as
+    # páginas dos dois documentos são combinadas num único PDF) e entre laudos.
+    context = get_pdf_context()
 
-    text_blocks_qs = report.text_blocks.all().order_by("placement", "position", "created_at")
+    layout = partial(
+        _render_document,
+        request=request,
+        base_url=base_url,
+        report=report,
+        header=header,
+        preamble=preamble,
+        next_top=next_top,
+        draft=draft,
+        context=context,
+        url_fetcher=url_fetcher,
+    )
+
+    def render(**kwargs):
+        if should_continue is not None and not should_continue():
+            raise PdfRenderCancelled(f"Renderização do laudo {report.pk} abandonada: job substituído.")
+        return layout(**kwargs)
+
+    # Com títulos suficientes para um sumário, as páginas dele já entram na
+    # diagramação ÚNICA do corpo (logo após "LAUDO Nº", sem os números, que
+    # ficam numa coluna de largura fixa): a numeração "Página N de M" e a
+    # árvore de bookmarks já saem com o sumário contado.
+    reserve_toc = not draft and len(raw_toc_items) > TOC_MIN_TITLES
+    body_document = render(
+        outline_ui=outline_ui,
+        toc_items=raw_toc_items if reserve_toc else [],
+        include_auto_toc=reserve_toc,
+    )
 
-    preamble_text = (
-        text_blocks_qs
-        .filter(placement=ReportTextBlock.Placement.PREAMBLE)
-        .values_list("body", flat=True)
-        .first()
+    if not reserve_toc:
+        return body_document.write_pdf()
+
+    toc_pages = _toc_page_count(body_document)
+    if toc_pages is None or len(body_document.pages) - toc_pages <= TOC_MIN_PAGES:
+        # Laudo curto: sem sumário (nova diagramação, barata nesse tamanho)
+        return render(outline_ui=outline_ui, toc_items=[], include_auto_toc=False).write_pdf()
+
+    # Números do sumário direto da árvore de bookmarks do corpo (sem deslocamento)
+    bookmark_pages: dict[str, int] = {}
+    _flatten_bookmarks(body_document.make_bookmark_tree(), bookmark_pages)
+    toc_items = _apply_toc_pages(raw_toc_items, bookmark_pages, offset=0)
+
+    # Só as páginas de "LAUDO Nº" + sumário são diagramadas de novo, agora numeradas
+    toc_document = render(
+        outline_ui=[],
+        toc_items=toc_items,
+        include_auto_toc=True,
+        toc_only=True,
+        total_pages=len(body_document.pages),
     )
-    preamble = (preamble_text or "").strip() or report.preamble
+    if len(toc_document.pages) != toc_pages:
+        # Não deveria ocorrer (mesmo conteúdo e larguras); por segurança,
+        # diagrama o corpo completo com o sumário numerado.
+        return render(outline_ui=outline_ui, toc_items=toc_items, include_auto_toc=True).write_pdf()
 
-    base_objects = list(report.exam_objects.all().order_by("order", "created_at"))
-    concrete_objects = [o.concrete for o in base_objects]
+    return _assemble_with_toc(body_document, toc_document, toc_pages).write_pdf()
 
-    placements = ReportTextBlock.Placement
-    prepend_blocks: list[dict] = []
-    append_blocks: list[dict] = []
 
-    def add_to_prepend(label, placement_enum):
-        txt = (
-            text_blocks_qs
-            .filter(placement=placement_enum)
-            .values_list("body", flat=True)
-            .first()
-        )
-        if (txt or "").strip():
-            prepend_blocks.append(
-                {
-                    "kind": "text_section",
-                    "label": label,
-                    "value": txt,
-                    "fmt": "md",
-                }
-            )
-
-    add_to_prepend("Resumo", placements.SUMMARY)
-
-    glossary_p = getattr(placements, "GLOSSARY", None)
-    if glossary_p:
-        add_to_prepend("Glossário", glossary_p)
-
-    historic_p = getattr(placements, "HISTORIC", None) or getattr(placements, "HISTORY", None)
-    if historic_p:
-        add_to_prepend("Histórico", historic_p)
-
-    meta_blocks = list(report.get_render_blocks() or [])
-    prepend_blocks.extend(meta_blocks)
-
-    cf_txt = "\n\n".join(
-        text_blocks_qs
-        .filter(placement=placements.FINAL_CONSIDERATIONS)
-        .values_list("body", flat=True)
-    )
-    if cf_txt.strip():
-        append_blocks.append(
-            {
-                "kind": "text_section",
-                "label": "Considerações Finais",
-                "value": cf_txt,
-                "fmt": "md",
-            }
+def ensure_final_pdf(report: ReportCase, *, user, base_url: str, request=None) -> ReportCase:
+    """
+    Garante o PDF final persistido de um laudo concluído.
+
+    - Se já existir (e o arquivo estiver no storage), nada é renderizado.
+    - Caso contrário renderiza uma única vez e grava em reports/<id>/final/.
+    """
+    if report.has_final_pdf:
+        if report.final_pdf.storage.exists(report.final_pdf.name):
+            return report
+
+        # Registro aponta para arquivo inexistente: libera para nova renderização.
+        ReportCase.objects.filter(pk=report.pk, final_pdf=report.final_pdf.name).update(
+            final_pdf="", final_pdf_sha256="", final_pdf_rendered_at=None
         )
+        report.refresh_from_db(fields=["final_pdf", "final_pdf_sha256", "final_pdf_rendered_at"])
+
+    pdf_bytes = render_report_pdf(report, user=user, base_url=base_url, request=request)
+    report.store_final_pdf(pdf_bytes, f"{report_pdf_filename(report)}.pdf")
+    return report
+
+
+def _final_pdf_response(request, report: ReportCase) -> HttpResponse:
+    """
+    Serve o PDF final armazenado (leitura de disco, sem renderização).
 
-    c_txt = "\n\n".join(
-        text_blocks_qs
-        .filter(placement=placements.CONCLUSION)
-        .values_list("body", flat=True)
+    ETag = SHA-256 do conteúdo; If-None-Match correspondente devolve 304.
+    """
+    etag = f'"{report.final_pdf_sha256}"'
+
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    digest_b64 = base64.b64encode(bytes.fromhex(report.final_pdf_sha256)).decode("ascii")
+
+    response = FileResponse(
+        report.final_pdf.open("rb"),
+        content_type="application/pdf",
+        as_attachment=True,
+        filename=f"{report_pdf_filename(report)}.pdf",
     )
-    if c_txt.strip():
-        append_blocks.append(
-            {
-                "kind": "text_section",
-                "label": "Conclusão",
-                "value": c_txt,
-                "fmt": "md",
-            }
-        )
+    response["ETag"] = etag
+    response["Repr-Digest"] = f"sha-256=:{digest_b64}:"
+    response["Cache-Control"] = "private, no-cache"
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+# Intervalo (s) entre as atualizações da página de acompanhamento do PDF
+PDF_STATUS_RETRY_SECONDS = 3
+
+
+def _requested_job(report: ReportCase, job_id: str) -> ReportRenderJob | None:
+    """Job do laudo indicado em ?job= (página de acompanhamento), já resolvido (resolve())."""
+    try:
+        job = ReportRenderJob.objects.filter(pk=job_id, report_case=report).first()
+    except (ValueError, ValidationError):
+        return None
+    return job.resolve() if job else None
+
+
+def _job_status_response(request, report: ReportCase, job: ReportRenderJob) -> HttpResponse:
+    """
+    Página de acompanhamento: job pendente -> 202, atualizada a cada
+    PDF_STATUS_RETRY_SECONDS até o PDF ficar pronto; job que falhou -> 500
+    com opção de tentar de novo (novo pedido, sem ?job=).
+    """
+    pending = not job.is_finished
+    retry_url = request.path + ("?mode=draft" if job.draft else "")
+    response = render(
+        request,
+        "report_maker/report_pdf_status.html",
+        {
+            "report": report,
+            "pending": pending,
+            "retry_after": PDF_STATUS_RETRY_SECONDS,
+            "refresh_url": f"{request.path}?{urlencode({'job': job.pk})}",
+            "retry_url": retry_url,
+        },
+        status=202 if pending else 500,
+    )
+    if pending:
+        response["Retry-After"] = str(PDF_STATUS_RETRY_SECONDS)
+    response["Cache-Control"] = "no-store"
+    return response
 
-    outline, next_top = build_report_outline(
-        report=report,
-        exam_objects_qs=base_objects,
-        text_blocks_qs=text_blocks_qs,
-        start_at=1,
-        prepend_blocks=prepend_blocks,
-        append_blocks=append_blocks,
+
+@login_required
+def reportPDFGenerator(request, pk):
+    """
+    PDF do laudo. Em edição, `?mode=draft` gera o rascunho rápido
+    (build_report_pdf(draft=True)); laudo concluído sempre serve o PDF final.
+
+    O request nunca renderiza nem aguarda: o pedido vai para a fila
+    (enqueue_report_pdf, single-flight por versão) e o PDF é servido quando
+    o job da versão estiver concluído; até lá, página de acompanhamento
+    (202) que volta a esta rota com ?job=<id>. O PDF final já gravado de
+    laudo concluído é servido direto do storage.
+    """
+    report = get_object_or_404(
+        ReportCase.objects.select_related("author", "institution", "nucleus__city", "team"),
+        pk=pk,
+        author=request.user,
     )
 
-    models_set = {o.__class__ for o in concrete_objects}
-    ct_map = ContentType.objects.get_for_models(*models_set) if models_set else {}
-
-    ids_by_ct = defaultdict(list)
-    for obj in concrete_objects:
-        ct = ct_map.get(obj.__class__)
-        if ct:
-            ids_by_ct[ct.id].append(obj.pk)
-
-    q = Q()
-    for ct_id, ids in ids_by_ct.items():
-        q |= Q(content_type_id=ct_id, object_id__in=ids)
-
-    images_by_key = defaultdict(list)
-    if q:
-        imgs = (
-            ObjectImage.objects
-            .filter(q)
-            .order_by("index", "id")
-            .select_related("content_type")
-        )
-        for img in imgs:
-            images_by_key[(img.content_type_id, img.object_id)].append(img)
-
-        outline_ui = _normalize_outline_ui(outline, ct_map, images_by_key, report)
-        raw_toc_items = _collect_toc_items(outline_ui)
-
-        first_document = _render_document(
-            request=request,
-            report=report,
-            header=header,
-            preamble=preamble,
-            outline_ui=outline_ui,
-            next_top=next_top,
-            toc_items=[],
-            include_auto_toc=False,
-        )
+    if not report.can_edit and report.has_final_pdf and report.final_pdf.storage.exists(report.final_pdf.name):
+        return _final_pdf_response(request, report)
 
-        page_count = len(first_document.pages)
-        toc_title_count = len(raw_toc_items)
-        generate_toc = page_count > 20 and toc_title_count > 10
-
-        def normalize(value: str) -> str:
-            value = value.replace("/", "_")
-            value = re.sub(r"[^a-zA-Z0-9_]", "", value)
-            return value.lower()
-
-        number_part = normalize(report.report_number)
-        type_part = normalize(report.criminal_typification)
-        filename = f"{number_part}${type_part}"
-
-        if not generate_toc:
-            pdf_bytes = first_document.write_pdf()
-            response = HttpResponse(pdf_bytes, content_type="application/pdf")
-            response["Content-Disposition"] = f'attachment; filename="{filename}.pdf"'
-            response["X-Content-Type-Options"] = "nosniff"
-            response["Content-Length"] = str(len(pdf_bytes))
-            return response
-
-        bookmark_pages: dict[str, int] = {}
-        _flatten_bookmarks(first_document.make_bookmark_tree(), bookmark_pages)
-
-        initial_toc_offset = 1
-        toc_items_pass_2 = _apply_toc_pages(
-            raw_toc_items,
-            bookmark_pages,
-            offset=initial_toc_offset,
-        )
+    job = _requested_job(report, request.GET["job"]) if request.GET.get("job") else None
+    if job is None or (job.status == ReportRenderJob.Status.DONE and not job.output.storage.exists(job.output.name)):
+        draft = report.can_edit and request.GET.get("mode") == "draft"
+        job = enqueue_report_pdf(report, request.user, draft=draft)
 
-        second_document = _render_document(
-            request=request,
-            report=report,
-            header=header,
-            preamble=preamble,
-            outline_ui=outline_ui,
-            next_top=next_top,
-            toc_items=toc_items_pass_2,
-            include_auto_toc=True,
-        )
+    if job.status != ReportRenderJob.Status.DONE:
+        return _job_status_response(request, report, job)
+
+    if not report.can_edit:
+        # concluído pelo worker: PDF final gravado (ensure_final_pdf)
+        report.refresh_from_db(fields=["final_pdf", "final_pdf_sha256", "final_pdf_rendered_at"])
+        return _final_pdf_response(request, report)
 
-        toc_page_count = max(len(second_document.pages) - len(first_document.pages), 1)
-
-        if toc_page_count != initial_toc_offset:
-            toc_items_final = _apply_toc_pages(
-                raw_toc_items,
-                bookmark_pages,
-                offset=toc_page_count,
-            )
-
-            final_document = _render_document(
-                request=request,
-                report=report,
-                header=header,
-                preamble=preamble,
-                outline_ui=outline_ui,
-                next_top=next_top,
-                toc_items=toc_items_final,
-                include_auto_toc=True,
-            )
-        else:
-            final_document = second_document
-
-        pdf_bytes = final_document.write_pdf()
-
-        response = HttpResponse(pdf_bytes, content_type="application/pdf")
-        response["Content-Disposition"] = f'attachment; filename="{filename}.pdf"'
-        response["X-Content-Type-Options"] = "nosniff"
-        response["Content-Length"] = str(len(pdf_bytes))
-        return response
\ No newline at end of file
+    with job.output.open("rb") as fh:
+        pdf_bytes = fh.read()
+    return _pdf_response(pdf_bytes, report_pdf_filename(report, draft=job.draft))
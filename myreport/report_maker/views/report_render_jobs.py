@@ -0,0 +1,89 @@
+# report_maker/views/report_render_jobs.py
+from __future__ import annotations
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
+
+from report_maker.models import ReportCase, ReportRenderJob
+from report_maker.utils.pdf_render_queue import enqueue_report_pdf
+
+
+def _job_payload(job: ReportRenderJob) -> dict:
+    report_pk = job.report_case_id
+    payload = {
+        "ok": True,
+        "job_id": str(job.pk),
+        "status": job.status,
+        "status_url": reverse(
+            "report_maker:report_pdf_job_status", kwargs={"pk": report_pk, "job_id": job.pk}
+        ),
+        "download_url": None,
+    }
+    if job.status == ReportRenderJob.Status.DONE:
+        payload["download_url"] = reverse(
+            "report_maker:report_pdf_job_download", kwargs={"pk": report_pk, "job_id": job.pk}
+        )
+    if job.status == ReportRenderJob.Status.FAILED:
+        payload["error"] = "render_failed"
+    return payload
+
+
+def _get_job(request, pk, job_id) -> ReportRenderJob:
+    """
+    Job do autor; um job substituído responde pelo mais recente do mesmo
+    laudo (single-flight), então quem aguardava a versão antiga recebe a nova.
+    """
+    job = get_object_or_404(
+        ReportRenderJob.objects.select_related("report_case"),
+        pk=job_id,
+        report_case_id=pk,
+        report_case__author=request.user,
+    )
+    return job.resolve()
+
+
+@login_required
+@require_POST
+def report_pdf_job_submit(request, pk):
+    """
+    Enfileira a geração do PDF do laudo e responde imediatamente (202).
+
+    O PDF é produzido pelo worker `manage.py render_report_pdfs`; o cliente
+    acompanha pelo `status_url` e baixa pelo `download_url` quando pronto.
+    `mode=draft` enfileira o rascunho rápido (laudo em edição).
+    """
+    report = get_object_or_404(ReportCase, pk=pk, author=request.user)
+    draft = report.can_edit and request.POST.get("mode") == "draft"
+    job = enqueue_report_pdf(report, request.user, draft=draft)
+    return JsonResponse(_job_payload(job), status=202)
+
+
+@login_required
+@require_GET
+def report_pdf_job_status(request, pk, job_id):
+    """
+    Status do job, respondido na hora: nenhum worker do servidor fica preso
+    aguardando a renderização. O cliente repete a consulta com backoff
+    (report_pdf_job.js).
+    """
+    job = _get_job(request, pk, job_id)
+    return JsonResponse(_job_payload(job), status=200)
+
+
+@login_required
+@require_GET
+def report_pdf_job_download(request, pk, job_id):
+    job = _get_job(request, pk, job_id)
+
+    if job.status != ReportRenderJob.Status.DONE or not job.output:
+        return JsonResponse({"ok": False, "error": "job_not_done", "status": job.status}, status=409)
+
+    return FileResponse(
+        job.output.open("rb"),
+        content_type="application/pdf",
+        as_attachment=False,
+        filename=job.output.name.rsplit("/", 1)[-1],
+    )
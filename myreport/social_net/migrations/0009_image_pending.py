@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_net', '0008_post_opened_by_third_party_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='media_pending',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='Imagem aguardando otimização'),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='image_pending',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='Imagem aguardando otimização'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_net', '0009_image_pending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='media_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Otimização iniciada em'),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='image_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Otimização iniciada em'),
+        ),
+    ]
@@ -1,16 +1,15 @@
 # social_net/models.py
 import os
 import uuid
-from io import BytesIO
+from datetime import timedelta
 
 from django.conf import settings
-from django.core.files.base import ContentFile
 from django.db import models
 from django.db.models.signals import pre_save 
 from django.dispatch import receiver         
 from django.utils import timezone
 
-from PIL import Image, ImageOps
+from common.image_processing import normalize_image, swap_file_field
 
 
 # =========================
@@ -34,65 +33,98 @@ def comment_image_path(instance, filename: str) -> str:
 
 
 # =========================
-# Image optimization helper
+# Image optimization (fora do request)
 # =========================
-def _optimize_image_field(
-    instance,
-    field_name: str,
-    *,
-    max_side: int = 1920,
-    quality: int = 85,
-) -> bool:
+OPTIMIZABLE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def _mark_image_pending(sender, instance, field_name: str, flag_name: str) -> None:
+    """
+    Marca o registro para otimização quando há arquivo de imagem novo
+    (criação ou troca). O arquivo é gravado como enviado; a otimização é
+    feita pelo worker `process_social_images`. Uma reivindicação em curso
+    (do arquivo anterior) deixa de valer.
+    """
+    f = getattr(instance, field_name, None)
+    if not f or not f.name.lower().endswith(OPTIMIZABLE_EXTENSIONS):
+        return
+
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+        if previous == f.name:
+            return
+
+    setattr(instance, flag_name, True)
+    setattr(instance, sender.IMAGE_CLAIMED_AT, None)
+
+
+def _release_pending_image(model, pk, name: str) -> None:
+    """Encerra a pendência sem trocar o arquivo (ilegível/sem otimização), se ele não mudou."""
+    lookup = {model.IMAGE_FIELD: name} if name else {f"{model.IMAGE_FIELD}__in": ["", None]}
+    model.objects.filter(pk=pk, **lookup).update(**{model.IMAGE_PENDING_FLAG: False, model.IMAGE_CLAIMED_AT: None})
+
+
+def optimize_pending_image(item) -> bool:
     """
-    Otimiza uma imagem (se o arquivo for imagem legível pelo Pillow):
+    Otimiza a imagem de um registro reivindicado (item = (model, pk)):
     - corrige orientação EXIF;
     - converte para RGB;
     - redimensiona mantendo proporção (sem aumentar);
-    - regrava como JPEG com compressão;
+    - regrava como JPEG com compressão.
     Retorna True se otimizou e substituiu o arquivo, senão False.
+
+    A pendência só é encerrada no mesmo UPDATE condicional que troca o
+    arquivo (ou quando não há o que otimizar): se o worker morrer no meio,
+    requeue_stale_images devolve o registro à fila.
     """
+    model, pk = item
+    field_name = model.IMAGE_FIELD
+    instance = model.objects.filter(pk=pk).only("pk", field_name).first()
+    if instance is None:
+        return False
     f = getattr(instance, field_name, None)
     if not f:
+        _release_pending_image(model, pk, "")
         return False
-    if not f.name.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
-        return False
-    
+
     try:
-        f.open("rb")
-        img = Image.open(f)
-        img.load()
+        with f.open("rb") as fh:
+            normalized = normalize_image(fh, max_side=model.IMAGE_MAX_SIDE, quality=model.IMAGE_QUALITY, always=True)
     except Exception:
-        # Não é imagem (ou não legível) => não mexe
+        # arquivo ausente/ilegível => não mexe no arquivo
+        normalized = None
+    if normalized is None:
+        _release_pending_image(model, pk, f.name)
         return False
-    finally:
-        try:
-            f.close()
-        except Exception:
-            pass
-
-    # Processamento e otimização da imagem
-    img = ImageOps.exif_transpose(img)
 
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
+    done = {model.IMAGE_PENDING_FLAG: False, model.IMAGE_CLAIMED_AT: None}
+    return swap_file_field(model, pk, field_name, f.name, normalized.data, **done) is not None
 
-    # Redimensionamento
-    img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
 
-    # Cria buffer de saída
-    out = BytesIO()
-    img.save(out, format="JPEG", quality=quality, optimize=True)
-    out.seek(0)
+def claim_next_pending_image():
+    """
+    Reivindica o próximo registro (Post ou PostComment) com imagem pendente
+    e não reivindicada. O UPDATE condicional de <campo>_claimed_at garante
+    um único worker por registro; o flag de pendência continua ligado até
+    o processamento terminar.
+    """
+    for model in (Post, PostComment):
+        pending = {model.IMAGE_PENDING_FLAG: True, f"{model.IMAGE_CLAIMED_AT}__isnull": True}
+        for pk in list(model.objects.filter(**pending).values_list("pk", flat=True)[:10]):
+            if model.objects.filter(pk=pk, **pending).update(**{model.IMAGE_CLAIMED_AT: timezone.now()}):
+                return (model, pk)
+    return None
 
-    # Gera novo nome (mantendo o caminho, mas garantindo extensão .jpg)
-    old_name = f.name or ""
-    dir_name = os.path.dirname(old_name)
-    base = os.path.splitext(os.path.basename(old_name))[0] or uuid.uuid4().hex
-    new_name = f"{dir_name}/{base}.jpg" if dir_name else f"{base}.jpg"
 
-    # Substitui o arquivo (sem salvar o model ainda - importante para pre_save)
-    getattr(instance, field_name).save(new_name, ContentFile(out.read()), save=False)
-    return True
+def requeue_stale_images(*, older_than: timedelta) -> int:
+    """Devolve à fila imagens reivindicadas e não concluídas (worker encerrado no meio)."""
+    limit = timezone.now() - older_than
+    requeued = 0
+    for model in (Post, PostComment):
+        requeued += model.objects.filter(
+            **{model.IMAGE_PENDING_FLAG: True, f"{model.IMAGE_CLAIMED_AT}__lt": limit}
+        ).update(**{model.IMAGE_CLAIMED_AT: None})
+    return requeued
 
 
 # =========================
@@ -129,6 +161,8 @@ class Post(models.Model):
         blank=True,
         null=True,
     )
+    media_pending = models.BooleanField("Imagem aguardando otimização", default=False, editable=False, db_index=True)
+    media_claimed_at = models.DateTimeField("Otimização iniciada em", null=True, blank=True, editable=False)
 
     related_url = models.URLField(
         "Link relacionado",
@@ -147,6 +181,9 @@ class Post(models.Model):
     # Limites de imagem (para exibição com qualidade em tela 19")
     IMAGE_MAX_SIDE = 1920
     IMAGE_QUALITY = 85
+    IMAGE_FIELD = "media"
+    IMAGE_PENDING_FLAG = "media_pending"
+    IMAGE_CLAIMED_AT = "media_claimed_at"
 
     class Meta:
         ordering = ["-updated_at"]
@@ -162,9 +199,9 @@ class Post(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Salva a postagem. A otimização de imagem foi movida para o signal pre_save.
+        Salva a postagem. A imagem é marcada para otimização no signal
+        pre_save e otimizada fora do request (process_social_images).
         """
-        # A otimização ocorre no pre_save. Aqui, apenas o salvamento principal.
         super().save(*args, **kwargs)
 
 
@@ -253,6 +290,8 @@ class PostComment(models.Model):
         blank=True,
         null=True,
     )
+    image_pending = models.BooleanField("Imagem aguardando otimização", default=False, editable=False, db_index=True)
+    image_claimed_at = models.DateTimeField("Otimização iniciada em", null=True, blank=True, editable=False)
 
     parent = models.ForeignKey(
         "self",
@@ -268,6 +307,9 @@ class PostComment(models.Model):
     # Limites de imagem (para exibição com qualidade em tela 19")
     IMAGE_MAX_SIDE = 1920
     IMAGE_QUALITY = 85
+    IMAGE_FIELD = "image"
+    IMAGE_PENDING_FLAG = "image_pending"
+    IMAGE_CLAIMED_AT = "image_claimed_at"
 
     class Meta:
         ordering = ["created_at"]
@@ -289,8 +331,8 @@ class PostComment(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Salva o comentário. A otimização e a atualização do updated_at do Post
-        foram movidas para os signals pre_save e post_save.
+        Salva o comentário. A marcação da imagem para otimização e a
+        atualização do updated_at do Post ficam nos signals pre_save e post_save.
         """
         super().save(*args, **kwargs)
 
@@ -302,30 +344,21 @@ class PostComment(models.Model):
 @receiver(pre_save, sender=Post)
 def optimize_post_media(sender, instance, **kwargs):
     """
-    Otimiza a imagem do Post ANTES de ser salva no storage,
-    evitando que o arquivo original (grande) seja salvo primeiro.
+    Marca a imagem nova do Post para otimização fora do request
+    (o arquivo é gravado como enviado).
     """
-    _optimize_image_field(
-        instance,
-        "media",
-        max_side=instance.IMAGE_MAX_SIDE,
-        quality=instance.IMAGE_QUALITY,
-    )
+    _mark_image_pending(sender, instance, "media", "media_pending")
 
 
 @receiver(pre_save, sender=PostComment)
 def optimize_comment_image(sender, instance, **kwargs):
     """
-    Otimiza a imagem do Comentário ANTES de ser salva no storage,
-    evitando que o arquivo original (grande) seja salvo primeiro.
+    Marca a imagem nova do Comentário para otimização fora do request
+    (o arquivo é gravado como enviado).
     """
-    _optimize_image_field(
-        instance,
-        "image",
-        max_side=instance.IMAGE_MAX_SIDE,
-        quality=instance.IMAGE_QUALITY,
-    )
-    
+    _mark_image_pending(sender, instance, "image", "image_pending")
+
+
 @receiver(models.signals.post_save, sender=PostComment)
 def update_post_on_comment_save(sender, instance, created, **kwargs):
     """
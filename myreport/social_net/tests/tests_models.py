@@ -1,9 +1,26 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db import IntegrityError, transaction
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
 
 from accounts.models import User
-from social_net.models import Post, PostLike, PostRating, PostComment, PostHidden
+from social_net.models import (
+    Post,
+    PostComment,
+    PostHidden,
+    PostLike,
+    PostRating,
+    claim_next_pending_image,
+    optimize_pending_image,
+    requeue_stale_images,
+)
 from social_net.forms import PostCommentForm
 
 
@@ -102,3 +119,68 @@ class SocialNetModelsTests(TestCase):
         h = PostHidden.objects.create(post=self.post, user=self.u2)
         s = str(h)
         self.assertIn("ocultou", s)
+
+
+class SocialNetImageOptimizationTests(TestCase):
+    """A imagem é gravada como enviada e otimizada depois pelo worker."""
+
+    def setUp(self):
+        self._tmpdir = tempfile.mkdtemp(prefix="social_media_")
+        self.addCleanup(lambda: shutil.rmtree(self._tmpdir, ignore_errors=True))
+        settings_override = override_settings(MEDIA_ROOT=self._tmpdir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username="u1", email="u1@example.com", password="x")
+
+    def test_post_image_is_optimized_off_request(self):
+        buf = io.BytesIO()
+        Image.new("RGBA", (3000, 1000), (0, 0, 0, 0)).save(buf, format="PNG")
+        post = Post.objects.create(
+            user=self.user,
+            text="Texto",
+            media=SimpleUploadedFile("foto.png", buf.getvalue(), content_type="image/png"),
+        )
+        self.assertTrue(post.media_pending)
+        self.assertTrue(post.media.name.endswith(".png"))
+
+        item = claim_next_pending_image()
+        self.assertEqual(item, (Post, post.pk))
+        self.assertIsNone(claim_next_pending_image())
+        self.assertTrue(optimize_pending_image(item))
+
+        post.refresh_from_db()
+        self.assertFalse(post.media_pending)
+        with post.media.open("rb") as fh, Image.open(fh) as im:
+            self.assertEqual((im.format, im.size), ("JPEG", (1920, 640)))
+
+        # edição sem troca de arquivo não volta para a fila
+        post.text = "Outro"
+        post.save()
+        self.assertIsNone(claim_next_pending_image())
+
+    def test_abandoned_claim_is_requeued(self):
+        buf = io.BytesIO()
+        Image.new("RGB", (3000, 1000), (10, 10, 10)).save(buf, format="PNG")
+        post = Post.objects.create(
+            user=self.user,
+            text="Texto",
+            media=SimpleUploadedFile("foto.png", buf.getvalue(), content_type="image/png"),
+        )
+
+        # worker reivindica e morre antes de otimizar
+        self.assertEqual(claim_next_pending_image(), (Post, post.pk))
+        post.refresh_from_db()
+        self.assertTrue(post.media_pending)
+        self.assertIsNone(claim_next_pending_image())
+
+        self.assertEqual(requeue_stale_images(older_than=timedelta(minutes=5)), 0)
+        Post.objects.filter(pk=post.pk).update(media_claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_images(older_than=timedelta(minutes=5)), 1)
+
+        item = claim_next_pending_image()
+        self.assertEqual(item, (Post, post.pk))
+        self.assertTrue(optimize_pending_image(item))
+        post.refresh_from_db()
+        self.assertFalse(post.media_pending)
+        self.assertIsNone(post.media_claimed_at)